@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+ShoeMart ChatBot bất đồng bộ
+Phục vụ nhiều hội thoại đồng thời trên một event loop qua AsyncDatabaseService
+"""
+
+import asyncio
+import random
+import sys
+import time
+import logging
+from typing import Dict, Any, List, Optional
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+from async_database_manager import AsyncDatabaseService
+from config import CHATBOT_CONFIG, ERROR_MESSAGES, PAGINATION_CONFIG
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AsyncShoeMartChatBot(ShoeMartMySQLChatBot):
+    """ChatBot ShoeMart với get_response dạng coroutine"""
+
+    def __init__(self, db_service: Optional[AsyncDatabaseService] = None):
+        super().__init__(db_service)
+
+    def _init_database(self, db_service: Optional[AsyncDatabaseService] = None):
+        """Chỉ tạo service, kết nối thực hiện trong connect()"""
+        self.db_service = db_service or AsyncDatabaseService()
+        self.is_db_connected = False
+        self.db_ready = asyncio.Event()  # set khi connect() xong, thành công hay không
+        self.warmup_seconds = None
+        self._snapshot_fallback = False  # bản async không có snapshot chỉ đọc
+        self._owns_db_service = False
+
+    def start_warm_up(self):
+        # Kết nối và kiểm tra database thực hiện trong connect()
+        pass
+
+    async def warm_up(self):
+        """Bản async của warm_up: chính là connect()"""
+        await self.connect()
+
+    async def wait_for_database(self, timeout: Optional[float] = None) -> bool:
+        """Chờ connect() xong (tối đa CHATBOT_CONFIG['warmup_wait'] giây)"""
+        try:
+            await asyncio.wait_for(self.db_ready.wait(), CHATBOT_CONFIG['warmup_wait'] if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def connect(self) -> bool:
+        """Mở connection pool và kiểm tra kết nối"""
+        start = time.perf_counter()
+        try:
+            await self.db_service.connect()
+            self.is_db_connected = (await self.db_service.health_check())['connected']
+            if self.is_db_connected:
+                logger.info("✅ Async ChatBot connected to database successfully")
+            else:
+                logger.error("❌ Failed to connect to database")
+        except Exception as e:
+            logger.error(f"Database initialization error: {e}")
+            self.is_db_connected = False
+        self.warmup_seconds = time.perf_counter() - start
+        self.db_ready.set()
+        return self.is_db_connected
+
+    async def close(self):
+        """Đóng connection pool"""
+        if self.db_service:
+            await self.db_service.close_connections()
+
+    async def search_products(self, text: str) -> str:
+        """Tìm kiếm sản phẩm từ database hoặc fallback"""
+        search_term = self.extract_search_term(text)
+
+        if not search_term:
+            return "🔍 Vui lòng nhập từ khóa tìm kiếm cụ thể hơn. Ví dụ: 'Nike', 'Adidas', 'boots'..."
+
+        if not self.is_db_connected:
+            return self.format_fallback_search(search_term)
+
+        try:
+            products = await self.db_service.products.search_products_by_name(search_term)
+            return self.format_search_results(search_term, products)
+
+        except Exception as e:
+            logger.error(f"Product search error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def show_product_page(self, listing: str, args: tuple, title: str, limit: int, context) -> str:
+        """Lấy trang đầu của listing, ghi nhớ vị trí và format"""
+        page, text = await self.render_product_page(listing, args, title, limit)
+        self.remember_page(context, listing, args, title, limit, page)
+        return text
+
+    async def render_product_page(self, listing: str, args: tuple, title: str, limit: int,
+                                  after: Optional[tuple] = None, shown_before: int = 0,
+                                  total: Optional[int] = None) -> tuple:
+        """(page, text) của một trang listing, dùng response cache như bản đồng bộ"""
+        key = self.page_cache_key(listing, args, title, limit, after, shown_before, total)
+        cached = self.response_cache.get(self.catalog_version(fresh_only=True), key)
+        if cached is not None:
+            return cached
+        page = await self.db_service.products.get_product_page(listing, args, limit, after=after,
+                                                               with_total=total is None)
+        return self.store_rendered_page(key, page, title, shown_before, total)
+
+    async def get_next_page(self, context=None) -> str:
+        """Xem trang tiếp theo của danh sách gần nhất"""
+        context = context if context is not None else self
+        state = context.pagination
+        if not state:
+            return self.NO_NEXT_PAGE
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            page, text = await self.render_product_page(
+                state['listing'], state['args'], state['title'], state['limit'],
+                after=state['cursor'], shown_before=state['shown'], total=state['total']
+            )
+            self.remember_page(context, state['listing'], state['args'], state['title'],
+                               state['limit'], page, state['shown'])
+            return text
+
+        except Exception as e:
+            logger.error(f"Next page error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_products_by_category(self, category: str, context=None) -> str:
+        """Lấy sản phẩm theo danh mục"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            return await self.show_product_page(
+                'category', (category,), f"Sản phẩm {category.upper()}:",
+                PAGINATION_CONFIG['page_size'], context if context is not None else self
+            )
+
+        except Exception as e:
+            logger.error(f"Category search error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_products_by_price_range(self, text: str, context=None) -> str:
+        """Lấy sản phẩm theo khoảng giá"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        slots = self.extract_slots(text)
+        if not slots['price_range']:
+            return self.PRICE_RANGE_HINT
+        return await self.get_filtered_products(slots, context)
+
+    async def get_filtered_products(self, slots: Dict[str, Any], context=None) -> str:
+        """Lấy sản phẩm theo các slot đã trích (thương hiệu + danh mục + khoảng giá)"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            listing, args, title = self.slot_listing(slots)
+            return await self.show_product_page(
+                listing, args, title, PAGINATION_CONFIG['page_size'], context if context is not None else self
+            )
+
+        except Exception as e:
+            logger.error(f"Filtered search error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_popular_products(self) -> str:
+        """Lấy sản phẩm bán chạy"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            products = await self.db_service.products.get_popular_products(10)
+            return self.format_popular_products(products)
+
+        except Exception as e:
+            logger.error(f"Popular products error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_all_products(self, context=None) -> str:
+        """Lấy tất cả sản phẩm"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            return await self.show_product_page(
+                'all', (), "TẤT CẢ SẢN PHẨM SHOEMART:",
+                PAGINATION_CONFIG['all_products_page_size'], context if context is not None else self
+            )
+
+        except Exception as e:
+            logger.error(f"Get all products error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_sales_statistics(self) -> str:
+        """Lấy thống kê bán hàng"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+
+        try:
+            stats = await self.db_service.orders.get_sales_statistics()
+            return self.format_sales_statistics(stats)
+
+        except Exception as e:
+            logger.error(f"Sales statistics error: {e}")
+            return ERROR_MESSAGES['query_failed']
+
+    async def get_response(self, user_input: str, context=None) -> str:
+        """Lấy phản hồi chính (coroutine)"""
+        if not user_input.strip():
+            return self.EMPTY_INPUT_RESPONSE
+
+        cached = self.memoized_response(user_input)
+        if cached is not None:
+            return cached
+
+        context = context if context is not None else self
+        intent = self.classify_intent(user_input)
+        if intent in self.DATABASE_INTENTS and not self.db_ready.is_set():
+            await self.wait_for_database()
+
+        try:
+            if intent in self.SLOT_INTENTS:
+                slots = self.extract_slots(user_input)
+                if self.is_compound(slots):
+                    return await self.get_filtered_products(slots, context)
+
+            if intent == 'next_page':
+                return await self.get_next_page(context)
+
+            elif intent == 'all_products':
+                return await self.get_all_products(context)
+
+            elif intent == 'product_search' or intent == 'brand_search':
+                return self.remember_response(user_input, intent, await self.search_products(user_input))
+
+            elif intent == 'category_search':
+                category = self.extract_category(user_input)
+                if category:
+                    return await self.get_products_by_category(category, context)
+                return self.remember_response(user_input, intent, await self.search_products(user_input))
+
+            elif intent == 'price_search':
+                return await self.get_products_by_price_range(user_input, context)
+
+            elif intent == 'popular_products':
+                return self.remember_response(user_input, intent, await self.get_popular_products())
+
+            elif intent == 'statistics':
+                return self.remember_response(user_input, intent, await self.get_sales_statistics())
+
+            else:
+                return self.remember_response(user_input, intent, tuple(self.static_variants(intent)))
+
+        except Exception as e:
+            logger.error(f"Response generation error: {e}")
+            return self.ERROR_RESPONSE
+
+    async def get_responses(self, messages: List[str], context=None, workers: Optional[int] = None) -> List[str]:
+        """Trả lời nhiều tin nhắn theo thứ tự (coroutine)
+
+        Bản đồng bộ gom truy vấn bằng DAO đồng bộ nên không dùng được ở đây: các tin nhắn được
+        trả lời lần lượt để trạng thái 'trang sau' của context giống khi gọi get_response,
+        tin nhắn trùng vẫn chỉ truy vấn một lần nhờ response memo và render cache.
+        workers giữ cho cùng chữ ký với bản đồng bộ, không dùng.
+        """
+        return [await self.get_response(message, context) for message in messages]
+
+    async def chat(self):
+        """Chat session trên console (đọc input trong thread riêng)"""
+        print("=" * 70)
+        print(f"🤖 {self.name} v{self.version} - Async ChatBot")
+        print("✅ Database: Đã kết nối" if self.is_db_connected else "❌ Database: Lỗi kết nối")
+        print("\nGõ 'quit' hoặc 'exit' để thoát")
+        print("=" * 70)
+
+        while True:
+            try:
+                user_input = (await asyncio.to_thread(input, "\n👤 Bạn: ")).strip()
+            except (KeyboardInterrupt, EOFError):
+                break
+
+            if user_input.lower() in ['quit', 'exit', 'thoát', 'bye']:
+                break
+
+            if user_input:
+                response = await self.get_response(user_input)
+                print(f"\n🤖 {self.name}: {response}")
+                self.add_to_history(user_input, response)
+
+        print(f"\n🤖 {self.name}: Cảm ơn bạn đã sử dụng dịch vụ! Hẹn gặp lại! 👋")
+
+    def __del__(self):
+        # Pool async được đóng qua close(), không đóng trong destructor
+        pass
+
+async def demo_concurrent_conversations(use_sqlite: bool = False, conversations: int = 200):
+    """Demo phục vụ nhiều hội thoại đồng thời"""
+    if use_sqlite:
+        from sqlite_backend import AsyncSQLiteDatabaseManager, insert_products
+        db_manager = AsyncSQLiteDatabaseManager()
+        chatbot = AsyncShoeMartChatBot(AsyncDatabaseService(db_manager))
+        await chatbot.connect()
+        insert_products(db_manager.connection, [
+            {'Name': p['name'], 'Description': p['description'], 'Price': p['price'], 'Category': p['category']}
+            for p in chatbot.fallback_products
+        ])
+    else:
+        chatbot = AsyncShoeMartChatBot()
+        await chatbot.connect()
+
+    queries = ["xin chào", "giày nike", "giày thể thao", "giày dưới 2 triệu", "xem tất cả sản phẩm", "sản phẩm bán chạy"]
+    messages = [queries[i % len(queries)] for i in range(conversations)]
+
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(chatbot.get_response(m) for m in messages))
+    elapsed = time.perf_counter() - start
+
+    print(f"💬 {len(responses)} hội thoại đồng thời trong {elapsed * 1000:.1f} ms")
+    print(f"📝 Ví dụ '{messages[1]}':\n{responses[1]}")
+    await chatbot.close()
+
+if __name__ == "__main__":
+    asyncio.run(demo_concurrent_conversations(use_sqlite='--sqlite' in sys.argv))
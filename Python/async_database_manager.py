@@ -0,0 +1,352 @@
+# -*- coding: utf-8 -*-
+"""
+Async Database Manager cho ShoeMart ChatBot
+Phiên bản asyncio của DatabaseManager/DatabaseService dùng connection pool aiomysql
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from database_manager import DatabaseService, ProductCatalogCache, listing_query, build_product_page
+from statement_cache import rows_from_values
+from records import QUERY_ROW_TYPES
+from config import DATABASE_CONFIG, SQL_QUERIES, ERROR_MESSAGES, SUCCESS_MESSAGES, CACHE_CONFIG, PAGINATION_CONFIG
+
+try:
+    import aiomysql
+except ImportError:  # aiomysql chỉ cần khi chạy async với MySQL thật
+    aiomysql = None
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class AsyncDatabaseManager:
+    """Quản lý connection pool bất đồng bộ tới MySQL"""
+
+    def __init__(self):
+        self.pool = None
+        self.is_connected = False
+        self._write_listeners = []
+
+    async def connect(self):
+        """Khởi tạo async connection pool"""
+        if aiomysql is None:
+            logger.error("aiomysql is not installed")
+            raise Exception(ERROR_MESSAGES['db_connection_failed'])
+
+        try:
+            self.pool = await aiomysql.create_pool(
+                host=DATABASE_CONFIG['host'],
+                port=DATABASE_CONFIG['port'],
+                db=DATABASE_CONFIG['database'],
+                user=DATABASE_CONFIG['user'],
+                password=DATABASE_CONFIG['password'],
+                charset=DATABASE_CONFIG.get('charset', 'utf8mb4'),
+                autocommit=DATABASE_CONFIG.get('autocommit', True),
+                minsize=1,
+                maxsize=DATABASE_CONFIG.get('async_pool_size', 20)
+            )
+            self.is_connected = True
+            logger.info(SUCCESS_MESSAGES['db_connected'])
+
+        except Exception as e:
+            logger.error(f"Async database connection failed: {e}")
+            self.is_connected = False
+            raise Exception(ERROR_MESSAGES['db_connection_failed'])
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """Async context manager để lấy connection từ pool"""
+        if not self.pool:
+            raise Exception(ERROR_MESSAGES['db_connection_failed'])
+
+        connection = await self.pool.acquire()
+        try:
+            yield connection
+        except Exception as e:
+            logger.error(f"Database error: {e}")
+            await connection.rollback()
+            raise Exception(ERROR_MESSAGES['query_failed'])
+        finally:
+            self.pool.release(connection)
+
+    async def execute_query(self, query: str, params: Tuple = None, query_name: str = None) -> List[Dict[str, Any]]:
+        """Thực thi SELECT query và trả về kết quả (ProductRow/OrderRow theo query_name, còn lại ResultRow)"""
+        try:
+            async with self.get_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params or ())
+                    rows = await cursor.fetchall()
+                    return rows_from_values([column[0] for column in cursor.description], rows,
+                                            QUERY_ROW_TYPES.get(query_name))
+
+        except Exception as e:
+            logger.error(f"Query execution failed: {e}")
+            return []
+
+    async def execute_update(self, query: str, params: Tuple = None) -> int:
+        """Thực thi INSERT/UPDATE/DELETE query"""
+        try:
+            async with self.get_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute(query, params or ())
+                    await connection.commit()
+                    affected_rows = cursor.rowcount
+
+            self._notify_write(query)
+            return affected_rows
+
+        except Exception as e:
+            logger.error(f"Update execution failed: {e}")
+            return 0
+
+    async def test_connection(self) -> bool:
+        """Test kết nối database"""
+        try:
+            async with self.get_connection() as connection:
+                async with connection.cursor() as cursor:
+                    await cursor.execute("SELECT 1")
+                    await cursor.fetchone()
+                    return True
+        except Exception:
+            return False
+
+    async def close(self):
+        """Đóng connection pool"""
+        if self.pool:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+        self.is_connected = False
+
+    def add_write_listener(self, listener: Callable[[str], None]):
+        """Đăng ký callback được gọi sau mỗi câu lệnh ghi thành công"""
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, query: str):
+        """Thông báo cho các listener (cache...) khi có thay đổi dữ liệu"""
+        for listener in self._write_listeners:
+            try:
+                listener(query)
+            except Exception as e:
+                logger.error(f"Write listener failed: {e}")
+
+class AsyncProductCatalogCache(ProductCatalogCache):
+    """Catalog cache nạp lại bằng coroutine thay vì truy vấn đồng bộ"""
+
+    def __init__(self, db_manager: AsyncDatabaseManager, ttl: int = None):
+        super().__init__(db_manager, ttl)
+        self._refresh_lock = asyncio.Lock()
+
+    def _load(self) -> bool:
+        # Không bao giờ truy vấn đồng bộ trên event loop, DAO sẽ gọi refresh() trước
+        return False
+
+    async def refresh(self) -> bool:
+        """Nạp lại cache nếu đã hết hạn"""
+        if self.is_fresh():
+            return True
+
+        async with self._refresh_lock:
+            if self.is_fresh():
+                return True
+            self.misses += 1
+            products = await self.db.execute_query(SQL_QUERIES['get_all_products'], query_name='get_all_products')
+            return self.load_rows(products)
+
+class AsyncProductDataAccess:
+    """Async Data Access Layer cho Products"""
+
+    def __init__(self, db_manager: AsyncDatabaseManager, cache: Optional[AsyncProductCatalogCache] = None):
+        self.db = db_manager
+        self.cache = cache
+
+    async def _cache_ready(self) -> bool:
+        """Cache có dùng được cho lần truy vấn này không"""
+        return self.cache is not None and await self.cache.refresh()
+
+    async def get_all_products(self) -> List[Dict[str, Any]]:
+        """Lấy tất cả sản phẩm"""
+        if await self._cache_ready():
+            cached = self.cache.get_all()
+            if cached is not None:
+                return cached
+        return await self.db.execute_query(SQL_QUERIES['get_all_products'], query_name='get_all_products')
+
+    async def get_products_by_category(self, category: str) -> List[Dict[str, Any]]:
+        """Lấy sản phẩm theo danh mục"""
+        if await self._cache_ready():
+            cached = self.cache.get_by_category(category)
+            if cached is not None:
+                return cached
+        search_term = f"%{category}%"
+        return await self.db.execute_query(
+            SQL_QUERIES['get_products_by_category'],
+            (search_term,),
+            query_name='get_products_by_category'
+        )
+
+    async def search_products_by_name(self, search_term: str) -> List[Dict[str, Any]]:
+        """Tìm kiếm sản phẩm theo tên"""
+        if await self._cache_ready():
+            cached = self.cache.search_by_name(search_term)
+            if cached is not None:
+                return cached
+        pattern = f"%{search_term}%"
+        return await self.db.execute_query(
+            SQL_QUERIES['search_products_by_name'],
+            (pattern, pattern),
+            query_name='search_products_by_name'
+        )
+
+    async def get_product_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Lấy sản phẩm theo ID"""
+        if await self._cache_ready() and self.cache.ready():
+            return self.cache.get_by_id(product_id)
+        results = await self.db.execute_query(
+            SQL_QUERIES['get_product_by_id'],
+            (product_id,),
+            query_name='get_product_by_id'
+        )
+        return results[0] if results else None
+
+    async def get_products_by_price_range(self, min_price: float, max_price: float) -> List[Dict[str, Any]]:
+        """Lấy sản phẩm theo khoảng giá"""
+        if await self._cache_ready():
+            cached = self.cache.get_by_price_range(min_price, max_price)
+            if cached is not None:
+                return cached
+        return await self.db.execute_query(
+            SQL_QUERIES['get_products_by_price_range'],
+            (min_price, max_price),
+            query_name='get_products_by_price_range'
+        )
+
+    async def get_popular_products(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Lấy sản phẩm bán chạy"""
+        return await self.db.execute_query(
+            SQL_QUERIES['get_popular_products'],
+            (limit,),
+            query_name='get_popular_products'
+        )
+
+    async def count_products(self, listing: str = 'all', args: Tuple = ()) -> int:
+        """Đếm số sản phẩm của listing bằng COUNT riêng"""
+        if await self._cache_ready():
+            cached = self.cache.get_page(listing, args, 0)
+            if cached is not None:
+                return cached[1]
+        query_name, query, params = listing_query(listing, args, 2)
+        results = await self.db.execute_query(query, params, query_name=query_name)
+        return int(results[0]['Total']) if results else 0
+
+    async def get_product_page(self, listing: str = 'all', args: Tuple = (), limit: int = None,
+                               after: Optional[Tuple] = None, with_total: bool = True) -> Dict[str, Any]:
+        """Lấy một trang sản phẩm (keyset pagination, LIMIT đẩy xuống database)"""
+        limit = limit or PAGINATION_CONFIG['page_size']
+        if await self._cache_ready():
+            cached = self.cache.get_page(listing, args, limit, after)
+            if cached is not None:
+                rows, total = cached
+                return build_product_page(listing, rows, limit, total if with_total else None)
+
+        if after is None:
+            query_name, query, params = listing_query(listing, args, 0)
+            rows = await self.db.execute_query(query, params + (limit,), query_name=query_name)
+        else:
+            query_name, query, params = listing_query(listing, args, 1)
+            rows = await self.db.execute_query(query, params + tuple(after) + (limit,), query_name=query_name)
+        total = await self.count_products(listing, args) if with_total else None
+        return build_product_page(listing, rows, limit, total)
+
+class AsyncOrderDataAccess:
+    """Async Data Access Layer cho Orders"""
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        self.db = db_manager
+
+    async def get_user_orders(self, user_id: int) -> List[Dict[str, Any]]:
+        """Lấy đơn hàng của user"""
+        return await self.db.execute_query(
+            SQL_QUERIES['get_user_orders'],
+            (user_id,),
+            query_name='get_user_orders'
+        )
+
+    async def get_sales_statistics(self) -> List[Dict[str, Any]]:
+        """Lấy thống kê bán hàng"""
+        return await self.db.execute_query(SQL_QUERIES['get_sales_stats'], query_name='get_sales_stats')
+
+class AsyncCartDataAccess:
+    """Async Data Access Layer cho Cart"""
+
+    def __init__(self, db_manager: AsyncDatabaseManager):
+        self.db = db_manager
+
+    async def get_user_cart(self, user_id: int) -> List[Dict[str, Any]]:
+        """Lấy giỏ hàng của user"""
+        return await self.db.execute_query(
+            SQL_QUERIES['get_user_cart'],
+            (user_id,),
+            query_name='get_user_cart'
+        )
+
+    async def add_to_cart(self, user_id: int, product_id: int, quantity: int) -> bool:
+        """Thêm sản phẩm vào giỏ hàng"""
+        query = """
+            INSERT INTO CartItems (UserId, ProductId, Quantity)
+            VALUES (%s, %s, %s)
+            ON DUPLICATE KEY UPDATE Quantity = Quantity + VALUES(Quantity)
+        """
+        affected = await self.db.execute_update(query, (user_id, product_id, quantity))
+        return affected > 0
+
+    async def remove_from_cart(self, user_id: int, product_id: int) -> bool:
+        """Xóa sản phẩm khỏi giỏ hàng"""
+        query = "DELETE FROM CartItems WHERE UserId = %s AND ProductId = %s"
+        affected = await self.db.execute_update(query, (user_id, product_id))
+        return affected > 0
+
+    async def clear_cart(self, user_id: int) -> bool:
+        """Xóa toàn bộ giỏ hàng"""
+        query = "DELETE FROM CartItems WHERE UserId = %s"
+        affected = await self.db.execute_update(query, (user_id,))
+        return affected >= 0
+
+class AsyncDatabaseService:
+    """Service bất đồng bộ tổng hợp tất cả data access layers"""
+
+    # Dùng chung cách format với DatabaseService đồng bộ
+    format_price = DatabaseService.format_price
+    format_product = DatabaseService.format_product
+
+    def __init__(self, db_manager: Optional[AsyncDatabaseManager] = None):
+        self.db_manager = db_manager or AsyncDatabaseManager()
+        self.catalog_cache = AsyncProductCatalogCache(self.db_manager) if CACHE_CONFIG['catalog_enabled'] else None
+        self.products = AsyncProductDataAccess(self.db_manager, self.catalog_cache)
+        self.orders = AsyncOrderDataAccess(self.db_manager)
+        self.cart = AsyncCartDataAccess(self.db_manager)
+
+    async def connect(self):
+        """Mở connection pool"""
+        await self.db_manager.connect()
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Kiểm tra sức khỏe database"""
+        is_healthy = await self.db_manager.test_connection()
+        return {
+            'status': 'healthy' if is_healthy else 'unhealthy',
+            'connected': is_healthy,
+            'catalog_cache': self.catalog_cache.stats() if self.catalog_cache else None,
+            'timestamp': __import__('datetime').datetime.now().isoformat()
+        }
+
+    async def close_connections(self):
+        """Đóng tất cả kết nối"""
+        try:
+            await self.db_manager.close()
+            logger.info("Database connections closed")
+        except Exception as e:
+            logger.error(f"Error closing connections: {e}")
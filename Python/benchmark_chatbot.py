@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark đường xử lý request của ShoeMart ChatBot
+Seed catalog + lịch sử đơn hàng tổng hợp vào SQLite, phát lại bộ câu hỏi tiếng Việt
+qua ShoeMartMySQLChatBot.get_response và báo cáo p50/p95/p99, QPS, bộ nhớ cấp phát theo intent;
+so sánh thêm get_response lần lượt với get_responses theo lô
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple
+from sqlite_backend import SQLiteDatabaseManager
+from database_manager import DatabaseService
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+from tracing import get_tracer
+
+# Bộ câu hỏi mô phỏng traffic thực: (tin nhắn, trọng số)
+QUERY_MIX = [
+    ("xin chào", 6),
+    ("giày nike", 10),
+    ("adidas ultraboost", 5),
+    ("có giày thể thao nào không", 10),
+    ("giày boots", 5),
+    ("dép sandal", 3),
+    ("giày dưới 2 triệu", 10),
+    ("từ 1 đến 3 triệu", 8),
+    ("trang sau", 5),
+    ("sản phẩm bán chạy", 8),
+    ("thống kê bán hàng", 3),
+    ("toàn bộ sản phẩm", 4),
+    ("tìm giày chạy bộ màu đen", 8),
+    ("cách chọn size", 4),
+    ("địa chỉ cửa hàng ở đâu", 3),
+    ("cảm ơn", 3)
+]
+
+BRANDS = ['Nike', 'Adidas', 'Converse', 'Puma', 'Vans', 'New Balance', 'Timberland', 'Birkenstock', "Biti's", 'Asics']
+MODELS = {
+    'Sneakers': ['Air Max', 'Ultraboost', 'Chuck Taylor', 'Suede', 'Old Skool', '574', 'Gel Kayano', 'Hunter', 'Running'],
+    'Formal': ['Oxford', 'Derby', 'Loafer', 'Brogue', 'Monk Strap'],
+    'Boots': ['Work Boots', 'Chelsea Boot', 'Martin Boot', 'Ankle Boot'],
+    'Sandals': ['Arizona', 'Slides', 'Flip-flop', 'Sandal Quai Hậu'],
+    'Heels': ['High Heel', 'Pump', 'Cao Gót Mũi Nhọn'],
+    'Flats': ['Ballerina', 'Flat Da Mềm', 'Giày Bệt']
+}
+COLORS = ['Đen', 'Trắng', 'Nâu', 'Xám', 'Đỏ', 'Xanh Navy', 'Be']
+ORDER_STATUSES = [('Completed', 8), ('Pending', 1), ('Cancelled', 1)]
+
+def seed_database(db_manager: SQLiteDatabaseManager, products: int, orders: int, seed: int = 42) -> Tuple[int, int]:
+    """Seed Products, Users, Orders, OrderItems tổng hợp trong một transaction"""
+    rng = random.Random(seed)
+    categories = list(MODELS)
+    statuses = [status for status, _ in ORDER_STATUSES]
+    status_weights = [weight for _, weight in ORDER_STATUSES]
+
+    product_rows = []
+    prices = []
+    for i in range(products):
+        category = rng.choice(categories)
+        name = f"{rng.choice(BRANDS)} {rng.choice(MODELS[category])} {rng.choice(COLORS)} {i + 1}"
+        price = rng.randrange(300, 8000) * 1000
+        prices.append(price)
+        product_rows.append((name, f"{name} - {category.lower()} chính hãng", price, '', category))
+
+    users = max(orders // 5, 1)
+    start_date = datetime(2024, 1, 1)
+    order_rows = []
+    item_rows = []
+    for order_id in range(1, orders + 1):
+        total = 0
+        for _ in range(rng.randint(1, 4)):
+            product_id = rng.randint(1, products)
+            quantity = rng.randint(1, 3)
+            total += prices[product_id - 1] * quantity
+            item_rows.append((order_id, product_id, quantity, prices[product_id - 1]))
+        order_date = start_date + timedelta(minutes=rng.randrange(365 * 24 * 60))
+        order_rows.append((rng.randint(1, users), order_date.isoformat(sep=' '), total,
+                           rng.choice(['COD', 'Card', 'Momo']),
+                           rng.choices(statuses, status_weights)[0]))
+
+    with db_manager.transaction():
+        db_manager.execute_many(
+            "INSERT INTO Products (Name, Description, Price, ImageUrl, Category) VALUES (%s, %s, %s, %s, %s)",
+            product_rows
+        )
+        db_manager.execute_many(
+            "INSERT INTO Users (Username, Email, PasswordHash, Role) VALUES (%s, %s, %s, %s)",
+            [(f"user{i}", f"user{i}@shoemart.vn", 'x', 'Customer') for i in range(1, users + 1)]
+        )
+        db_manager.execute_many(
+            "INSERT INTO Orders (UserId, OrderDate, TotalAmount, PaymentMethod, Status) VALUES (%s, %s, %s, %s, %s)",
+            order_rows
+        )
+        db_manager.execute_many(
+            "INSERT INTO OrderItems (OrderId, ProductId, Quantity, Price) VALUES (%s, %s, %s, %s)",
+            item_rows
+        )
+    return len(product_rows), len(item_rows)
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentile theo nearest-rank trên danh sách đã sắp xếp"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """p50/p95/p99/mean (ms) của một nhóm latency (giây)"""
+    values = sorted(latency * 1000 for latency in latencies)
+    return {
+        'count': len(values),
+        'mean_ms': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 0.50), 3),
+        'p95_ms': round(percentile(values, 0.95), 3),
+        'p99_ms': round(percentile(values, 0.99), 3)
+    }
+
+# Chạy trong process mới để tính cả thời gian import: in ra JSON các mốc (ms từ lúc bắt đầu import)
+STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import logging
+logging.disable(logging.INFO)
+from sqlite_backend import SQLiteDatabaseManager
+from database_manager import DatabaseService
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+imported = time.perf_counter()
+chatbot = ShoeMartMySQLChatBot(DatabaseService(SQLiteDatabaseManager(sys.argv[1])))
+constructed = time.perf_counter()
+chatbot.get_response(sys.argv[2])
+first_static = time.perf_counter()
+chatbot.get_response(sys.argv[3])
+first_product = time.perf_counter()
+from config import CHATBOT_CONFIG
+deadline = time.monotonic() + 60
+while CHATBOT_CONFIG['lazy_startup'] and chatbot.warmup_seconds is None and time.monotonic() < deadline:
+    time.sleep(0.005)
+warmed = time.perf_counter()
+ms = lambda t: round((t - start) * 1000, 1)
+print(json.dumps({'import_ms': ms(imported), 'constructed_ms': ms(constructed),
+                  'first_static_ms': ms(first_static), 'first_product_ms': ms(first_product),
+                  'warmed_ms': ms(warmed)}))
+"""
+
+# (tên, biến môi trường) của các chế độ khởi động được so sánh
+STARTUP_MODES = [
+    ('eager', {'CHATBOT_LAZY_STARTUP': 'False', 'DB_LAZY_CONNECT': 'False'}),
+    ('lazy', {'CHATBOT_LAZY_STARTUP': 'True', 'DB_LAZY_CONNECT': 'True'})
+]
+
+def measure_startup(db_path: str, runs: int = 3, static_message: str = "xin chào",
+                    product_message: str = "giày nike") -> Dict[str, Dict[str, float]]:
+    """Time-to-first-response của process mới theo từng chế độ khởi động (median của runs lần)"""
+    results = {}
+    for mode, overrides in STARTUP_MODES:
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT, db_path, static_message, product_message],
+                cwd=os.path.dirname(os.path.abspath(__file__)), env={**os.environ, **overrides},
+                capture_output=True, text=True, check=True
+            ).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+        results[mode] = {key: round(statistics.median(sample[key] for sample in samples), 1) for key in samples[0]}
+    return results
+
+def build_workload(requests: int, seed: int) -> List[str]:
+    """Chọn ngẫu nhiên (có trọng số) các tin nhắn theo QUERY_MIX"""
+    rng = random.Random(seed)
+    messages = [message for message, _ in QUERY_MIX]
+    weights = [weight for _, weight in QUERY_MIX]
+    return rng.choices(messages, weights, k=requests)
+
+def measure_batch(db_service: DatabaseService, workload: List[str], batch_size: int = 100) -> Dict[str, Any]:
+    """Thời gian và số query (connection checkout) của workload khi trả lời lần lượt và theo lô,
+    có catalog cache và chỉ dùng SQL (catalog cache tạm gỡ khỏi service)
+
+    Mọi lượt dùng chung db_service của benchmark, mỗi lượt một chatbot mới (memo/render cache rỗng)
+    và query cache được xóa trước khi đo.
+    """
+    db_manager = db_service.db_manager
+    catalog_cache = db_service.catalog_cache
+    results = {}
+    try:
+        for backend in ('catalog', 'sql'):
+            if backend == 'sql':
+                db_service.catalog_cache = db_service.products.cache = None
+            for mode in ('sequential', 'batch'):
+                chatbot = ShoeMartMySQLChatBot(db_service)
+                chatbot.wait_for_database()
+                if db_manager.query_cache is not None:
+                    db_manager.query_cache.clear()
+                acquired = db_manager.pool.acquired
+                start = time.perf_counter()
+                if mode == 'sequential':
+                    for message in workload:
+                        chatbot.get_response(message)
+                else:
+                    for i in range(0, len(workload), batch_size):
+                        chatbot.get_responses(workload[i:i + batch_size])
+                results[f"{backend}/{mode}"] = {
+                    'ms': round((time.perf_counter() - start) * 1000, 1),
+                    'queries': db_manager.pool.acquired - acquired
+                }
+    finally:
+        db_service.catalog_cache = db_service.products.cache = catalog_cache
+    return results
+
+def run_benchmark(products: int = 10000, orders: int = None, requests: int = 2000, alloc_requests: int = 300,
+                  db_path: str = ':memory:', seed: int = 42, trace: bool = False,
+                  startup_runs: int = 3, batch_size: int = 100) -> Dict[str, Any]:
+    """Seed database, phát lại workload và trả về kết quả"""
+    orders = products // 2 if orders is None else orders
+    tracer = get_tracer()
+    tracer.enabled = tracer.enabled or trace
+
+    db_manager = SQLiteDatabaseManager(db_path)
+    existing = db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")[0]['Total']
+    seed_start = time.perf_counter()
+    if existing:
+        print(f"♻️ Dùng lại {existing} sản phẩm có sẵn trong {db_path}")
+        products = existing
+    else:
+        products, order_items = seed_database(db_manager, products, orders, seed)
+        print(f"🌱 Seed {products} sản phẩm, {orders} đơn hàng, {order_items} dòng OrderItems "
+              f"trong {time.perf_counter() - seed_start:.1f}s")
+
+    startup = None
+    if startup_runs > 0:
+        # Process đo khởi động cần mở database từ file
+        if db_path == ':memory:':
+            with tempfile.TemporaryDirectory() as directory:
+                startup_db = os.path.join(directory, 'startup.db')
+                db_manager.backup_to(startup_db)
+                startup = measure_startup(startup_db, startup_runs)
+        else:
+            startup = measure_startup(db_path, startup_runs)
+
+    start = time.perf_counter()
+    db_service = DatabaseService(db_manager)
+    chatbot = ShoeMartMySQLChatBot(db_service)
+    startup_ms = (time.perf_counter() - start) * 1000
+    workload = build_workload(requests, seed)
+    intents = {message: chatbot.classify_intent(message) for message, _ in QUERY_MIX}
+
+    # Request đầu tiên (cache/aggregate còn lạnh)
+    start = time.perf_counter()
+    chatbot.get_response(workload[0])
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    # Đo latency
+    latencies = defaultdict(list)
+    all_latencies = []
+    start = time.perf_counter()
+    for message in workload:
+        request_start = time.perf_counter()
+        chatbot.get_response(message)
+        elapsed = time.perf_counter() - request_start
+        latencies[intents[message]].append(elapsed)
+        all_latencies.append(elapsed)
+    wall_time = time.perf_counter() - start
+
+    # Đo bộ nhớ cấp phát (lượt riêng vì tracemalloc làm chậm)
+    allocations = defaultdict(list)
+    tracemalloc.start()
+    for message in workload[:alloc_requests]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        chatbot.get_response(message)
+        allocations[intents[message]].append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    batch = measure_batch(db_service, workload, batch_size) if batch_size > 0 else None
+
+    per_intent = {}
+    for intent, values in sorted(latencies.items()):
+        per_intent[intent] = summarize(values)
+        sizes = allocations.get(intent)
+        per_intent[intent]['peak_alloc_kb'] = round(sum(sizes) / len(sizes) / 1024, 1) if sizes else None
+
+    result = {
+        'products': products,
+        'requests': requests,
+        'startup_ms': round(startup_ms, 3),
+        'cold_first_response_ms': round(cold_ms, 3),
+        'startup': startup,
+        'batch': batch,
+        'batch_size': batch_size,
+        'qps': round(requests / wall_time, 1),
+        'overall': summarize(all_latencies),
+        'intents': per_intent,
+        'stages': tracer.snapshot().get('chatbot_stage', {}) if tracer.enabled else None,
+        'memo': chatbot.response_memo.stats() if chatbot.response_memo else None,
+        'health': db_service.health_check()
+    }
+    db_service.close_connections()
+    return result
+
+def print_report(result: Dict[str, Any]):
+    """In bảng kết quả"""
+    print("\n⏱️ Benchmark get_response")
+    print("-" * 86)
+    print(f"📦 {result['products']} sản phẩm | 📨 {result['requests']} requests | "
+          f"🚀 {result['qps']} QPS | 🧊 khởi tạo: {result['startup_ms']} ms, "
+          f"request đầu: {result['cold_first_response_ms']} ms")
+    if result['memo']:
+        memo = result['memo']
+        print(f"🧠 Memo câu trả lời: hit ratio {memo['hit_ratio']:.1%} ({memo['exact_hits']} nguyên văn, "
+              f"{memo['normalized_hits']} chuẩn hóa, {memo['misses']} miss, {memo['expirations']} hết hạn)")
+    print("-" * 86)
+    print(f"{'intent':<20}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'peak KB':>12}")
+    for intent, stats in list(result['intents'].items()) + [('TỔNG', result['overall'])]:
+        peak = stats.get('peak_alloc_kb')
+        print(f"{intent:<20}{stats['count']:>7}{stats['mean_ms']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{peak if peak is not None else '-':>12}")
+
+    if result['startup']:
+        print("\n🚀 Time-to-first-response của process mới (ms từ lúc import, median)")
+        print(f"{'chế độ':<10}{'import':>10}{'khởi tạo':>11}{'câu chào':>11}{'câu hỏi SP':>12}{'warm-up xong':>14}")
+        for mode, stats in result['startup'].items():
+            print(f"{mode:<10}{stats['import_ms']:>10}{stats['constructed_ms']:>11}{stats['first_static_ms']:>11}"
+                  f"{stats['first_product_ms']:>12}{stats['warmed_ms']:>14}")
+
+    if result['batch']:
+        print(f"\n📦 get_response lần lượt vs get_responses (lô {result['batch_size']} tin nhắn)")
+        print(f"{'chế độ':<22}{'tổng ms':>10}{'queries':>10}")
+        for mode, stats in result['batch'].items():
+            print(f"{mode:<22}{stats['ms']:>10}{stats['queries']:>10}")
+
+    if result['stages']:
+        print("\n🔬 Thời gian theo giai đoạn (tracing)")
+        print(f"{'stage':<20}{'count':>7}{'avg ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for stage, stats in result['stages'].items():
+            print(f"{stage:<20}{stats['count']:>7}{stats['avg_ms']:>10}{stats['p50_ms']:>10}"
+                  f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ShoeMart ChatBot trên SQLite stand-in")
+    parser.add_argument('--products', type=int, default=10000, help="Số sản phẩm seed (10k-1M)")
+    parser.add_argument('--orders', type=int, default=None, help="Số đơn hàng seed (mặc định products/2)")
+    parser.add_argument('--requests', type=int, default=2000, help="Số request phát lại")
+    parser.add_argument('--alloc-requests', type=int, default=300, help="Số request đo bộ nhớ cấp phát")
+    parser.add_argument('--db', default=':memory:', help="File SQLite (seed một lần, dùng lại cho lần sau)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--trace', action='store_true', help="Bật tracing để xem thời gian theo giai đoạn")
+    parser.add_argument('--startup-runs', type=int, default=3,
+                        help="Số lần đo time-to-first-response trong process mới cho mỗi chế độ (0 = bỏ qua)")
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help="Số tin nhắn mỗi lô khi so sánh với get_responses (0 = bỏ qua)")
+    parser.add_argument('--json', help="Ghi kết quả ra file JSON để so sánh giữa các lần chạy")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.products, args.orders, args.requests, args.alloc_requests, args.db, args.seed,
+                           args.trace, args.startup_runs, args.batch_size)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2, default=str)
+        print(f"\n💾 Đã ghi kết quả vào {os.path.abspath(args.json)}")
+
+if __name__ == "__main__":
+    main()
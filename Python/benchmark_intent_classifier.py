@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Microbenchmark phân loại intent
+So sánh IntentClassifier (một regex biên dịch sẵn) với vòng lặp re.search cũ
+"""
+
+import sys
+import timeit
+from intent_engine import IntentClassifier, classify_intent_loop
+from shoe_store_mysql_chatbot import INTENT_PATTERNS, preprocess_text
+
+SAMPLE_MESSAGES = [
+    "xin chào",
+    "xem tất cả sản phẩm",
+    "giày nike",
+    "có giày thể thao nào không",
+    "giày dưới 2 triệu",
+    "sản phẩm bán chạy",
+    "thống kê bán hàng",
+    "cách chọn size",
+    "địa chỉ cửa hàng ở đâu",
+    "help",
+    "cảm ơn",
+    "mình muốn mua một đôi boot da màu nâu để đi làm vào mùa đông",
+    "từ 1 đến 3 triệu có mẫu adidas nào",
+    "cho xem chi tiết sản phẩm converse chuck taylor"
+]
+
+def run_benchmark(iterations: int = 2000):
+    """Chạy benchmark và in kết quả"""
+    patterns = INTENT_PATTERNS
+    classifier = IntentClassifier(patterns)
+    messages = [preprocess_text(m) for m in SAMPLE_MESSAGES]
+
+    # Kiểm tra hai cách cho cùng kết quả
+    mismatches = [
+        (m, classify_intent_loop(patterns, m), classifier.classify(m))
+        for m in messages
+        if classify_intent_loop(patterns, m) != classifier.classify(m)
+    ]
+    if mismatches:
+        print("❌ Kết quả không khớp:")
+        for message, expected, actual in mismatches:
+            print(f"   '{message}': loop={expected}, compiled={actual}")
+        return False
+
+    def loop_version():
+        for m in messages:
+            classify_intent_loop(patterns, m)
+
+    def compiled_version():
+        for m in messages:
+            classifier.classify(m)
+
+    total = iterations * len(messages)
+    loop_time = min(timeit.repeat(loop_version, number=iterations, repeat=3))
+    compiled_time = min(timeit.repeat(compiled_version, number=iterations, repeat=3))
+
+    print("⏱️ Benchmark phân loại intent")
+    print("-" * 50)
+    print(f"📨 {len(messages)} tin nhắn x {iterations} lần")
+    print(f"🔁 Vòng lặp re.search: {loop_time / total * 1e6:.2f} µs/tin nhắn")
+    print(f"⚡ Regex biên dịch:    {compiled_time / total * 1e6:.2f} µs/tin nhắn")
+    print(f"🚀 Tăng tốc: {loop_time / compiled_time:.2f}x")
+    return True
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run_benchmark(iterations)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark prepared statements của DatabaseManager
+So sánh cách cũ (text protocol + dictionary cursor, mỗi dòng một dict) với cách mới
+(prepared statement tái sử dụng trên connection + ResultRow dạng tuple) theo CPU mỗi query:
+phía client đo bằng thread CPU time, phía server (chỉ MySQL) lấy từ performance_schema
+"""
+
+import argparse
+import json
+import os
+import time
+from typing import List, Dict, Any, Optional, Tuple
+from config import SQL_QUERIES
+
+# (tên query trong SQL_QUERIES, tham số)
+QUERY_SET = [
+    ('get_product_by_id', (42,)),
+    ('get_products_by_category_page', ('%sneakers%', 10)),
+    ('get_products_by_price_range_page', (0, 2000000, 10)),
+    ('count_products_by_category', ('%boots%',)),
+    ('get_products_page', (15,))
+]
+
+# CPU/thời gian của các statement đã chạy trên một thread MySQL (picosecond)
+SERVER_CPU_QUERY = """
+    SELECT SUM(SUM_CPU_TIME) AS CpuTime, SUM(SUM_TIMER_WAIT) AS WaitTime, SUM(COUNT_STAR) AS Statements
+    FROM performance_schema.events_statements_summary_by_thread_by_event_name
+    WHERE THREAD_ID = %s
+"""
+
+def run_text_dict(connection, query: str, params: Tuple) -> list:
+    """Cách cũ: cursor dictionary mới cho mỗi query, MySQL parse lại câu SQL mỗi lần"""
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(query, params)
+    rows = cursor.fetchall()
+    cursor.close()
+    return rows
+
+def server_thread_id(connection) -> Optional[int]:
+    """THREAD_ID trong performance_schema của connection (None nếu không hỗ trợ)"""
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT PS_CURRENT_THREAD_ID()")
+        thread_id = cursor.fetchone()[0]
+        cursor.close()
+        return thread_id
+    except Exception:
+        return None
+
+def server_cpu(monitor, thread_id: Optional[int]) -> Optional[Tuple[int, int]]:
+    """(CPU ps, thời gian ps) tích lũy của thread; CPU = 0 trên MySQL < 8.0.28"""
+    if monitor is None or thread_id is None:
+        return None
+    cursor = monitor.cursor()
+    cursor.execute(SERVER_CPU_QUERY, (thread_id,))
+    cpu_time, wait_time, _ = cursor.fetchone()
+    cursor.close()
+    return int(cpu_time or 0), int(wait_time or 0)
+
+def measure(db_manager, connection, mode: str, query_name: str, params: Tuple, iterations: int,
+            monitor=None, thread_id: Optional[int] = None) -> Dict[str, Any]:
+    """Chạy một query iterations lần theo mode ('text_dict' hoặc 'prepared') trên cùng connection"""
+    query = SQL_QUERIES[query_name]
+
+    def run():
+        if mode == 'prepared':
+            return db_manager._fetch_rows(connection, query, params, prepared=True)
+        return run_text_dict(connection, query, params)
+
+    run()  # làm nóng: prepare lần đầu không tính vào số đo
+    server_before = server_cpu(monitor, thread_id)
+    cpu_start = time.thread_time()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        run()
+    wall = time.perf_counter() - wall_start
+    cpu = time.thread_time() - cpu_start
+    server_after = server_cpu(monitor, thread_id)
+
+    result = {
+        'client_cpu_us': round(cpu / iterations * 1e6, 2),
+        'wall_us': round(wall / iterations * 1e6, 2)
+    }
+    if server_before and server_after:
+        result['server_cpu_us'] = round((server_after[0] - server_before[0]) / iterations / 1e6, 2)
+        result['server_time_us'] = round((server_after[1] - server_before[1]) / iterations / 1e6, 2)
+    return result
+
+def open_backend(backend: str, products: int, db_path: str):
+    """(db_manager, monitor connection hoặc None) cho backend đã chọn"""
+    if backend == 'mysql':
+        import mysql.connector
+        from database_manager import DatabaseManager
+        from config import DATABASE_CONFIG
+        db_manager = DatabaseManager()
+        monitor = mysql.connector.connect(
+            host=DATABASE_CONFIG['host'], port=DATABASE_CONFIG['port'], database=DATABASE_CONFIG['database'],
+            user=DATABASE_CONFIG['user'], password=DATABASE_CONFIG['password'], autocommit=True
+        )
+        return db_manager, monitor
+
+    from sqlite_backend import SQLiteDatabaseManager
+    from benchmark_chatbot import seed_database
+    db_manager = SQLiteDatabaseManager(db_path)
+    if not db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")[0]['Total']:
+        seed_database(db_manager, products, products // 2)
+    return db_manager, None
+
+def run_benchmark(backend: str = 'sqlite', products: int = 10000, iterations: int = 2000,
+                  db_path: str = ':memory:') -> Dict[str, Any]:
+    """Đo từng query trong QUERY_SET ở cả hai mode"""
+    db_manager, monitor = open_backend(backend, products, db_path)
+    results = {}
+    try:
+        with db_manager.get_connection() as connection:
+            thread_id = server_thread_id(connection) if monitor is not None else None
+            for query_name, params in QUERY_SET:
+                results[query_name] = {
+                    mode: measure(db_manager, connection, mode, query_name, params, iterations, monitor, thread_id)
+                    for mode in ('text_dict', 'prepared')
+                }
+    finally:
+        if monitor is not None:
+            monitor.close()
+    return {'backend': backend, 'iterations': iterations, 'queries': results,
+            'statements': db_manager.statement_stats()}
+
+def print_report(result: Dict[str, Any]):
+    """In bảng so sánh"""
+    print(f"\n⏱️ Prepared statements ({result['backend']}, {result['iterations']} lần/query, µs/query)")
+    print("-" * 100)
+    print(f"{'query':<36}{'client cũ':>12}{'client mới':>12}{'tiết kiệm':>11}"
+          f"{'server cũ':>11}{'server mới':>11}{'wall cũ':>9}{'wall mới':>9}")
+    for query_name, modes in result['queries'].items():
+        old, new = modes['text_dict'], modes['prepared']
+        saved = old['client_cpu_us'] - new['client_cpu_us']
+        server_old = old.get('server_cpu_us', '-')
+        server_new = new.get('server_cpu_us', '-')
+        print(f"{query_name:<36}{old['client_cpu_us']:>12}{new['client_cpu_us']:>12}{round(saved, 2):>11}"
+              f"{server_old:>11}{server_new:>11}{old['wall_us']:>9}{new['wall_us']:>9}")
+    if result['backend'] != 'mysql':
+        print("ℹ️ SQLite chạy trong cùng process: phần 'server' đã nằm trong client CPU")
+    print(f"📊 {result['statements']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark prepared statements + tuple rows")
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite',
+                        help="mysql dùng DATABASE_CONFIG và đo thêm CPU phía server qua performance_schema")
+    parser.add_argument('--products', type=int, default=10000, help="Số sản phẩm seed (chỉ SQLite)")
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--db', default=':memory:', help="File SQLite")
+    parser.add_argument('--json', help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.backend, args.products, args.iterations, args.db)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Đã ghi kết quả vào {os.path.abspath(args.json)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark bộ nhớ của các kiểu dòng kết quả
+So sánh dict mỗi dòng (dictionary cursor + format_product copy sang dict) với ResultRow,
+ProductRow và ProductView trên cùng một result set get_all_products (đo bằng tracemalloc)
+"""
+
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+from typing import Dict, Any, Callable
+from config import SQL_QUERIES
+from records import ProductRow, ProductView
+from statement_cache import ResultRow, column_index
+
+def legacy_format_product(product, formatted_price: str) -> Dict[str, Any]:
+    """format_product trước đây: copy mỗi sản phẩm sang một dict mới"""
+    return {
+        'id': product.get('Id'),
+        'name': product.get('Name', ''),
+        'description': product.get('Description', ''),
+        'price': product.get('Price', 0),
+        'formatted_price': formatted_price,
+        'category': product.get('Category', ''),
+        'image_url': product.get('ImageUrl', '')
+    }
+
+def measure(label: str, fetch: Callable, build: Callable, rows: int) -> Dict[str, Any]:
+    """Bộ nhớ còn giữ sau khi dựng danh sách (chỉ tính phần do build tạo ra) và thời gian dựng"""
+    cursor, values = fetch()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build(cursor, values)
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        'label': label,
+        'bytes_per_row': round(retained / rows, 1),
+        'total_mb': round(retained / 1024 / 1024, 2),
+        'build_ms': round(elapsed * 1000, 2)
+    }
+
+def run_benchmark(products: int = 100000, db_path: str = ':memory:') -> Dict[str, Any]:
+    """Đo từng kiểu dòng trên cùng dữ liệu"""
+    from sqlite_backend import SQLiteDatabaseManager
+    from benchmark_chatbot import seed_database
+    db_manager = SQLiteDatabaseManager(db_path)
+    if not db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")[0]['Total']:
+        seed_database(db_manager, products, 0)
+
+    def fetch():
+        with db_manager.get_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(SQL_QUERIES['get_all_products'], ())
+            values = cursor.fetchall()
+            cursor.close()
+        return cursor, values
+
+    price = "1.000.000 VNĐ"  # giá đã format giống nhau cho mọi kiểu, chỉ đo phần container
+    cases = [
+        ('dict (dictionary cursor)',
+         lambda cursor, values: [dict(zip(cursor.column_names, row)) for row in values]),
+        # ResultRow giữ tuple của driver -> dựng lại tuple trong phần đo để tính cả nó
+        ('ResultRow',
+         lambda cursor, values: [ResultRow(columns, tuple(list(row)))
+                                 for columns in (column_index(cursor),) for row in values]),
+        ('ProductRow',
+         lambda cursor, values: ProductRow.from_rows(cursor.column_names, values)),
+        # dòng gốc vẫn được giữ (catalog cache) cùng với bản đã format
+        ('dict + format_product dict',
+         lambda cursor, values: [(row, legacy_format_product(row, price))
+                                 for row in (dict(zip(cursor.column_names, v)) for v in values)]),
+        ('ProductRow + ProductView',
+         lambda cursor, values: [(row, ProductView(row, price))
+                                 for row in ProductRow.from_rows(cursor.column_names, values)])
+    ]
+
+    count = len(fetch()[1])
+    return {'products': count, 'results': [measure(label, fetch, build, count) for label, build in cases]}
+
+def print_report(result: Dict[str, Any]):
+    """In bảng so sánh"""
+    baseline = result['results'][0]['bytes_per_row']
+    print(f"\n🧮 Bộ nhớ theo kiểu dòng ({result['products']} sản phẩm get_all_products)")
+    print("-" * 80)
+    print(f"{'kiểu':<30}{'bytes/dòng':>12}{'tổng MB':>10}{'so với dict':>13}{'dựng ms':>10}")
+    for row in result['results']:
+        ratio = f"{row['bytes_per_row'] / baseline:.0%}" if baseline else '-'
+        print(f"{row['label']:<30}{row['bytes_per_row']:>12}{row['total_mb']:>10}{ratio:>13}{row['build_ms']:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bộ nhớ dict vs ProductRow")
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--db', default=':memory:', help="File SQLite")
+    parser.add_argument('--json', help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.products, args.db)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Đã ghi kết quả vào {os.path.abspath(args.json)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot catalog cho ShoeMart ChatBot
+Ghi Products và sales aggregates ra một file SQLite cục bộ để khởi động nhanh
+và phục vụ ở chế độ offline (chỉ đọc) khi MySQL không truy cập được
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import List, Dict, Any, Optional
+from config import SNAPSHOT_CONFIG, SQL_QUERIES
+from records import ProductRow
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Products giữ cùng cột với bảng gốc để SQL_QUERIES chạy được trên snapshot (qua sqlite_backend)
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Products (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Name TEXT NOT NULL COLLATE NOCASE,
+    Description TEXT NOT NULL COLLATE NOCASE,
+    Price REAL NOT NULL,
+    ImageUrl TEXT NOT NULL,
+    Category TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS SnapshotMeta (
+    Key TEXT PRIMARY KEY,
+    Value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS SalesCategoryStats (
+    Category TEXT PRIMARY KEY,
+    TotalSold INTEGER NOT NULL,
+    Revenue REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS SalesProductStats (
+    Id INTEGER PRIMARY KEY,
+    Name TEXT NOT NULL,
+    Category TEXT NOT NULL,
+    Price REAL NOT NULL,
+    SoldCount INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS SalesPendingOrders (
+    OrderId INTEGER PRIMARY KEY,
+    MaxItemId INTEGER NOT NULL
+);
+"""
+
+class CatalogSnapshot:
+    """Đọc/ghi snapshot Products + sales aggregates (ghi ra file tạm rồi thay thế nguyên tử)"""
+
+    def __init__(self, path: str = None):
+        self.path = path or SNAPSHOT_CONFIG['path']
+        self.saves = 0
+        self.loads = 0
+        self.last_saved_at = None
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def age(self) -> Optional[float]:
+        """Số giây kể từ lần ghi snapshot (None nếu chưa có)"""
+        if not self.exists():
+            return None
+        return max(0.0, time.time() - os.path.getmtime(self.path))
+
+    def save(self, products: List[Dict[str, Any]], aggregates: Optional[Dict[str, Any]] = None) -> bool:
+        """Ghi snapshot; bỏ qua nếu không có sản phẩm để không đè snapshot tốt bằng dữ liệu rỗng"""
+        if not products:
+            logger.warning("Snapshot skipped: no products")
+            return False
+
+        temp_path = f"{self.path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.executescript(SNAPSHOT_SCHEMA)
+            connection.executemany(
+                "INSERT INTO Products (Id, Name, Description, Price, ImageUrl, Category) VALUES (?, ?, ?, ?, ?, ?)",
+                [(p['Id'], p['Name'], p.get('Description') or '', float(p.get('Price') or 0),
+                  p.get('ImageUrl') or '', p.get('Category') or '') for p in products]
+            )
+            if aggregates:
+                connection.executemany(
+                    "INSERT INTO SalesCategoryStats (Category, TotalSold, Revenue) VALUES (?, ?, ?)",
+                    [(s['Category'], s['TotalSold'], float(s['Revenue'])) for s in aggregates['category_stats']]
+                )
+                connection.executemany(
+                    "INSERT INTO SalesProductStats (Id, Name, Category, Price, SoldCount) VALUES (?, ?, ?, ?, ?)",
+                    [(s['Id'], s['Name'], s['Category'], float(s['Price']), s['SoldCount'])
+                     for s in aggregates['product_stats']]
+                )
+                connection.executemany(
+                    "INSERT INTO SalesPendingOrders (OrderId, MaxItemId) VALUES (?, ?)",
+                    list(aggregates['pending_orders'].items())
+                )
+            meta = {
+                'created_at': time.time(),
+                'product_count': len(products),
+                'high_water_mark': aggregates['high_water_mark'] if aggregates else None
+            }
+            connection.executemany(
+                "INSERT INTO SnapshotMeta (Key, Value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()]
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+        os.replace(temp_path, self.path)
+        self.saves += 1
+        self.last_saved_at = time.time()
+        logger.info(f"Snapshot saved: {len(products)} products -> {self.path}")
+        return True
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Đọc snapshot: {'products', 'aggregates', 'meta'} hoặc None nếu không có/hỏng"""
+        if not self.exists():
+            return None
+        try:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            connection.row_factory = sqlite3.Row
+            try:
+                meta = {row['Key']: json.loads(row['Value'])
+                        for row in connection.execute("SELECT Key, Value FROM SnapshotMeta")}
+                cursor = connection.execute(SQL_QUERIES['get_all_products'])
+                products = ProductRow.from_rows([column[0] for column in cursor.description], cursor.fetchall())
+                aggregates = None
+                if meta.get('high_water_mark') is not None:
+                    aggregates = {
+                        'high_water_mark': meta['high_water_mark'],
+                        'category_stats': [dict(row) for row in connection.execute(
+                            "SELECT Category, TotalSold, Revenue FROM SalesCategoryStats")],
+                        'product_stats': [dict(row) for row in connection.execute(
+                            "SELECT Id, Name, Category, Price, SoldCount FROM SalesProductStats")],
+                        'pending_orders': {row['OrderId']: row['MaxItemId'] for row in connection.execute(
+                            "SELECT OrderId, MaxItemId FROM SalesPendingOrders")}
+                    }
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            logger.error(f"Snapshot load failed: {e}")
+            return None
+
+        self.loads += 1
+        logger.info(f"Snapshot loaded: {len(products)} products from {self.path}")
+        return {'products': products, 'aggregates': aggregates, 'meta': meta}
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái snapshot"""
+        age = self.age()
+        return {
+            'path': self.path,
+            'exists': age is not None,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'saves': self.saves,
+            'loads': self.loads
+        }
+
+class SnapshotWriter(threading.Thread):
+    """Thread nền gọi db_service.save_snapshot() mỗi interval giây"""
+
+    def __init__(self, db_service, interval: int = None):
+        super().__init__(name='shoemart-snapshot-writer', daemon=True)
+        self.db_service = db_service
+        self.interval = interval or SNAPSHOT_CONFIG['interval']
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.db_service.save_snapshot()
+            except Exception as e:
+                logger.error(f"Snapshot writer failed: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+
+def open_snapshot_service(snapshot: Optional[CatalogSnapshot] = None):
+    """Tạo DatabaseService chỉ đọc trên file snapshot (chế độ offline), None nếu chưa có snapshot"""
+    # Import tại chỗ vì database_manager import module này
+    from sqlite_backend import SQLiteDatabaseManager
+    from database_manager import DatabaseService
+
+    snapshot = snapshot or CatalogSnapshot()
+    data = snapshot.load()
+    if not data:
+        return None
+
+    db_service = DatabaseService(SQLiteDatabaseManager(snapshot.path), snapshot=snapshot, offline=True)
+    db_service.restore_snapshot(data)
+    logger.warning(f"⚠️ Offline mode: serving catalog snapshot {snapshot.path}")
+    return db_service
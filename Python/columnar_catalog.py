@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Catalog dạng cột cho ShoeMart ChatBot
+Price/Id là mảng NumPy, Category được intern thành mã số; lọc theo danh mục và khoảng giá
+bằng mask vector hóa và searchsorted trên chỉ mục sắp theo giá
+"""
+
+import bisect
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+
+np = None  # numpy được import ở lần dựng catalog đầu tiên (numpy_available), không làm chậm khởi động
+_numpy_missing = False
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def numpy_available() -> bool:
+    """Import numpy khi cần lần đầu; False nếu chưa cài (catalog cache dùng danh sách Python)"""
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            _numpy_missing = True
+    return np is not None
+
+def name_key(row: Dict[str, Any]) -> Tuple:
+    """Khóa (Name, Id) không phân biệt hoa thường, cùng thứ tự với listing 'category'"""
+    return ((row.get('Name') or '').lower(), row['Id'])
+
+class ColumnarCatalog:
+    """Các cột Price/Id/Category của catalog, hàng sắp theo (Name, Id)
+
+    Kết quả lọc là mảng vị trí hàng: lọc theo danh mục giữ thứ tự (Name, Id),
+    lọc có khoảng giá trả về theo thứ tự (Price, Id).
+    """
+
+    def __init__(self, products: List[Dict[str, Any]]):
+        self.rows = sorted(products, key=name_key)
+        count = len(self.rows)
+        self.ids = np.fromiter((row['Id'] for row in self.rows), dtype=np.int64, count=count)
+        self.prices = np.fromiter((float(row.get('Price') or 0) for row in self.rows), dtype=np.float64, count=count)
+
+        # Intern tên danh mục -> mã int32
+        self.category_names = []
+        codes = {}
+        category_codes = np.empty(count, dtype=np.int32)
+        for position, row in enumerate(self.rows):
+            name = (row.get('Category') or '').lower()
+            code = codes.get(name)
+            if code is None:
+                code = codes[name] = len(self.category_names)
+                self.category_names.append(name)
+            category_codes[position] = code
+        self.category_codes = category_codes
+        self._term_codes = {}  # từ khóa danh mục -> mảng mã khớp
+        self._name_masks = {}  # từ khóa tên (thương hiệu) -> mask theo vị trí hàng
+
+        # Chỉ mục theo (Price, Id)
+        self.price_order = np.lexsort((self.ids, self.prices))
+        self.sorted_prices = self.prices[self.price_order]
+        self.sorted_ids = self.ids[self.price_order]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _codes_for(self, category: str):
+        """Mã các danh mục có tên chứa category (ngữ nghĩa LIKE %category%)"""
+        term = category.lower()
+        codes = self._term_codes.get(term)
+        if codes is None:
+            codes = np.array([code for code, name in enumerate(self.category_names) if term in name], dtype=np.int32)
+            self._term_codes[term] = codes
+        return codes
+
+    def _name_mask(self, term: str):
+        """Mask các hàng có Name chứa term (tính một lần cho mỗi từ khóa, vd. thương hiệu)"""
+        term = term.lower()
+        mask = self._name_masks.get(term)
+        if mask is None:
+            mask = np.fromiter((term in (row.get('Name') or '').lower() for row in self.rows),
+                               dtype=bool, count=len(self.rows))
+            self._name_masks[term] = mask
+        return mask
+
+    def _category_mask(self, codes, category_codes):
+        """Mask các hàng thuộc một trong các mã danh mục"""
+        if len(codes) == 1:
+            return category_codes == codes[0]
+        return np.isin(category_codes, codes)
+
+    def _price_bounds(self, min_price: Optional[float], max_price: Optional[float]) -> Tuple[int, int]:
+        """Đoạn [start, end) trong price_order có giá thuộc [min_price, max_price]"""
+        start = 0 if min_price is None else int(np.searchsorted(self.sorted_prices, float(min_price), 'left'))
+        end = len(self.rows) if max_price is None else int(np.searchsorted(self.sorted_prices, float(max_price), 'right'))
+        return start, max(start, end)
+
+    def filter(self, category: Optional[str] = None, min_price: Optional[float] = None,
+               max_price: Optional[float] = None, name: Optional[str] = None, by_price: Optional[bool] = None):
+        """Vị trí các hàng thỏa mọi điều kiện có giá trị
+
+        Thứ tự (Price, Id) nếu by_price hoặc có khoảng giá, ngược lại (Name, Id).
+        """
+        if by_price is None:
+            by_price = min_price is not None or max_price is not None
+        if not by_price:
+            mask = None
+            if category is not None:
+                mask = self._category_mask(self._codes_for(category), self.category_codes)
+            if name is not None:
+                mask = self._name_mask(name) if mask is None else mask & self._name_mask(name)
+            return np.arange(len(self.rows)) if mask is None else np.flatnonzero(mask)
+
+        start, end = self._price_bounds(min_price, max_price)
+        positions = self.price_order[start:end]
+        if category is not None:
+            codes = self._codes_for(category)
+            positions = positions[self._category_mask(codes, self.category_codes[positions])]
+        if name is not None:
+            positions = positions[self._name_mask(name)[positions]]
+        return positions
+
+    def start_after(self, positions, after: Tuple, by_price: bool) -> int:
+        """Chỉ số đầu tiên trong positions nằm sau khóa keyset after"""
+        if by_price:
+            # Hạng của after trong thứ tự (Price, Id), so sánh với hạng của từng vị trí
+            price, product_id = float(after[0]), after[1]
+            low = int(np.searchsorted(self.sorted_prices, price, 'left'))
+            high = int(np.searchsorted(self.sorted_prices, price, 'right'))
+            rank = low + int(np.searchsorted(self.sorted_ids[low:high], product_id, 'right'))
+            return int(np.searchsorted(self.price_rank[positions], rank, 'left'))
+        # Vị trí chính là hạng trong thứ tự (Name, Id)
+        name = after[0].lower() if isinstance(after[0], str) else after[0]
+        rank = bisect.bisect_right(self.rows, (name, after[1]), key=name_key)
+        return int(np.searchsorted(positions, rank, 'left'))
+
+    @property
+    def price_rank(self):
+        """Hạng (Price, Id) của từng hàng (tính khi cần lần đầu)"""
+        rank = getattr(self, '_price_rank', None)
+        if rank is None:
+            rank = np.empty(len(self.rows), dtype=np.int64)
+            rank[self.price_order] = np.arange(len(self.rows))
+            self._price_rank = rank
+        return rank
+
+    def take(self, positions) -> List[Dict[str, Any]]:
+        """Các dict sản phẩm tại positions"""
+        rows = self.rows
+        return [rows[position] for position in positions.tolist()]
+
+    def stats(self) -> Dict[str, Any]:
+        """Kích thước các cột"""
+        return {
+            'rows': len(self.rows),
+            'categories': len(self.category_names),
+            'column_bytes': int(self.ids.nbytes + self.prices.nbytes + self.category_codes.nbytes
+                                + self.price_order.nbytes + self.sorted_prices.nbytes + self.sorted_ids.nbytes)
+        }
@@ -17,7 +17,21 @@ DATABASE_CONFIG = {
     'charset': 'utf8mb4',
     'autocommit': True,
     'pool_size': 5,
-    'pool_reset_session': True,
+    'pool_max_size': 20,
+    'pool_acquire_timeout': 5,   # giây chờ khi pool đã cạn
+    'pool_idle_timeout': 300,    # giây trước khi đóng connection nhàn rỗi vượt pool_size
+    'async_pool_size': 20,
+    'pool_reset_session': True,  # bị bỏ qua khi bật prepared_statements (reset xóa statement trên server)
+    'prepared_statements': True,
+    'statement_cache_size': 64,  # số câu SQL prepared tối đa trên mỗi connection
+    'lazy_connect': True,        # không mở connection khi khởi tạo, warm-up mở ở thread nền
+    'replica_hosts': [],         # read replica dạng "host" hoặc "host:port"; rỗng = đọc/ghi cùng primary
+    'replica_strategy': 'round_robin',  # round_robin | least_latency
+    'replica_max_failures': 3,   # lỗi liên tiếp trước khi loại replica
+    'replica_retry_interval': 30,  # giây trước khi thử lại replica đã bị loại
+    'read_your_writes_seconds': 5,  # session vừa ghi đọc từ primary trong bấy nhiêu giây
+    'max_connections': 151,      # max_connections của MySQL server (prefork chia cho các worker)
+    'connection_reserve': 20,    # connection chừa lại cho C# backend/admin khi chia cho worker
     'raise_on_warnings': True
 }
 
@@ -28,6 +42,20 @@ DATABASE_CONFIG.update({
     'database': os.getenv('DB_NAME', DATABASE_CONFIG['database']),
     'user': os.getenv('DB_USER', DATABASE_CONFIG['user']),
     'password': os.getenv('DB_PASSWORD', DATABASE_CONFIG['password']),
+    'pool_size': int(os.getenv('DB_POOL_SIZE', DATABASE_CONFIG['pool_size'])),
+    'pool_max_size': int(os.getenv('DB_POOL_MAX_SIZE', DATABASE_CONFIG['pool_max_size'])),
+    'pool_acquire_timeout': float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', DATABASE_CONFIG['pool_acquire_timeout'])),
+    'lazy_connect': os.getenv('DB_LAZY_CONNECT', str(DATABASE_CONFIG['lazy_connect'])).lower() == 'true',
+    'prepared_statements': os.getenv('DB_PREPARED_STATEMENTS', str(DATABASE_CONFIG['prepared_statements'])).lower() == 'true',
+    'statement_cache_size': int(os.getenv('DB_STATEMENT_CACHE_SIZE', DATABASE_CONFIG['statement_cache_size'])),
+    'replica_hosts': [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+                     or DATABASE_CONFIG['replica_hosts'],
+    'replica_strategy': os.getenv('DB_REPLICA_STRATEGY', DATABASE_CONFIG['replica_strategy']),
+    'replica_max_failures': int(os.getenv('DB_REPLICA_MAX_FAILURES', DATABASE_CONFIG['replica_max_failures'])),
+    'replica_retry_interval': float(os.getenv('DB_REPLICA_RETRY_INTERVAL', DATABASE_CONFIG['replica_retry_interval'])),
+    'read_your_writes_seconds': float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', DATABASE_CONFIG['read_your_writes_seconds'])),
+    'max_connections': int(os.getenv('DB_MAX_CONNECTIONS', DATABASE_CONFIG['max_connections'])),
+    'connection_reserve': int(os.getenv('DB_CONNECTION_RESERVE', DATABASE_CONFIG['connection_reserve'])),
 })
 
 # ChatBot Configuration
@@ -35,10 +63,116 @@ CHATBOT_CONFIG = {
     'name': 'ShoeMart AI Assistant',
     'version': '2.0.0',
     'max_history': 100,
+    'max_sessions': int(os.getenv('CHATBOT_MAX_SESSIONS', 10000)),
+    'session_idle_timeout': int(os.getenv('CHATBOT_SESSION_IDLE_TIMEOUT', 1800)),  # giây
+    # Kết nối database + nạp catalog/aggregates ở thread nền, intent tĩnh trả lời ngay khi khởi động
+    'lazy_startup': os.getenv('CHATBOT_LAZY_STARTUP', 'True').lower() == 'true',
+    'warmup_wait': float(os.getenv('CHATBOT_WARMUP_WAIT', 10)),  # giây intent cần database chờ kết nối xong
+    # get_responses: số tin nhắn tối đa mỗi lần gọi (/chat/batch) và số thread chạy song song các nhóm truy vấn
+    'batch_max_messages': int(os.getenv('CHATBOT_BATCH_MAX_MESSAGES', 500)),
+    'batch_workers': int(os.getenv('CHATBOT_BATCH_WORKERS', 1)),
     'response_delay': 0.5,
     'debug_mode': True
 }
 
+# Sales Aggregates Configuration
+AGGREGATE_CONFIG = {
+    'enabled': os.getenv('SALES_AGGREGATES_ENABLED', 'True').lower() == 'true',
+    'refresh_interval': int(os.getenv('SALES_AGGREGATES_REFRESH', 30)),              # giây
+    'full_refresh_interval': int(os.getenv('SALES_AGGREGATES_FULL_REFRESH', 3600)),  # giây
+    # Trạng thái kết thúc (không bao giờ thành Completed): đơn ở trạng thái này không được theo dõi là pending
+    'terminal_statuses': tuple(status.strip() for status in
+                               os.getenv('SALES_TERMINAL_STATUSES', 'Cancelled,Canceled,Refunded,Failed').split(',')
+                               if status.strip()),
+    'batch_size': 5000
+}
+
+# Web Server Configuration
+SERVER_CONFIG = {
+    'host': os.getenv('API_HOST', '0.0.0.0'),
+    'port': int(os.getenv('API_PORT', 5000)),
+    'debug': os.getenv('API_DEBUG', 'False').lower() == 'true',
+    # Pre-fork (prefork_server.py): số worker process và thời gian chờ worker xử lý nốt request khi dừng/restart
+    'workers': int(os.getenv('API_WORKERS', os.cpu_count() or 1)),
+    'graceful_timeout': float(os.getenv('API_GRACEFUL_TIMEOUT', 30))
+}
+
+# Cache Configuration
+CACHE_CONFIG = {
+    'catalog_enabled': os.getenv('CATALOG_CACHE_ENABLED', 'True').lower() == 'true',
+    'catalog_ttl': int(os.getenv('CATALOG_CACHE_TTL', 300)),  # giây
+    'catalog_retry_interval': int(os.getenv('CATALOG_CACHE_RETRY_INTERVAL', 30)),  # giây giữ dữ liệu cũ khi DB lỗi
+    'query_enabled': os.getenv('QUERY_CACHE_ENABLED', 'True').lower() == 'true',
+    'query_max_bytes': int(os.getenv('QUERY_CACHE_MAX_BYTES', 16 * 1024 * 1024)),
+    'fragment_cache_size': int(os.getenv('FRAGMENT_CACHE_SIZE', 20000)),  # số sản phẩm đã render
+    'response_cache_size': int(os.getenv('RESPONSE_CACHE_SIZE', 512)),  # số trang trả lời đã render
+    'response_memo_size': int(os.getenv('RESPONSE_MEMO_SIZE', 4096))  # số tin nhắn đã chuẩn hóa được memo (0 = tắt)
+}
+
+# TTL (giây) của memo câu trả lời theo intent: None = không hết hạn (intent tĩnh),
+# intent không có ở đây (trang sản phẩm có phân trang, 'trang sau'...) không được memo
+RESPONSE_MEMO_TTLS = {
+    'greetings': None,
+    'size_help': None,
+    'contact': None,
+    'help': None,
+    'product_detail': None,
+    'default': None,
+    'product_search': 30,
+    'brand_search': 30,
+    'category_search': 30,
+    'popular_products': 60,
+    'statistics': 30
+}
+
+# TTL (giây) của query cache theo tên trong SQL_QUERIES, query không có ở đây sẽ không được cache
+QUERY_CACHE_TTLS = {
+    'get_popular_products': 300,
+    'get_sales_stats': 300,
+    'get_user_orders': 30
+}
+
+# Pagination Configuration
+PAGINATION_CONFIG = {
+    'all_products_page_size': 15,
+    'page_size': 10,
+    'stream_batch_size': 500
+}
+
+# Snapshot Configuration: bản chụp Products + sales aggregates ra file SQLite cục bộ,
+# dùng để khởi động nhanh và phục vụ ở chế độ offline khi MySQL không truy cập được
+SNAPSHOT_CONFIG = {
+    'enabled': os.getenv('SNAPSHOT_ENABLED', 'True').lower() == 'true',
+    'path': os.getenv('SNAPSHOT_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shoemart_snapshot.db')),
+    'interval': int(os.getenv('SNAPSHOT_INTERVAL', 600))  # giây giữa hai lần ghi snapshot
+}
+
+# Tracing Configuration (tắt mặc định, khi tắt không có overhead trên hot path)
+TRACING_CONFIG = {
+    'enabled': os.getenv('TRACING_ENABLED', 'False').lower() == 'true',
+    'log_requests': os.getenv('TRACING_LOG_REQUESTS', 'False').lower() == 'true'  # log JSON mỗi request
+}
+
+# History Configuration: ghi lịch sử hội thoại theo lô ở thread nền (tắt mặc định)
+HISTORY_CONFIG = {
+    'persist': os.getenv('HISTORY_PERSIST', 'False').lower() == 'true',
+    'format': os.getenv('HISTORY_FORMAT', 'sqlite'),  # 'sqlite' hoặc 'jsonl' (log append-only)
+    'path': os.getenv('HISTORY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shoemart_history.db')),
+    'batch_size': int(os.getenv('HISTORY_BATCH_SIZE', 200)),
+    'flush_interval': float(os.getenv('HISTORY_FLUSH_INTERVAL', 1.0)),  # giây tối đa một lượt nằm trong hàng đợi
+    'queue_size': int(os.getenv('HISTORY_QUEUE_SIZE', 10000))          # hàng đợi đầy thì bỏ lượt mới
+}
+
+# Fuzzy Matching Configuration: index trigram cho thương hiệu, từ khóa danh mục và từ vựng sản phẩm
+# (khớp từ gõ sai/thiếu dấu như "addidas", "convers", "giay the thao")
+FUZZY_CONFIG = {
+    'enabled': os.getenv('FUZZY_MATCHING_ENABLED', 'True').lower() == 'true',
+    'min_similarity': float(os.getenv('FUZZY_MIN_SIMILARITY', 0.6)),  # ngưỡng độ tương đồng trigram (Dice)
+    # ngưỡng cho thương hiệu/từ khóa danh mục ngắn (<= 5 ký tự) như "nike", "pump", "flat"
+    'short_term_similarity': float(os.getenv('FUZZY_SHORT_TERM_SIMILARITY', 0.7)),
+    'max_candidates': int(os.getenv('FUZZY_MAX_CANDIDATES', 32))      # số ứng viên tối đa được chấm điểm mỗi lần tra
+}
+
 # Database Tables
 TABLES = {
     'users': 'Users',
@@ -70,6 +204,95 @@ SQL_QUERIES = {
         ORDER BY Name
     """,
     
+    'count_products': """
+        SELECT COUNT(*) AS Total FROM Products
+    """,
+    
+    'count_products_by_category': """
+        SELECT COUNT(*) AS Total FROM Products WHERE Category LIKE %s
+    """,
+    
+    'count_products_by_price_range': """
+        SELECT COUNT(*) AS Total FROM Products WHERE Price BETWEEN %s AND %s
+    """,
+    
+    'count_filtered_products': """
+        SELECT COUNT(*) AS Total FROM Products WHERE {where}
+    """,
+    
+    # Phân trang keyset: trang đầu và trang sau (khóa của dòng cuối trang trước)
+    'get_products_page': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        ORDER BY Category, Name, Id 
+        LIMIT %s
+    """,
+    
+    'get_products_page_after': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE (Category, Name, Id) > (%s, %s, %s) 
+        ORDER BY Category, Name, Id 
+        LIMIT %s
+    """,
+    
+    'get_products_by_category_page': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE Category LIKE %s 
+        ORDER BY Name, Id 
+        LIMIT %s
+    """,
+    
+    'get_products_by_category_page_after': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE Category LIKE %s AND (Name, Id) > (%s, %s) 
+        ORDER BY Name, Id 
+        LIMIT %s
+    """,
+    
+    'get_products_by_price_range_page': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE Price BETWEEN %s AND %s 
+        ORDER BY Price, Id 
+        LIMIT %s
+    """,
+    
+    'get_products_by_price_range_page_after': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE Price BETWEEN %s AND %s AND (Price, Id) > (%s, %s) 
+        ORDER BY Price, Id 
+        LIMIT %s
+    """,
+    
+    # Lọc kết hợp thương hiệu + danh mục + khoảng giá (vd. "giày nike sneaker dưới 3 triệu"),
+    # {where} chỉ gồm điều kiện của các slot có giá trị
+    'filter_products_page': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE {where} 
+        ORDER BY Price, Id 
+        LIMIT %s
+    """,
+    
+    'filter_products_page_after': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE {where} AND (Price, Id) > (%s, %s) 
+        ORDER BY Price, Id 
+        LIMIT %s
+    """,
+    
+    'filter_products': """
+        SELECT Id, Name, Description, Price, ImageUrl, Category 
+        FROM Products 
+        WHERE {where} 
+        ORDER BY Price, Id
+    """,
+    
     'get_product_by_id': """
         SELECT Id, Name, Description, Price, ImageUrl, Category 
         FROM Products 
@@ -120,6 +343,29 @@ SQL_QUERIES = {
         GROUP BY p.Id, p.Name, p.Category, p.Price
         ORDER BY SoldCount DESC
         LIMIT %s
+    """,
+    
+    'get_order_items_since': """
+        SELECT oi.Id, oi.OrderId, oi.ProductId, oi.Quantity, oi.Price, o.Status,
+               p.Name, p.Category, p.Price as ProductPrice
+        FROM OrderItems oi
+        JOIN Orders o ON oi.OrderId = o.Id
+        JOIN Products p ON oi.ProductId = p.Id
+        WHERE oi.Id > %s
+        ORDER BY oi.Id
+        LIMIT %s
+    """,
+    
+    # {order_ids} được thay bằng danh sách placeholder %s
+    # Item của các đơn pending đã Completed hoặc đã ở trạng thái kết thúc ({statuses})
+    'get_resolved_order_items': """
+        SELECT oi.Id, oi.OrderId, oi.ProductId, oi.Quantity, oi.Price, o.Status,
+               p.Name, p.Category, p.Price as ProductPrice
+        FROM OrderItems oi
+        JOIN Orders o ON oi.OrderId = o.Id
+        JOIN Products p ON oi.ProductId = p.Id
+        WHERE o.Status IN ({statuses}) AND oi.OrderId IN ({order_ids})
+        ORDER BY oi.Id
     """
 }
 
@@ -129,7 +375,8 @@ ERROR_MESSAGES = {
     'product_not_found': '🔍 Không tìm thấy sản phẩm nào phù hợp.',
     'invalid_input': '⚠️ Dữ liệu không hợp lệ.',
     'query_failed': '💥 Có lỗi xảy ra khi truy vấn dữ liệu.',
-    'user_not_found': '👤 Không tìm thấy thông tin người dùng.'
+    'user_not_found': '👤 Không tìm thấy thông tin người dùng.',
+    'pool_exhausted': '⏳ Hệ thống đang quá tải, vui lòng thử lại sau giây lát.'
 }
 
 # Success Messages  
@@ -167,6 +414,16 @@ def get_config() -> Dict[str, Any]:
     return {
         'database': DATABASE_CONFIG,
         'chatbot': CHATBOT_CONFIG,
+        'server': SERVER_CONFIG,
+        'cache': CACHE_CONFIG,
+        'query_cache_ttls': QUERY_CACHE_TTLS,
+        'response_memo_ttls': RESPONSE_MEMO_TTLS,
+        'aggregates': AGGREGATE_CONFIG,
+        'pagination': PAGINATION_CONFIG,
+        'snapshot': SNAPSHOT_CONFIG,
+        'tracing': TRACING_CONFIG,
+        'history': HISTORY_CONFIG,
+        'fuzzy': FUZZY_CONFIG,
         'tables': TABLES,
         'queries': SQL_QUERIES,
         'errors': ERROR_MESSAGES,
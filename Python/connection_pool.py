@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Connection pool có giám sát cho ShoeMart ChatBot
+Acquire chờ có timeout, tự mở rộng tới pool_max_size và ghi nhận metrics
+(thời gian chờ checkout, số connection đang dùng, số lần cạn pool, latency theo query)
+"""
+
+import bisect
+import threading
+import time
+import logging
+from collections import deque
+from typing import Dict, Any, Callable, Optional
+from config import ERROR_MESSAGES
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cận trên của các bucket latency (ms)
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class LatencyHistogram:
+    """Histogram latency với bucket cố định (tính bằng ms)"""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total_ms', 'max_ms', '_lock')
+
+    def __init__(self, bounds=LATENCY_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # bucket cuối là +Inf
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        """Ghi nhận một lần đo (giây)"""
+        ms = seconds * 1000
+        index = bisect.bisect_left(self.bounds, ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+
+    def percentile(self, fraction: float) -> float:
+        """Ước lượng percentile bằng cận trên của bucket chứa nó"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max_ms
+        return self.max_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Tóm tắt histogram"""
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3)
+        }
+
+class PoolExhaustedError(Exception):
+    """Không lấy được connection trong acquire_timeout giây (lỗi tạm thời, không phải kết quả rỗng)"""
+
+class PooledConnection:
+    """Proxy của connection lấy từ MonitoredConnectionPool, close() trả connection về pool"""
+
+    __slots__ = ('_pool', '_connection')
+
+    def __init__(self, pool: 'MonitoredConnectionPool', connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    @property
+    def raw_connection(self):
+        """Connection thật bên dưới (dùng làm khóa cho trạng thái gắn với connection)"""
+        return self._connection
+
+    def close(self):
+        """Trả connection về pool (gọi nhiều lần không sao)"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+class MonitoredConnectionPool:
+    """Pool co giãn từ min_size tới max_size, acquire chờ tối đa acquire_timeout giây
+
+    connection_factory tạo connection mới (vd. mysql.connector.connect).
+    Connection nhàn rỗi quá idle_timeout và vượt min_size sẽ bị đóng bớt.
+    prefill=False: không mở connection khi khởi tạo (mở dần khi dùng hoặc qua prefill()).
+    """
+
+    def __init__(self, connection_factory: Callable[[], Any], min_size: int = 5, max_size: int = 20,
+                 acquire_timeout: float = 5.0, idle_timeout: float = 300.0, reset_session: bool = True,
+                 prefill: bool = True):
+        self.connection_factory = connection_factory
+        self.min_size = min_size
+        self.max_size = max(max_size, min_size)
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.reset_session = reset_session
+
+        self.size = 0          # số connection đang mở (idle + in use)
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.created = 0
+        self.closed = 0
+        self.acquired = 0
+        self.exhausted = 0     # số lần acquire phải chờ vì pool đã cạn
+        self.timeouts = 0      # số lần chờ quá acquire_timeout
+        self.checkout_wait = LatencyHistogram()
+        self.query_latency = {}  # tên query -> LatencyHistogram
+
+        self._idle = deque()   # (connection, thời điểm trả về), mới nhất ở cuối
+        self._pending_creates = 0
+        self._closing = False
+        self._condition = threading.Condition()
+
+        if prefill:
+            self.prefill()
+
+    def prefill(self):
+        """Mở thêm connection nhàn rỗi cho tới min_size (lỗi được ném ra cho caller)"""
+        while True:
+            with self._condition:
+                if self._closing or self.size + self._pending_creates >= self.min_size:
+                    return
+                self._pending_creates += 1
+            try:
+                connection = self._create()
+            finally:
+                with self._condition:
+                    self._pending_creates -= 1
+            with self._condition:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+
+    def _create(self):
+        """Mở connection mới (lỗi được ném ra cho caller)"""
+        connection = self.connection_factory()
+        with self._condition:
+            self.size += 1
+            self.created += 1
+        return connection
+
+    def _discard(self, connection):
+        """Đóng hẳn một connection"""
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning(f"Closing pooled connection failed: {e}")
+        with self._condition:
+            self.size -= 1
+            self.closed += 1
+            self._condition.notify()
+
+    def _prune_idle_locked(self, now: float) -> list:
+        """Lấy ra các connection nhàn rỗi quá lâu vượt min_size (gọi khi đang giữ lock)"""
+        expired = []
+        while (self._idle and self.size - len(expired) > self.min_size
+               and now - self._idle[0][1] >= self.idle_timeout):
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def get_connection(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Lấy connection, mở thêm nếu chưa tới max_size, nếu không thì chờ tối đa timeout giây"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        connection = None
+        create = False
+        waited = False
+
+        with self._condition:
+            if self._closing:
+                # Pool đã đóng hẳn: báo lỗi thay vì mở connection mới cho mỗi lần dùng
+                raise Exception(ERROR_MESSAGES['db_connection_failed'])
+            expired = self._prune_idle_locked(start)
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()[0]
+                    break
+                if self.size - len(expired) + self._pending_creates < self.max_size:
+                    self._pending_creates += 1
+                    create = True
+                    break
+                if not waited:
+                    waited = True
+                    self.exhausted += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    self.checkout_wait.observe(time.monotonic() - start)
+                    logger.warning(f"Connection pool exhausted ({self.in_use}/{self.max_size} in use)")
+                    raise PoolExhaustedError(ERROR_MESSAGES['pool_exhausted'])
+                self._condition.wait(remaining)
+            self.in_use += 1
+            self.acquired += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+        for stale in expired:
+            self._discard(stale)
+
+        try:
+            if create:
+                try:
+                    connection = self._create()
+                finally:
+                    with self._condition:
+                        self._pending_creates -= 1
+            elif not connection.is_connected():
+                connection.reconnect()
+        except Exception:
+            with self._condition:
+                self.in_use -= 1
+                self._condition.notify()
+            if connection is not None:
+                self._discard(connection)
+            raise
+
+        self.checkout_wait.observe(time.monotonic() - start)
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """Nhận lại connection từ PooledConnection.close()"""
+        healthy = not self._closing
+        if healthy and self.reset_session:
+            try:
+                connection.reset_session()
+            except Exception as e:
+                logger.warning(f"Resetting pooled connection failed: {e}")
+                healthy = False
+
+        with self._condition:
+            self.in_use -= 1
+            if healthy:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+        if not healthy:
+            self._discard(connection)
+
+    def record_query(self, name: str, seconds: float):
+        """Ghi nhận latency của một query theo tên"""
+        histogram = self.query_latency.get(name)
+        if histogram is None:
+            histogram = self.query_latency.setdefault(name, LatencyHistogram())
+        histogram.observe(seconds)
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closing
+
+    def close_all(self):
+        """Đóng pool: đóng các connection nhàn rỗi, connection đang dùng bị đóng khi trả về
+        và get_connection() sau đó báo lỗi (không dùng lại được)"""
+        with self._condition:
+            self._closing = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics của pool"""
+        return {
+            'size': self.size,
+            'idle': len(self._idle),
+            'in_use': self.in_use,
+            'peak_in_use': self.peak_in_use,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'acquired': self.acquired,
+            'created': self.created,
+            'closed': self.closed,
+            'exhausted': self.exhausted,
+            'timeouts': self.timeouts,
+            'checkout_wait': self.checkout_wait.snapshot(),
+            'query_latency': {name: histogram.snapshot() for name, histogram in self.query_latency.items()}
+        }
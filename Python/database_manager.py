@@ -4,105 +4,597 @@ Database Manager cho ShoeMart ChatBot
 Quản lý kết nối và truy vấn MySQL database
 """
 
-import mysql.connector
-from mysql.connector import Error, pooling
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, Iterable, Iterator
+import bisect
 import logging
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from contextlib import contextmanager
-from config import DATABASE_CONFIG, SQL_QUERIES, ERROR_MESSAGES, SUCCESS_MESSAGES
+from search_index import ProductSearchIndex
+from columnar_catalog import ColumnarCatalog, numpy_available
+from connection_pool import MonitoredConnectionPool, PoolExhaustedError
+from replica_router import Replica, ReplicaRouter
+from statement_cache import PreparedStatementCache, ResultRow, rows_from_cursor
+from records import ProductRow, ProductView, QUERY_ROW_TYPES
+from catalog_snapshot import CatalogSnapshot, SnapshotWriter
+from sales_aggregates import SalesAggregates
+from config import (DATABASE_CONFIG, SQL_QUERIES, ERROR_MESSAGES, SUCCESS_MESSAGES, CACHE_CONFIG,
+                    QUERY_CACHE_TTLS, AGGREGATE_CONFIG, PAGINATION_CONFIG, SNAPSHOT_CONFIG, FUZZY_CONFIG, TABLES)
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+READ_TABLES_PATTERN = re.compile(r'\b(?:FROM|JOIN)\s+`?(\w+)`?', re.IGNORECASE)
+WRITE_TABLE_PATTERN = re.compile(r'^\s*(?:INSERT\s+INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM)\s+`?(\w+)`?', re.IGNORECASE)
+
+def write_query_name(query: str) -> str:
+    """Tên dùng cho metrics của câu lệnh ghi, vd. 'write:CartItems'"""
+    match = WRITE_TABLE_PATTERN.match(query)
+    return f"write:{match.group(1)}" if match else 'write'
+
+def estimate_rows_size(rows: List[Dict[str, Any]]) -> int:
+    """Ước lượng số byte bộ nhớ của kết quả query"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row.values())
+    return size
+
+class QueryResultCache:
+    """LRU cache kết quả query theo tên template SQL_QUERIES + params, giới hạn theo byte
+
+    Mỗi bảng có một thế hệ (generation) tăng khi bảng bị invalidate: caller lấy read_token()
+    trước khi đọc và truyền lại cho put(), kết quả của lần đọc bắt đầu trước một lần ghi
+    (ghi xong và invalidate trước khi đọc xong) không được đưa vào cache.
+    """
+    
+    def __init__(self, max_bytes: int = None, ttls: Dict[str, int] = None):
+        self.max_bytes = CACHE_CONFIG['query_max_bytes'] if max_bytes is None else max_bytes
+        self.ttls = QUERY_CACHE_TTLS if ttls is None else ttls
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()  # key -> (expires_at, size, tables, rows)
+        self._keys_by_table = {}       # tên bảng (lower) -> set(key)
+        self._generations = {}         # tên bảng (lower) -> số lần bị invalidate
+        self._epoch = 0                # tăng khi clear()
+        self.stale_puts = 0
+        self._lock = threading.Lock()
+    
+    def is_cacheable(self, query_name: Optional[str]) -> bool:
+        """Query có được cấu hình TTL để cache hay không"""
+        return bool(query_name) and self.ttls.get(query_name, 0) > 0
+    
+    def get(self, query_name: str, params: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Lấy kết quả đã cache (None nếu không có hoặc đã hết hạn)"""
+        key = (query_name, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._remove_locked(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[3])
+    
+    def read_token(self, query: str) -> Tuple:
+        """Thế hệ hiện tại của các bảng query đọc, lấy trước khi chạy query rồi truyền cho put()"""
+        tables = frozenset(table.lower() for table in READ_TABLES_PATTERN.findall(query))
+        with self._lock:
+            return tables, self._generations_locked(tables)
+    
+    def _generations_locked(self, tables: frozenset) -> Tuple:
+        return (self._epoch,) + tuple(sorted((table, self._generations.get(table, 0)) for table in tables))
+    
+    def put(self, query_name: str, params: Tuple, query: str, rows: List[Dict[str, Any]],
+            token: Optional[Tuple] = None):
+        """Lưu kết quả query vào cache (bỏ qua nếu bảng đã bị ghi kể từ read_token())"""
+        size = estimate_rows_size(rows)
+        if size > self.max_bytes:
+            return
+        
+        key = (query_name, params)
+        tables = frozenset(table.lower() for table in READ_TABLES_PATTERN.findall(query))
+        expires_at = time.monotonic() + self.ttls[query_name]
+        with self._lock:
+            if token is not None and token[1] != self._generations_locked(token[0]):
+                # Có ghi trong lúc đọc: rows có thể là dữ liệu trước khi ghi
+                self.stale_puts += 1
+                return
+            if key in self._entries:
+                self._remove_locked(key)
+            self._entries[key] = (expires_at, size, tables, rows)
+            self.current_bytes += size
+            for table in tables:
+                self._keys_by_table.setdefault(table, set()).add(key)
+            while self.current_bytes > self.max_bytes:
+                self._remove_locked(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def _remove_locked(self, key):
+        """Xóa một entry (gọi khi đang giữ lock)"""
+        _, size, tables, _ = self._entries.pop(key)
+        self.current_bytes -= size
+        for table in tables:
+            keys = self._keys_by_table.get(table)
+            if keys:
+                keys.discard(key)
+    
+    def invalidate_table(self, table: str) -> int:
+        """Xóa mọi kết quả đọc từ bảng table"""
+        with self._lock:
+            self._generations[table.lower()] = self._generations.get(table.lower(), 0) + 1
+            keys = self._keys_by_table.pop(table.lower(), set())
+            for key in keys:
+                if key in self._entries:
+                    self._remove_locked(key)
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def on_write(self, query: str):
+        """Write listener: invalidate theo bảng bị ghi"""
+        match = WRITE_TABLE_PATTERN.match(query)
+        if match:
+            self.invalidate_table(match.group(1))
+        else:
+            self.clear()
+    
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._keys_by_table.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê cache"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'stale_puts': self.stale_puts,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
+def mysql_connector():
+    """mysql.connector, import ở lần mở connection MySQL đầu tiên (SQLite/snapshot không cần tới)"""
+    import mysql.connector
+    return mysql.connector
+
 class DatabaseManager:
     """Quản lý kết nối và operations với MySQL database"""
     
     def __init__(self):
         self.pool = None
         self.is_connected = False
+        self._write_listeners = []
+        self._local = threading.local()  # transaction đang mở của từng thread
+        self.prepared_statements = DATABASE_CONFIG.get('prepared_statements', True)
+        self._statement_caches = weakref.WeakKeyDictionary()  # connection thật -> PreparedStatementCache
+        self.query_cache = QueryResultCache() if CACHE_CONFIG['query_enabled'] else None
+        if self.query_cache:
+            self.add_write_listener(self.query_cache.on_write)
+        self.replicas = None  # ReplicaRouter khi có read replica
+        self.read_your_writes = DATABASE_CONFIG.get('read_your_writes_seconds', 5)
+        self._pinned = {}     # session key -> thời điểm (monotonic) hết ghim vào primary
+        self._pin_lock = threading.Lock()
+        # lazy_connect: không mở connection trong __init__, warm_up() mở trước ở thread nền
+        self.lazy_connect = DATABASE_CONFIG.get('lazy_connect', True)
         self._initialize_connection_pool()
+        self._initialize_replicas()
+    
+    def _create_pool(self, host: str, port: int, min_size: int = None) -> MonitoredConnectionPool:
+        """Connection pool tới một MySQL server (primary hoặc replica)"""
+        # Tạo config cho từng connection trong pool
+        connect_config = {
+            'host': host,
+            'port': port,
+            'database': DATABASE_CONFIG['database'],
+            'user': DATABASE_CONFIG['user'],
+            'password': DATABASE_CONFIG['password'],
+            'charset': DATABASE_CONFIG.get('charset', 'utf8mb4'),
+            'autocommit': DATABASE_CONFIG.get('autocommit', True)
+        }
+        
+        return MonitoredConnectionPool(
+            lambda: mysql_connector().connect(**connect_config),
+            min_size=DATABASE_CONFIG.get('pool_size', 5) if min_size is None else min_size,
+            max_size=DATABASE_CONFIG.get('pool_max_size', 20),
+            acquire_timeout=DATABASE_CONFIG.get('pool_acquire_timeout', 5),
+            idle_timeout=DATABASE_CONFIG.get('pool_idle_timeout', 300),
+            # Reset session sẽ xóa các statement đã prepare trên connection
+            reset_session=DATABASE_CONFIG.get('pool_reset_session', True) and not self.prepared_statements,
+            prefill=not self.lazy_connect
+        )
+    
+    def _driver_errors(self) -> Tuple[type, ...]:
+        """Lỗi của driver được đổi thành ERROR_MESSAGES trong get_connection"""
+        return (mysql_connector().Error,)
     
     def _initialize_connection_pool(self):
         """Khởi tạo connection pool"""
         try:
-            # Tạo config cho connection pool
-            pool_config = {
-                'host': DATABASE_CONFIG['host'],
-                'port': DATABASE_CONFIG['port'],
-                'database': DATABASE_CONFIG['database'],
-                'user': DATABASE_CONFIG['user'],
-                'password': DATABASE_CONFIG['password'],
-                'charset': DATABASE_CONFIG.get('charset', 'utf8mb4'),
-                'autocommit': DATABASE_CONFIG.get('autocommit', True),
-                'pool_name': 'shoemart_pool',
-                'pool_size': DATABASE_CONFIG.get('pool_size', 5),
-                'pool_reset_session': DATABASE_CONFIG.get('pool_reset_session', True)
-            }
-            
-            self.pool = pooling.MySQLConnectionPool(**pool_config)
+            self.pool = self._create_pool(DATABASE_CONFIG['host'], DATABASE_CONFIG['port'])
             self.is_connected = True
-            logger.info(SUCCESS_MESSAGES['db_connected'])
+            if not self.lazy_connect:
+                logger.info(SUCCESS_MESSAGES['db_connected'])
             
-        except Error as e:
+        except self._driver_errors() as e:
             logger.error(f"Database connection failed: {e}")
             self.is_connected = False
             raise Exception(ERROR_MESSAGES['db_connection_failed'])
     
+    def _replica_targets(self) -> List[str]:
+        """Các read replica đã cấu hình ("host" hoặc "host:port")"""
+        return DATABASE_CONFIG.get('replica_hosts') or []
+    
+    def _create_replica_pool(self, target: str) -> MonitoredConnectionPool:
+        """Pool tới một replica; không mở connection trước để replica lỗi không chặn khởi động"""
+        host, _, port = target.partition(':')
+        return self._create_pool(host, int(port or DATABASE_CONFIG['port']), min_size=0)
+    
+    def _initialize_replicas(self):
+        """Tạo ReplicaRouter nếu có replica, replica không trả lời được bị loại ngay"""
+        targets = self._replica_targets()
+        if not targets:
+            return
+        replicas = [Replica(target, self._create_replica_pool(target)) for target in targets]
+        self.replicas = ReplicaRouter(
+            replicas, lambda replica: self._ping(replica.pool),
+            strategy=DATABASE_CONFIG.get('replica_strategy', 'round_robin'),
+            max_failures=DATABASE_CONFIG.get('replica_max_failures', 3),
+            retry_interval=DATABASE_CONFIG.get('replica_retry_interval', 30)
+        )
+        if not self.lazy_connect:
+            self._check_replicas()
+        logger.info(f"Read replicas: {', '.join(targets)} ({self.replicas.strategy})")
+    
+    def _check_replicas(self):
+        """Loại ngay các replica không trả lời được (được probe lại sau)"""
+        for replica in self.replicas.replicas:
+            if replica.healthy and not self._ping(replica.pool):
+                logger.warning(f"Replica {replica.name} is not reachable, reads use the primary")
+                self.replicas.eject(replica)
+    
+    def warm_up(self):
+        """Mở trước min_size connection và kiểm tra replica (khởi động lazy gọi ở thread nền)"""
+        try:
+            self.pool.prefill()
+        except Exception as e:
+            logger.warning(f"Connection pool warm-up failed: {e}")
+        if self.replicas is not None:
+            self._check_replicas()
+    
+    @contextmanager
+    def routing_session(self, key):
+        """Gắn các câu lệnh trong block với một session (vd. user/session id của chatbot)
+        
+        Session vừa ghi thì đọc từ primary trong read_your_writes_seconds giây;
+        ngoài block session key là thread hiện tại.
+        """
+        previous = getattr(self._local, 'session', None)
+        self._local.session = key
+        try:
+            yield self
+        finally:
+            self._local.session = previous
+    
+    def current_routing_session(self):
+        """Session key đang dùng ở thread hiện tại (để chuyển sang thread khác qua routing_session)"""
+        return self._session_key()
+    
+    def _session_key(self):
+        return getattr(self._local, 'session', None) or threading.get_ident()
+    
+    def _pin_to_primary(self):
+        """Ghim session hiện tại vào primary sau khi ghi (read-your-writes)"""
+        if self.replicas is None or self.read_your_writes <= 0:
+            return
+        now = time.monotonic()
+        with self._pin_lock:
+            self._pinned[self._session_key()] = now + self.read_your_writes
+            if len(self._pinned) > 1024:
+                for key, until in list(self._pinned.items()):
+                    if until <= now:
+                        del self._pinned[key]
+    
+    def _is_pinned(self) -> bool:
+        until = self._pinned.get(self._session_key())
+        return until is not None and until > time.monotonic()
+    
+    def _read_replica(self) -> Optional[Replica]:
+        """Replica cho lần đọc này (None = đọc từ primary)"""
+        if self.replicas is None or self._is_pinned():
+            return None
+        return self.replicas.choose()
+    
     @contextmanager
-    def get_connection(self):
-        """Context manager để lấy connection từ pool"""
+    def get_connection(self, pool: MonitoredConnectionPool = None):
+        """Context manager để lấy connection từ pool (mặc định pool của primary)"""
         connection = None
         try:
-            if not self.pool:
+            pool = pool or self.pool
+            if not pool:
                 raise Exception(ERROR_MESSAGES['db_connection_failed'])
                 
-            connection = self.pool.get_connection()
+            connection = pool.get_connection()
             yield connection
             
-        except Error as e:
+        except self._driver_errors() as e:
             logger.error(f"Database error: {e}")
             if connection:
                 connection.rollback()
             raise Exception(ERROR_MESSAGES['query_failed'])
             
         finally:
-            if connection and connection.is_connected():
+            # Luôn trả về pool; pool tự loại connection hỏng
+            if connection:
                 connection.close()
     
-    def execute_query(self, query: str, params: Tuple = None) -> List[Dict[str, Any]]:
-        """Thực thi SELECT query và trả về kết quả"""
+    @contextmanager
+    def transaction(self):
+        """Context manager gom nhiều câu lệnh (kể cả từ nhiều DAO) vào một connection và một commit
+        
+        Trong block, execute_query/execute_update/execute_many của thread hiện tại
+        chạy trên connection của transaction; lỗi bất kỳ sẽ rollback toàn bộ.
+        Gọi lồng nhau dùng chung transaction ngoài cùng.
+        """
+        if self._transaction_connection() is not None:
+            yield self
+            return
+        
+        writes = []
+        with self.get_connection() as connection:
+            connection.start_transaction()
+            self._local.connection = connection
+            self._local.writes = writes
+            try:
+                yield self
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                self._local.connection = None
+                self._local.writes = None
+        
+        # Chỉ báo cho cache... sau khi commit thành công
+        if writes:
+            self._pin_to_primary()
+        for query in dict.fromkeys(writes):
+            self._notify_write(query)
+    
+    def _transaction_connection(self):
+        """Connection của transaction đang mở trong thread hiện tại (nếu có)"""
+        return getattr(self._local, 'connection', None)
+    
+    def _statements_for(self, connection) -> PreparedStatementCache:
+        """Cache cursor prepared của connection (tạo khi dùng lần đầu)"""
+        raw_connection = connection.raw_connection
+        statements = self._statement_caches.get(raw_connection)
+        if statements is None:
+            statements = PreparedStatementCache(raw_connection, DATABASE_CONFIG.get('statement_cache_size', 64))
+            self._statement_caches[raw_connection] = statements
+        return statements
+    
+    def _drop_statements(self, connection):
+        """Bỏ cache cursor prepared của connection (sau lỗi, trạng thái statement không còn chắc chắn)"""
+        statements = self._statement_caches.pop(connection.raw_connection, None)
+        if statements is not None:
+            statements.close()
+    
+    def _fetch_rows(self, connection, query: str, params: Tuple, prepared: bool,
+                    row_type=None) -> List[ResultRow]:
+        """Chạy SELECT và trả về các dòng dạng record row_type hoặc tuple + index cột
+        (không tạo dict cho từng dòng)"""
+        if prepared:
+            try:
+                cursor = self._statements_for(connection).execute(query, params)
+                return rows_from_cursor(cursor, cursor.fetchall(), row_type)
+            except Exception:
+                self._drop_statements(connection)
+                raise
+        cursor = connection.cursor()
         try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute(query, params or ())
-                results = cursor.fetchall()
-                cursor.close()
-                return results
-                
+            cursor.execute(query, params)
+            return rows_from_cursor(cursor, cursor.fetchall(), row_type)
+        finally:
+            cursor.close()
+    
+    def execute_query(self, query: str, params: Tuple = None, query_name: str = None) -> List[Dict[str, Any]]:
+        """Thực thi SELECT query và trả về kết quả
+        
+        query_name là tên template trong SQL_QUERIES; nếu có TTL trong
+        QUERY_CACHE_TTLS thì kết quả được lấy/lưu từ query cache. Query có tên
+        chạy bằng prepared statement của connection (khi bật prepared_statements).
+        Mỗi dòng là ProductRow/OrderRow theo QUERY_ROW_TYPES, còn lại là ResultRow
+        (cả hai truy cập như dict). Pool cạn (PoolExhaustedError) được ném ra cho caller
+        thay vì trả về [] như lỗi query, để không bị hiểu nhầm là không có dòng nào.
+        """
+        params = tuple(params) if params else ()
+        prepared = self.prepared_statements and query_name is not None
+        row_type = QUERY_ROW_TYPES.get(query_name)
+        connection = self._transaction_connection()
+        if connection is not None:
+            # Trong transaction: đọc trực tiếp để thấy các thay đổi chưa commit
+            return self._fetch_rows(connection, query, params, prepared, row_type)
+        
+        use_cache = self.query_cache is not None and self.query_cache.is_cacheable(query_name)
+        # Session vừa ghi bỏ qua cache (có thể vừa được nạp lại từ replica còn trễ)
+        pinned = self.replicas is not None and self._is_pinned()
+        if use_cache and not pinned:
+            cached = self.query_cache.get(query_name, params)
+            if cached is not None:
+                return cached
+        token = self.query_cache.read_token(query) if use_cache else None
+        
+        try:
+            replica = None if pinned else self._read_replica()
+            results = None
+            if replica is not None:
+                try:
+                    results, elapsed = self._pooled_read(replica.pool, query, params, prepared, row_type, query_name)
+                    self.replicas.record_success(replica, elapsed)
+                except Exception as e:
+                    self.replicas.record_failure(replica, e)
+                    logger.warning(f"Read from replica {replica.name} failed, using primary: {e}")
+            if results is None:
+                results = self._pooled_read(self.pool, query, params, prepared, row_type, query_name)[0]
+            
+            if use_cache:
+                self.query_cache.put(query_name, params, query, results, token)
+            return results
+        
+        except PoolExhaustedError:
+            raise
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
             return []
     
-    def execute_update(self, query: str, params: Tuple = None) -> int:
-        """Thực thi INSERT/UPDATE/DELETE query"""
+    def _pooled_read(self, pool: MonitoredConnectionPool, query: str, params: Tuple, prepared: bool,
+                     row_type, query_name: Optional[str]) -> Tuple[List[ResultRow], float]:
+        """(các dòng, số giây) của một lần đọc trên pool"""
+        with self.get_connection(pool) as connection:
+            start = time.perf_counter()
+            results = self._fetch_rows(connection, query, params, prepared, row_type)
+            elapsed = time.perf_counter() - start
+        pool.record_query(query_name or 'unnamed', elapsed)
+        return results, elapsed
+    
+    def stream_query(self, query: str, params: Tuple = None, batch_size: int = None,
+                     query_name: str = None) -> Iterator[Dict[str, Any]]:
+        """Thực thi SELECT với server-side (unbuffered) cursor, trả về từng dòng qua generator
+        
+        Connection được giữ cho tới khi generator chạy hết hoặc bị đóng.
+        Đọc từ replica nếu có (không chuyển sang primary giữa chừng).
+        """
+        batch_size = batch_size or PAGINATION_CONFIG['stream_batch_size']
+        replica = None if self._transaction_connection() is not None else self._read_replica()
+        with self.get_connection(replica.pool if replica else None) as connection:
+            cursor = connection.cursor(buffered=False)
+            try:
+                cursor.execute(query, params or ())
+                row_type = QUERY_ROW_TYPES.get(query_name)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows_from_cursor(cursor, rows, row_type)
+            finally:
+                # Dừng giữa chừng -> đọc bỏ phần còn lại để trả connection sạch về pool
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+    
+    def _execute_write(self, query: str, params, many: bool) -> int:
+        """Chạy câu lệnh ghi; trong transaction thì hoãn commit và thông báo tới cuối transaction"""
+        connection = self._transaction_connection()
+        if connection is not None:
+            # Lỗi được ném ra để transaction rollback
+            cursor = connection.cursor()
+            if many:
+                cursor.executemany(query, params)
+            else:
+                cursor.execute(query, params or ())
+            affected_rows = cursor.rowcount
+            cursor.close()
+            self._local.writes.append(query)
+            return affected_rows
+        
         try:
             with self.get_connection() as connection:
+                start = time.perf_counter()
                 cursor = connection.cursor()
-                cursor.execute(query, params or ())
+                if many:
+                    cursor.executemany(query, params)
+                else:
+                    cursor.execute(query, params or ())
                 connection.commit()
                 affected_rows = cursor.rowcount
                 cursor.close()
-                return affected_rows
+                self.pool.record_query(write_query_name(query), time.perf_counter() - start)
+            
+            self._pin_to_primary()
+            self._notify_write(query)
+            return affected_rows
                 
         except Exception as e:
             logger.error(f"Update execution failed: {e}")
             return 0
     
+    def execute_update(self, query: str, params: Tuple = None) -> int:
+        """Thực thi INSERT/UPDATE/DELETE query"""
+        return self._execute_write(query, params, many=False)
+    
+    def execute_many(self, query: str, params_list: Iterable[Tuple]) -> int:
+        """Thực thi một câu lệnh với nhiều bộ tham số (executemany, một round-trip cho INSERT)"""
+        params_list = list(params_list)
+        if not params_list:
+            return 0
+        return self._execute_write(query, params_list, many=True)
+    
+    def add_write_listener(self, listener: Callable[[str], None]):
+        """Đăng ký callback được gọi sau mỗi câu lệnh ghi thành công"""
+        self._write_listeners.append(listener)
+    
+    def _notify_write(self, query: str):
+        """Thông báo cho các listener (cache...) khi có thay đổi dữ liệu"""
+        for listener in self._write_listeners:
+            try:
+                listener(query)
+            except Exception as e:
+                logger.error(f"Write listener failed: {e}")
+    
+    def statement_stats(self) -> Dict[str, Any]:
+        """Thống kê prepared statements trên các connection đang mở"""
+        caches = list(self._statement_caches.values())
+        prepares = sum(cache.prepares for cache in caches)
+        reuses = sum(cache.reuses for cache in caches)
+        return {
+            'enabled': self.prepared_statements,
+            'connections': len(caches),
+            'statements': sum(len(cache) for cache in caches),
+            'prepares': prepares,
+            'reuses': reuses,
+            'evictions': sum(cache.evictions for cache in caches),
+            'reuse_ratio': round(reuses / (prepares + reuses), 4) if prepares + reuses else 0.0
+        }
+    
+    def replica_stats(self) -> Optional[Dict[str, Any]]:
+        """Thống kê read replica (None nếu không cấu hình replica)"""
+        if self.replicas is None:
+            return None
+        stats = self.replicas.stats()
+        stats['pinned_sessions'] = sum(1 for until in list(self._pinned.values()) if until > time.monotonic())
+        return stats
+    
+    def close_replicas(self):
+        """Đóng pool của các read replica"""
+        if self.replicas is not None:
+            self.replicas.close()
+    
     def test_connection(self) -> bool:
         """Test kết nối database"""
+        return self._ping(self.pool)
+    
+    def _ping(self, pool: MonitoredConnectionPool) -> bool:
+        """SELECT 1 qua pool"""
         try:
-            with self.get_connection() as connection:
+            with self.get_connection(pool) as connection:
                 cursor = connection.cursor()
                 cursor.execute("SELECT 1")
                 cursor.fetchone()
@@ -111,74 +603,520 @@ class DatabaseManager:
         except:
             return False
 
+# Danh sách sản phẩm hỗ trợ phân trang keyset:
+# listing -> (query trang đầu, query trang sau, query đếm, query đầy đủ, cột khóa theo thứ tự ORDER BY)
+PAGED_LISTINGS = {
+    'all': ('get_products_page', 'get_products_page_after', 'count_products',
+            'get_all_products', ('Category', 'Name', 'Id')),
+    'category': ('get_products_by_category_page', 'get_products_by_category_page_after',
+                 'count_products_by_category', 'get_products_by_category', ('Name', 'Id')),
+    'price': ('get_products_by_price_range_page', 'get_products_by_price_range_page_after',
+              'count_products_by_price_range', 'get_products_by_price_range', ('Price', 'Id')),
+    'filter': ('filter_products_page', 'filter_products_page_after', 'count_filtered_products',
+               'filter_products', ('Price', 'Id'))
+}
+
+# Điều kiện của listing 'filter' theo thứ tự args (brand, category, min_price, max_price)
+FILTER_CONDITIONS = ('Name LIKE %s', 'Category LIKE %s', 'Price >= %s', 'Price <= %s')
+
+def listing_params(listing: str, args: Tuple) -> Tuple:
+    """Tham số SQL cho listing ('category' dùng LIKE)"""
+    if listing == 'category':
+        return (f"%{args[0]}%",)
+    if listing == 'filter':
+        return filter_conditions(args)[1]
+    return tuple(args)
+
+def filter_conditions(args: Tuple) -> Tuple[str, Tuple]:
+    """WHERE và tham số của listing 'filter', chỉ gồm các slot có giá trị
+
+    Không dùng dạng "%s IS NULL OR ..." để MySQL vẫn dùng được index trên Price.
+    """
+    clauses = []
+    params = []
+    for condition, value in zip(FILTER_CONDITIONS, args):
+        if value is None or value == float('inf'):
+            continue
+        clauses.append(condition)
+        params.append(f"%{value}%" if 'LIKE' in condition else value)
+    return ' AND '.join(clauses) or '1 = 1', tuple(params)
+
+def listing_query(listing: str, args: Tuple, index: int) -> Tuple[str, str, Tuple]:
+    """(tên query, SQL, tham số) của query thứ index trong PAGED_LISTINGS[listing]"""
+    query_name = PAGED_LISTINGS[listing][index]
+    if listing == 'filter':
+        where, params = filter_conditions(args)
+        return query_name, SQL_QUERIES[query_name].format(where=where), params
+    return query_name, SQL_QUERIES[query_name], listing_params(listing, args)
+
+# Số SELECT tối đa gộp vào một câu UNION ALL của các API batch
+MAX_UNION_BRANCHES = 50
+
+def union_query(queries: List[Tuple[str, Tuple]], order_by: Tuple[str, ...] = ()) -> Tuple[str, Tuple]:
+    """Gộp các SELECT (SQL, tham số) thành một UNION ALL chạy trong một lần round trip
+
+    Mỗi dòng có thêm cột BatchKey là vị trí của query trong danh sách; order_by
+    sắp xếp lại các dòng trong từng query theo collation của database.
+    """
+    parts = [f"SELECT {i} AS BatchKey, b{i}.* FROM ({query.strip()}) AS b{i}"
+             for i, (query, _) in enumerate(queries)]
+    sql = " UNION ALL ".join(parts)
+    if order_by:
+        sql += " ORDER BY " + ", ".join(('BatchKey',) + tuple(order_by))
+    return sql, tuple(param for _, params in queries for param in params)
+
+def group_by_batch_key(rows: List[Dict[str, Any]]) -> Dict[int, List[ProductRow]]:
+    """Chia kết quả của union_query theo BatchKey (dòng sản phẩm chuyển sang ProductRow)"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(int(row['BatchKey']), []).append(ProductRow.from_mapping(row))
+    return groups
+
+def page_key(listing: str, row: Dict[str, Any]) -> Tuple:
+    """Khóa keyset của một dòng"""
+    return tuple(row.get(column) for column in PAGED_LISTINGS[listing][4])
+
+def comparable_key(values: Tuple) -> Tuple:
+    """Khóa so sánh không phân biệt hoa thường (giống collation của MySQL)"""
+    return tuple(value.lower() if isinstance(value, str) else value for value in values)
+
+def build_product_page(listing: str, rows: List[Dict[str, Any]], limit: int, total: Optional[int]) -> Dict[str, Any]:
+    """Đóng gói một trang sản phẩm"""
+    return {
+        'listing': listing,
+        'products': rows,
+        'total': total,
+        'next_cursor': page_key(listing, rows[-1]) if rows and len(rows) >= limit else None
+    }
+
+class ProductCatalogCache:
+    """Cache in-memory cho bảng Products (TTL + invalidate khi có ghi)
+
+    Có numpy thì lọc danh mục/khoảng giá chạy trên ColumnarCatalog (mask vector hóa,
+    searchsorted) và chỉ dựng dict cho các dòng của trang cần trả về.
+    """
+    
+    def __init__(self, db_manager: DatabaseManager, ttl: int = None):
+        self.db = db_manager
+        self.ttl = CACHE_CONFIG['catalog_ttl'] if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.stale_serves = 0
+        self.version = 0  # tăng mỗi khi dữ liệu catalog có thể đã đổi (nạp lại/invalidate)
+        self._lock = threading.Lock()
+        self._loaded_at = None
+        self._products = []
+        self._by_id = {}
+        self._by_price = []
+        self._prices = []
+        self.columnar = None
+        self.search_index = ProductSearchIndex(fuzzy=FUZZY_CONFIG['enabled'],
+                                               min_similarity=FUZZY_CONFIG['min_similarity'],
+                                               max_candidates=FUZZY_CONFIG['max_candidates'])
+        self.db.add_write_listener(self._on_write)
+    
+    def is_fresh(self) -> bool:
+        """Kiểm tra cache còn hạn hay không"""
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+    
+    def _load(self) -> bool:
+        """Nạp toàn bộ bảng Products vào bộ nhớ"""
+        return self.load_rows(self.db.execute_query(SQL_QUERIES['get_all_products'], query_name='get_all_products'))
+    
+    def load_rows(self, products: List[Dict[str, Any]]) -> bool:
+        """Dựng cache từ các dòng của query get_all_products"""
+        if not products:
+            # Không phân biệt được lỗi và bảng rỗng -> để DAO truy vấn trực tiếp
+            return False
+        
+        products = sorted(ProductRow.coerce_all(products), key=lambda p: comparable_key(page_key('all', p)))
+        self._products = products
+        self._by_id = {p['Id']: p for p in products}
+        if numpy_available():
+            self.columnar = ColumnarCatalog(products)
+        else:
+            self._by_price = sorted(products, key=lambda p: (p.get('Price') or 0, p['Id']))
+            self._prices = [float(p.get('Price') or 0) for p in self._by_price]
+        self.search_index.build(products)
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+        self.version += 1
+        logger.info(f"Catalog cache loaded {len(products)} products")
+        return True
+    
+    def _ensure_loaded(self) -> bool:
+        """Đảm bảo cache đã được nạp và còn hạn"""
+        if self.is_fresh():
+            self.hits += 1
+            return True
+        if not self._products and self._lock.locked():
+            # Lần nạp đầu đang chạy ở thread khác (warm-up): request truy vấn SQL thay vì chờ nạp xong
+            self.misses += 1
+            return False
+        
+        with self._lock:
+            if self.is_fresh():
+                self.hits += 1
+                return True
+            self.misses += 1
+            if self._load():
+                return True
+            if self._products and not self.db.test_connection():
+                # DB lỗi: tiếp tục phục vụ dữ liệu cũ, thử nạp lại sau catalog_retry_interval
+                self.stale_serves += 1
+                self._loaded_at = time.monotonic() - self.ttl + CACHE_CONFIG['catalog_retry_interval']
+                logger.warning("Catalog reload failed, serving stale catalog")
+                return True
+            self._products = []
+            self._by_id = {}
+            self._by_price = []
+            self._prices = []
+            self.columnar = None
+            self.search_index.build([])
+            self.version += 1
+            return False
+    
+    def refresh(self) -> bool:
+        """Nạp lại ngay từ database (dùng ở thread nền, request vẫn đọc dữ liệu hiện có)"""
+        with self._lock:
+            return self._load()
+    
+    def _on_write(self, query: str):
+        """Invalidate cache khi có câu lệnh ghi vào bảng Products"""
+        if TABLES['products'].lower() in query.lower():
+            self.invalidate()
+    
+    def invalidate(self):
+        """Xóa cache, lần truy cập sau sẽ nạp lại từ database"""
+        with self._lock:
+            self._loaded_at = None
+            self.version += 1
+    
+    def get_all(self) -> Optional[List[Dict[str, Any]]]:
+        """Lấy tất cả sản phẩm (None nếu cache không dùng được)"""
+        if not self._ensure_loaded():
+            return None
+        return list(self._products)
+    
+    def ready(self) -> bool:
+        """Cache có sẵn dữ liệu để trả lời hay không (nạp lại nếu hết hạn)"""
+        return self._ensure_loaded()
+    
+    def get_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Lấy sản phẩm theo ID (gọi sau ready())"""
+        return self._by_id.get(product_id)
+    
+    def _category_rows(self, category: str) -> List[Dict[str, Any]]:
+        """Sản phẩm có Category chứa chuỗi category, sắp theo (Name, Id)"""
+        if self.columnar is not None:
+            return self.columnar.take(self.columnar.filter(category))
+        term = category.lower()
+        results = [p for p in self._products if term in (p.get('Category') or '').lower()]
+        return sorted(results, key=lambda p: comparable_key(page_key('category', p)))
+    
+    def _price_rows(self, min_price: float, max_price: float) -> List[Dict[str, Any]]:
+        """Sản phẩm trong khoảng giá, sắp theo (Price, Id)"""
+        if self.columnar is not None:
+            return self.columnar.take(self.columnar.filter(None, min_price, max_price))
+        start = bisect.bisect_left(self._prices, float(min_price))
+        end = bisect.bisect_right(self._prices, float(max_price))
+        return self._by_price[start:end]
+    
+    def _filter_rows(self, brand: Optional[str], category: Optional[str],
+                     min_price: Optional[float], max_price: Optional[float]) -> List[Dict[str, Any]]:
+        """Sản phẩm thỏa các slot có giá trị (listing 'filter'), sắp theo (Price, Id)"""
+        rows = self._price_rows(0 if min_price is None else min_price,
+                                float('inf') if max_price is None else max_price)
+        if category is not None:
+            term = category.lower()
+            rows = [p for p in rows if term in (p.get('Category') or '').lower()]
+        if brand is not None:
+            term = brand.lower()
+            rows = [p for p in rows if term in (p.get('Name') or '').lower()]
+        return rows
+    
+    def get_by_category(self, category: str) -> Optional[List[Dict[str, Any]]]:
+        """Lấy sản phẩm có Category chứa chuỗi category"""
+        if not self._ensure_loaded():
+            return None
+        return self._category_rows(category)
+    
+    def search_by_name(self, search_term: str) -> Optional[List[Dict[str, Any]]]:
+        """Tìm sản phẩm qua inverted index (Name, Description, Category), xếp theo độ liên quan
+        (từ khóa gõ sai được khớp gần đúng qua index trigram)"""
+        if not self._ensure_loaded():
+            return None
+        return self.search_index.search(search_term)
+    
+    def get_by_price_range(self, min_price: float, max_price: float) -> Optional[List[Dict[str, Any]]]:
+        """Lấy sản phẩm trong khoảng giá [min_price, max_price]"""
+        if not self._ensure_loaded():
+            return None
+        return self._price_rows(min_price, max_price)
+    
+    def get_page(self, listing: str, args: Tuple, limit: Optional[int],
+                 after: Optional[Tuple] = None) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """Một trang keyset của listing và tổng số dòng (None nếu cache không dùng được)"""
+        if not self._ensure_loaded():
+            return None
+        if listing != 'all' and self.columnar is not None:
+            return self._columnar_page(listing, args, limit, after)
+        if listing == 'all':
+            rows = self._products
+        elif listing == 'category':
+            rows = self._category_rows(*args)
+        elif listing == 'price':
+            rows = self._price_rows(*args)
+        else:
+            rows = self._filter_rows(*args)
+        
+        start = 0
+        if after is not None:
+            start = bisect.bisect_right(rows, comparable_key(after),
+                                        key=lambda p: comparable_key(page_key(listing, p)))
+        end = None if limit is None else start + limit
+        return rows[start:end], len(rows)
+    
+    def _columnar_page(self, listing: str, args: Tuple, limit: Optional[int],
+                       after: Optional[Tuple]) -> Tuple[List[Dict[str, Any]], int]:
+        """get_page trên ColumnarCatalog: lọc ra mảng vị trí, chỉ dựng dict cho trang"""
+        columnar = self.columnar
+        if listing == 'category':
+            positions = columnar.filter(args[0])
+        elif listing == 'price':
+            positions = columnar.filter(None, *args)
+        else:
+            brand, category, min_price, max_price = args
+            positions = columnar.filter(category, min_price, max_price, name=brand, by_price=True)
+        start = 0 if after is None else columnar.start_after(positions, after, by_price=listing != 'category')
+        end = None if limit is None else start + limit
+        return columnar.take(positions[start:end]), len(positions)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss của cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._products),
+            'fresh': self.is_fresh(),
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'loads': self.loads,
+            'stale_serves': self.stale_serves,
+            'version': self.version,
+            'search_index': self.search_index.stats(),
+            'columnar': self.columnar.stats() if self.columnar is not None else None,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
+
 class ProductDataAccess:
     """Data Access Layer cho Products"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, cache: Optional[ProductCatalogCache] = None,
+                 aggregates: Optional[SalesAggregates] = None):
         self.db = db_manager
+        self.cache = cache
+        self.aggregates = aggregates
     
     def get_all_products(self) -> List[Dict[str, Any]]:
         """Lấy tất cả sản phẩm"""
-        return self.db.execute_query(SQL_QUERIES['get_all_products'])
+        if self.cache:
+            cached = self.cache.get_all()
+            if cached is not None:
+                return cached
+        return self.db.execute_query(SQL_QUERIES['get_all_products'], query_name='get_all_products')
     
     def get_products_by_category(self, category: str) -> List[Dict[str, Any]]:
         """Lấy sản phẩm theo danh mục"""
+        if self.cache:
+            cached = self.cache.get_by_category(category)
+            if cached is not None:
+                return cached
         search_term = f"%{category}%"
         return self.db.execute_query(
             SQL_QUERIES['get_products_by_category'], 
-            (search_term,)
+            (search_term,),
+            query_name='get_products_by_category'
         )
     
     def search_products_by_name(self, search_term: str) -> List[Dict[str, Any]]:
         """Tìm kiếm sản phẩm theo tên"""
+        if self.cache:
+            cached = self.cache.search_by_name(search_term)
+            if cached is not None:
+                return cached
         pattern = f"%{search_term}%"
         return self.db.execute_query(
             SQL_QUERIES['search_products_by_name'], 
-            (pattern, pattern)
+            (pattern, pattern),
+            query_name='search_products_by_name'
         )
     
     def get_product_by_id(self, product_id: int) -> Optional[Dict[str, Any]]:
         """Lấy sản phẩm theo ID"""
+        if self.cache and self.cache.ready():
+            return self.cache.get_by_id(product_id)
         results = self.db.execute_query(
             SQL_QUERIES['get_product_by_id'], 
-            (product_id,)
+            (product_id,),
+            query_name='get_product_by_id'
         )
         return results[0] if results else None
     
     def get_products_by_price_range(self, min_price: float, max_price: float) -> List[Dict[str, Any]]:
         """Lấy sản phẩm theo khoảng giá"""
+        if self.cache:
+            cached = self.cache.get_by_price_range(min_price, max_price)
+            if cached is not None:
+                return cached
         return self.db.execute_query(
             SQL_QUERIES['get_products_by_price_range'], 
-            (min_price, max_price)
+            (min_price, max_price),
+            query_name='get_products_by_price_range'
         )
     
     def get_popular_products(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Lấy sản phẩm bán chạy"""
+        if self.aggregates:
+            return self.aggregates.get_popular_products(limit)
         return self.db.execute_query(
             SQL_QUERIES['get_popular_products'], 
-            (limit,)
+            (limit,),
+            query_name='get_popular_products'
         )
 
+    def count_products(self, listing: str = 'all', args: Tuple = ()) -> int:
+        """Đếm số sản phẩm của listing bằng COUNT riêng"""
+        if self.cache:
+            cached = self.cache.get_page(listing, args, 0)
+            if cached is not None:
+                return cached[1]
+        query_name, query, params = listing_query(listing, args, 2)
+        results = self.db.execute_query(query, params, query_name=query_name)
+        return int(results[0]['Total']) if results else 0
+    
+    def get_product_page(self, listing: str = 'all', args: Tuple = (), limit: int = None,
+                         after: Optional[Tuple] = None, with_total: bool = True) -> Dict[str, Any]:
+        """Lấy một trang sản phẩm (keyset pagination, LIMIT đẩy xuống database)
+        
+        listing: 'all', 'category' (args=(category,)), 'price' (args=(min, max))
+        hoặc 'filter' (args=(brand, category, min, max), slot None thì bỏ qua).
+        after là next_cursor của trang trước.
+        """
+        limit = limit or PAGINATION_CONFIG['page_size']
+        if self.cache:
+            cached = self.cache.get_page(listing, args, limit, after)
+            if cached is not None:
+                rows, total = cached
+                return build_product_page(listing, rows, limit, total if with_total else None)
+        
+        if after is None:
+            query_name, query, params = listing_query(listing, args, 0)
+            rows = self.db.execute_query(query, params + (limit,), query_name=query_name)
+        else:
+            query_name, query, params = listing_query(listing, args, 1)
+            rows = self.db.execute_query(query, params + tuple(after) + (limit,), query_name=query_name)
+        total = self.count_products(listing, args) if with_total else None
+        return build_product_page(listing, rows, limit, total)
+    
+    def get_first_pages(self, listings: Iterable[Tuple[str, Tuple, int]]) -> Dict[Tuple[str, Tuple, int], Dict[str, Any]]:
+        """Trang đầu (kèm tổng) của nhiều listing (listing, args, limit) trong một lần gọi
+
+        Có catalog cache thì lọc trong bộ nhớ. Không có thì các listing cùng loại được gộp:
+        một UNION ALL cho các trang và một cho các COUNT (mỗi MAX_UNION_BRANCHES listing),
+        thay vì hai query cho mỗi listing.
+        """
+        pages = {}
+        remaining = []
+        for key in dict.fromkeys(listings):
+            listing, args, limit = key
+            cached = self.cache.get_page(listing, args, limit) if self.cache else None
+            if cached is not None:
+                pages[key] = build_product_page(listing, cached[0], limit, cached[1])
+            else:
+                remaining.append(key)
+        
+        by_listing = {}
+        for key in remaining:
+            by_listing.setdefault(key[0], []).append(key)
+        for listing, keys in by_listing.items():
+            for start in range(0, len(keys), MAX_UNION_BRANCHES):
+                chunk = keys[start:start + MAX_UNION_BRANCHES]
+                page_queries = []
+                count_queries = []
+                for _, args, limit in chunk:
+                    _, query, params = listing_query(listing, args, 0)
+                    page_queries.append((query, params + (limit,)))
+                    count_queries.append(listing_query(listing, args, 2)[1:])
+                rows = group_by_batch_key(self.db.execute_query(*union_query(page_queries, PAGED_LISTINGS[listing][4])))
+                totals = {int(row['BatchKey']): int(row['Total'])
+                          for row in self.db.execute_query(*union_query(count_queries))}
+                for i, key in enumerate(chunk):
+                    pages[key] = build_product_page(listing, rows.get(i, []), key[2], totals.get(i, 0))
+        return pages
+    
+    def search_products_by_names(self, search_terms: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """search_products_by_name cho nhiều từ khóa (không có catalog cache: một UNION ALL
+        mỗi MAX_UNION_BRANCHES từ khóa)"""
+        results = {}
+        remaining = []
+        for term in dict.fromkeys(search_terms):
+            cached = self.cache.search_by_name(term) if self.cache else None
+            if cached is not None:
+                results[term] = cached
+            else:
+                remaining.append(term)
+        
+        for start in range(0, len(remaining), MAX_UNION_BRANCHES):
+            chunk = remaining[start:start + MAX_UNION_BRANCHES]
+            queries = [(SQL_QUERIES['search_products_by_name'], (f"%{term}%", f"%{term}%")) for term in chunk]
+            rows = group_by_batch_key(self.db.execute_query(*union_query(queries, ('Name',))))
+            for i, term in enumerate(chunk):
+                results[term] = rows.get(i, [])
+        return results
+    
+    def iter_products(self, listing: str = 'all', args: Tuple = (),
+                      batch_size: int = None) -> Iterator[Dict[str, Any]]:
+        """Duyệt toàn bộ listing theo dạng stream thay vì fetchall"""
+        if self.cache:
+            cached = self.cache.get_page(listing, args, None)
+            if cached is not None:
+                yield from cached[0]
+                return
+        query_name, query, params = listing_query(listing, args, 3)
+        yield from self.db.stream_query(query, params, batch_size, query_name=query_name)
+
 class OrderDataAccess:
     """Data Access Layer cho Orders"""
     
-    def __init__(self, db_manager: DatabaseManager):
+    def __init__(self, db_manager: DatabaseManager, aggregates: Optional[SalesAggregates] = None):
         self.db = db_manager
+        self.aggregates = aggregates
     
     def get_user_orders(self, user_id: int) -> List[Dict[str, Any]]:
         """Lấy đơn hàng của user"""
         return self.db.execute_query(
             SQL_QUERIES['get_user_orders'], 
-            (user_id,)
+            (user_id,),
+            query_name='get_user_orders'
         )
     
     def get_sales_statistics(self) -> List[Dict[str, Any]]:
         """Lấy thống kê bán hàng"""
-        return self.db.execute_query(SQL_QUERIES['get_sales_stats'])
+        if self.aggregates:
+            return self.aggregates.get_sales_statistics()
+        return self.db.execute_query(SQL_QUERIES['get_sales_stats'], query_name='get_sales_stats')
 
 class CartDataAccess:
     """Data Access Layer cho Cart"""
     
+    ADD_ITEM_QUERY = """
+        INSERT INTO CartItems (UserId, ProductId, Quantity)
+        VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE Quantity = Quantity + VALUES(Quantity)
+    """
+    
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
@@ -186,17 +1124,13 @@ class CartDataAccess:
         """Lấy giỏ hàng của user"""
         return self.db.execute_query(
             SQL_QUERIES['get_user_cart'], 
-            (user_id,)
+            (user_id,),
+            query_name='get_user_cart'
         )
     
     def add_to_cart(self, user_id: int, product_id: int, quantity: int) -> bool:
         """Thêm sản phẩm vào giỏ hàng"""
-        query = """
-            INSERT INTO CartItems (UserId, ProductId, Quantity)
-            VALUES (%s, %s, %s)
-            ON DUPLICATE KEY UPDATE Quantity = Quantity + VALUES(Quantity)
-        """
-        affected = self.db.execute_update(query, (user_id, product_id, quantity))
+        affected = self.db.execute_update(self.ADD_ITEM_QUERY, (user_id, product_id, quantity))
         return affected > 0
     
     def remove_from_cart(self, user_id: int, product_id: int) -> bool:
@@ -210,22 +1144,123 @@ class CartDataAccess:
         query = "DELETE FROM CartItems WHERE UserId = %s"
         affected = self.db.execute_update(query, (user_id,))
         return affected >= 0
+    
+    def add_many(self, user_id: int, items: Iterable[Tuple[int, int]]) -> bool:
+        """Thêm nhiều sản phẩm (product_id, quantity) vào giỏ trong một câu lệnh"""
+        quantities = {}
+        for product_id, quantity in items:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+        if not quantities:
+            return False
+        affected = self.db.execute_many(
+            self.ADD_ITEM_QUERY,
+            [(user_id, product_id, quantity) for product_id, quantity in quantities.items()]
+        )
+        return affected > 0
+    
+    def remove_many(self, user_id: int, product_ids: Iterable[int]) -> bool:
+        """Xóa nhiều sản phẩm khỏi giỏ trong một câu lệnh"""
+        product_ids = list(dict.fromkeys(product_ids))
+        if not product_ids:
+            return False
+        query = "DELETE FROM CartItems WHERE UserId = %s AND ProductId IN ({})".format(
+            ', '.join(['%s'] * len(product_ids))
+        )
+        affected = self.db.execute_update(query, (user_id, *product_ids))
+        return affected > 0
+    
+    def replace_cart(self, user_id: int, items: Iterable[Tuple[int, int]]) -> bool:
+        """Thay toàn bộ giỏ hàng bằng danh sách (product_id, quantity) trong một transaction"""
+        items = list(items)
+        try:
+            with self.db.transaction():
+                self.clear_cart(user_id)
+                if items:
+                    self.add_many(user_id, items)
+            return True
+        except Exception as e:
+            logger.error(f"Replace cart failed: {e}")
+            return False
 
 class DatabaseService:
     """Service tổng hợp tất cả data access layers"""
     
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.products = ProductDataAccess(self.db_manager)
-        self.orders = OrderDataAccess(self.db_manager)
+    def __init__(self, db_manager: Optional[DatabaseManager] = None, snapshot: Optional[CatalogSnapshot] = None,
+                 offline: bool = False):
+        """snapshot mặc định chỉ bật cho MySQL thật (khi service tự tạo DatabaseManager);
+        offline=True khi db_manager là bản snapshot chỉ đọc"""
+        self.db_manager = db_manager or DatabaseManager()
+        self.catalog_cache = ProductCatalogCache(self.db_manager) if CACHE_CONFIG['catalog_enabled'] else None
+        self.sales_aggregates = SalesAggregates(self.db_manager) if AGGREGATE_CONFIG['enabled'] else None
+        self.products = ProductDataAccess(self.db_manager, self.catalog_cache, self.sales_aggregates)
+        self.orders = OrderDataAccess(self.db_manager, self.sales_aggregates)
         self.cart = CartDataAccess(self.db_manager)
+        
+        self.offline = offline
+        if snapshot is None and db_manager is None and SNAPSHOT_CONFIG['enabled']:
+            snapshot = CatalogSnapshot()
+        self.snapshot = snapshot
+        self.snapshot_writer = None
+        if self.snapshot and not offline:
+            self._warm_start_from_snapshot()
+            self.start_snapshot_writer()
+    
+    def start_snapshot_writer(self, snapshot: Optional[CatalogSnapshot] = None):
+        """Ghi snapshot định kỳ ở thread nền (prefork_server: chỉ một worker ghi)"""
+        self.snapshot = snapshot or self.snapshot or CatalogSnapshot()
+        self.snapshot_writer = SnapshotWriter(self)
+        self.snapshot_writer.start()
+    
+    def _warm_start_from_snapshot(self):
+        """Nạp snapshot để phục vụ ngay, rồi nạp lại catalog từ database ở thread nền"""
+        data = self.snapshot.load()
+        if not data:
+            return
+        self.restore_snapshot(data)
+        if self.catalog_cache:
+            threading.Thread(target=self.catalog_cache.refresh, name='shoemart-catalog-refresh', daemon=True).start()
+    
+    def preload(self):
+        """Nạp trước những gì các request đầu tiên cần: connection của pool, catalog cache
+        (kèm search index và catalog dạng cột) và sales aggregates"""
+        self.db_manager.warm_up()
+        if self.catalog_cache:
+            self.catalog_cache.ready()
+        if self.sales_aggregates:
+            self.sales_aggregates.refresh()
+    
+    def restore_snapshot(self, data: Dict[str, Any]):
+        """Đưa dữ liệu snapshot vào catalog cache và sales aggregates"""
+        if self.catalog_cache:
+            self.catalog_cache.load_rows(data['products'])
+        if self.sales_aggregates and data['aggregates']:
+            self.sales_aggregates.restore(data['aggregates'], refresh=not self.offline)
+    
+    def save_snapshot(self) -> bool:
+        """Ghi snapshot từ dữ liệu hiện tại (bỏ qua khi offline hoặc database lỗi)"""
+        if self.offline or not self.snapshot:
+            return False
+        if not self.db_manager.test_connection():
+            logger.warning("Snapshot skipped: database unreachable")
+            return False
+        products = self.products.get_all_products()
+        aggregates = self.sales_aggregates.export_state() if self.sales_aggregates else None
+        return self.snapshot.save(products, aggregates)
     
     def health_check(self) -> Dict[str, Any]:
         """Kiểm tra sức khỏe database"""
         is_healthy = self.db_manager.test_connection()
         return {
-            'status': 'healthy' if is_healthy else 'unhealthy',
+            'status': ('offline' if self.offline else 'healthy') if is_healthy else 'unhealthy',
             'connected': is_healthy,
+            'offline': self.offline,
+            'catalog_cache': self.catalog_cache.stats() if self.catalog_cache else None,
+            'query_cache': self.db_manager.query_cache.stats() if self.db_manager.query_cache else None,
+            'sales_aggregates': self.sales_aggregates.stats() if self.sales_aggregates else None,
+            'connection_pool': self.db_manager.pool.stats() if self.db_manager.pool else None,
+            'replicas': self.db_manager.replica_stats(),
+            'prepared_statements': self.db_manager.statement_stats(),
+            'snapshot': self.snapshot.stats() if self.snapshot else None,
             'timestamp': __import__('datetime').datetime.now().isoformat()
         }
     
@@ -243,26 +1278,20 @@ class DatabaseService:
             return f"{price:,}".replace(',', '.') + " VNĐ"
     
     def format_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
-        """Format thông tin sản phẩm để hiển thị"""
+        """Format thông tin sản phẩm để hiển thị (ProductView đọc thẳng từ dòng, không copy)"""
         if not product:
             return {}
             
-        return {
-            'id': product.get('Id'),
-            'name': product.get('Name', ''),
-            'description': product.get('Description', ''),
-            'price': product.get('Price', 0),
-            'formatted_price': self.format_price(product.get('Price', 0)),
-            'category': product.get('Category', ''),
-            'image_url': product.get('ImageUrl', '')
-        }
+        return ProductView(product, self.format_price(product.get('Price', 0)))
     
     def close_connections(self):
         """Đóng tất cả kết nối"""
+        if self.snapshot_writer:
+            self.snapshot_writer.stop()
         if self.db_manager.pool:
             try:
-                # MySQL Connector không có close pool method
-                # Pool sẽ tự động đóng khi object bị garbage collected
+                self.db_manager.close_replicas()
+                self.db_manager.pool.close_all()
                 self.db_manager.is_connected = False
                 logger.info("Database connections closed")
             except Exception as e:
@@ -48,6 +48,7 @@ def interactive_mode():
     print("=" * 60)
     
     chatbot = ShoeMartMySQLChatBot()
+    chatbot.wait_for_database()  # trạng thái kết nối có sau warm-up
     
     # Hiển thị trạng thái kết nối
     if chatbot.is_db_connected:
@@ -100,6 +101,7 @@ def test_features():
     print("=" * 60)
     
     chatbot = ShoeMartMySQLChatBot()
+    chatbot.wait_for_database()  # trạng thái kết nối có sau warm-up
     
     test_cases = [
         ("Database Connection", chatbot.is_db_connected),
@@ -131,6 +133,7 @@ def show_database_status():
     
     try:
         chatbot = ShoeMartMySQLChatBot()
+        chatbot.wait_for_database()  # trạng thái kết nối có sau warm-up
         
         print(f"🤖 ChatBot: {chatbot.name} v{chatbot.version}")
         print(f"💾 Database: {'✅ Connected' if chatbot.is_db_connected else '❌ Disconnected'}")
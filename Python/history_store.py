@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Lịch sử hội thoại cho ShoeMart ChatBot
+Ring buffer dung lượng cố định (bản ghi gọn, timestamp dạng số) và writer nền
+ghi lịch sử theo lô ra SQLite hoặc log JSON Lines append-only, để request
+không bao giờ phải chờ I/O của lịch sử
+"""
+
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import logging
+from collections import deque
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+from config import HISTORY_CONFIG
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ChatHistory (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    SessionId TEXT NOT NULL,
+    Timestamp REAL NOT NULL,
+    UserMessage TEXT NOT NULL,
+    BotResponse TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS IX_ChatHistory_SessionId ON ChatHistory (SessionId, Timestamp);
+"""
+
+class HistoryEntry:
+    """Một lượt hội thoại (timestamp là epoch giây, chỉ format khi đọc ra)"""
+
+    __slots__ = ('timestamp', 'user', 'bot')
+
+    def __init__(self, timestamp: float, user: str, bot: str):
+        self.timestamp = timestamp
+        self.user = user
+        self.bot = bot
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dạng dict như lịch sử trước đây ('timestamp' là giờ:phút:giây)"""
+        return {
+            'timestamp': datetime.fromtimestamp(self.timestamp).strftime('%H:%M:%S'),
+            'user': self.user,
+            'bot': self.bot
+        }
+
+    def __repr__(self) -> str:
+        return f"HistoryEntry({self.timestamp!r}, {self.user!r}, {self.bot!r})"
+
+class ConversationHistory:
+    """Ring buffer các lượt hội thoại gần nhất (deque maxlen: thêm O(1), tự bỏ lượt cũ nhất)
+
+    Có writer thì mỗi lượt mới cũng được đưa vào hàng đợi ghi của writer (không chặn).
+    """
+
+    __slots__ = ('session_id', 'writer', '_entries')
+
+    def __init__(self, capacity: int, session_id: str = None, writer: Optional['HistoryWriter'] = None):
+        self.session_id = session_id
+        self.writer = writer
+        self._entries = deque(maxlen=capacity)
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def append(self, user_message: str, bot_response: str) -> HistoryEntry:
+        """Thêm một lượt"""
+        entry = HistoryEntry(time.time(), user_message, bot_response)
+        self._entries.append(entry)
+        if self.writer is not None:
+            self.writer.submit(self.session_id, entry)
+        return entry
+
+    def recent(self, count: int) -> List[HistoryEntry]:
+        """count lượt gần nhất (cũ trước)"""
+        if count <= 0:
+            return []
+        start = max(len(self._entries) - count, 0)
+        return [self._entries[i] for i in range(start, len(self._entries))]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Toàn bộ lịch sử dạng dict (cho API/JSON)"""
+        return [entry.to_dict() for entry in self._entries]
+
+    def clear(self):
+        self._entries.clear()
+
+class HistoryWriter:
+    """Thread nền ghi lịch sử theo lô ra SQLite ('sqlite') hoặc file JSON Lines ('jsonl')
+
+    submit() chỉ đưa vào hàng đợi có giới hạn; hàng đợi đầy thì bỏ lượt đó (đếm trong dropped)
+    thay vì làm chậm request. Lô được ghi khi đủ batch_size hoặc sau flush_interval giây.
+    Process con sau fork (prefork_server) có hàng đợi và thread ghi riêng.
+    """
+
+    FORMATS = ('sqlite', 'jsonl')
+
+    def __init__(self, path: str = None, format: str = None, batch_size: int = None,
+                 flush_interval: float = None, queue_size: int = None):
+        self.path = path or HISTORY_CONFIG['path']
+        self.format = format or HISTORY_CONFIG['format']
+        if self.format not in self.FORMATS:
+            logger.warning(f"Unknown history format '{self.format}', using sqlite")
+            self.format = 'sqlite'
+        self.batch_size = batch_size or HISTORY_CONFIG['batch_size']
+        self.flush_interval = flush_interval or HISTORY_CONFIG['flush_interval']
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size or HISTORY_CONFIG['queue_size'])
+        self._stop_event = threading.Event()
+        self._connection = None
+        self._thread = None
+
+    def start(self):
+        """Khởi động thread ghi"""
+        self._thread = threading.Thread(target=self.run, name='shoemart-history-writer', daemon=True)
+        self._thread.start()
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def after_fork_in_child(self):
+        """Thread ghi không sang process con sau fork (hàng đợi có thể đang bị khóa): tạo lại từ đầu"""
+        started = self._thread is not None
+        self._queue = queue.Queue(maxsize=self._queue.maxsize)
+        self._stop_event = threading.Event()
+        self._connection = None
+        self._thread = None
+        self.written = self.dropped = self.batches = self.errors = 0
+        if started:
+            self.start()
+
+    def submit(self, session_id: Optional[str], entry: HistoryEntry):
+        """Đưa một lượt vào hàng đợi ghi (không chặn)"""
+        try:
+            self._queue.put_nowait((session_id or '', entry))
+        except queue.Full:
+            self.dropped += 1
+
+    def run(self):
+        try:
+            self._open()
+        except Exception as e:
+            logger.error(f"History writer cannot open {self.path}: {e}")
+            return
+        try:
+            while not self._stop_event.is_set() or not self._queue.empty():
+                batch = self._next_batch()
+                if batch:
+                    self._write(batch)
+        finally:
+            self._close()
+
+    def _next_batch(self) -> List[tuple]:
+        """Chờ lượt đầu tiên tối đa flush_interval giây rồi gom thêm tới batch_size"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and not self._stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        # Lúc dừng: lấy hết phần còn lại không chờ
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        if self.format == 'sqlite':
+            # Nhiều worker có thể ghi cùng file: chờ khóa thay vì lỗi ngay
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.executescript(HISTORY_SCHEMA)
+
+    def _write(self, batch: List[tuple]):
+        try:
+            if self.format == 'sqlite':
+                with self._connection:
+                    self._connection.executemany(
+                        "INSERT INTO ChatHistory (SessionId, Timestamp, UserMessage, BotResponse) VALUES (?, ?, ?, ?)",
+                        [(session_id, entry.timestamp, entry.user, entry.bot) for session_id, entry in batch]
+                    )
+            else:
+                lines = [json.dumps({'session_id': session_id, 'timestamp': entry.timestamp,
+                                     'user': entry.user, 'bot': entry.bot}, ensure_ascii=False)
+                         for session_id, entry in batch]
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write('\n'.join(lines) + '\n')
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"History writer failed to write {len(batch)} entries: {e}")
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def stop(self, timeout: float = 5.0):
+        """Dừng writer sau khi ghi nốt hàng đợi"""
+        self._stop_event.set()
+        if self.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê ghi lịch sử"""
+        return {
+            'path': self.path,
+            'format': self.format,
+            'pending': self._queue.qsize(),
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+            'errors': self.errors
+        }
+
+# Global writer instance (None khi tắt HISTORY_PERSIST)
+_history_writer_instance = None
+_history_writer_lock = threading.Lock()
+
+def get_history_writer() -> Optional[HistoryWriter]:
+    """Lấy singleton HistoryWriter (khởi động khi gọi lần đầu, ghi nốt hàng đợi lúc thoát)"""
+    global _history_writer_instance
+    if not HISTORY_CONFIG['persist']:
+        return None
+    with _history_writer_lock:
+        if _history_writer_instance is None:
+            _history_writer_instance = HistoryWriter()
+            _history_writer_instance.start()
+            atexit.register(_history_writer_instance.stop)
+            os.register_at_fork(after_in_child=_history_writer_instance.after_fork_in_child)
+    return _history_writer_instance
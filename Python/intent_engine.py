@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Intent engine cho ShoeMart ChatBot
+Biên dịch toàn bộ intent patterns thành một regex duy nhất để phân loại trong một lượt quét
+"""
+
+import re
+from typing import Dict, List
+
+class IntentClassifier:
+    """Phân loại intent bằng một regex alternation với named groups
+
+    Mỗi intent là một named group, thứ tự alternation theo thứ tự ưu tiên của
+    dict patterns. Toàn bộ alternation nằm trong lookahead nên regex không tiêu
+    thụ ký tự: tại mỗi vị trí, group khớp là intent ưu tiên cao nhất bắt đầu
+    tại đó, và intent trả về là intent ưu tiên cao nhất trên toàn chuỗi -
+    giống hệt vòng lặp re.search theo từng pattern.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]], default_intent: str = 'default'):
+        self.default_intent = default_intent
+        self.intents = [intent for intent, intent_patterns in patterns.items() if intent_patterns]
+        self._priority = {intent: index for index, intent in enumerate(self.intents)}
+
+        alternatives = []
+        for intent in self.intents:
+            body = '|'.join(f'(?:{pattern})' for pattern in patterns[intent])
+            alternatives.append(f'(?P<{intent}>{body})')
+        self._regex = re.compile('(?=' + '|'.join(alternatives) + ')')
+
+    def classify(self, text: str) -> str:
+        """Trả về intent ưu tiên cao nhất khớp với text (đã preprocess)"""
+        best_intent = None
+        best_priority = len(self.intents)
+
+        for match in self._regex.finditer(text):
+            intent = match.lastgroup
+            priority = self._priority[intent]
+            if priority < best_priority:
+                best_intent, best_priority = intent, priority
+                if priority == 0:
+                    break
+
+        return best_intent or self.default_intent
+
+def classify_intent_loop(patterns: Dict[str, List[str]], text: str, default_intent: str = 'default') -> str:
+    """Cách phân loại cũ: re.search từng pattern (dùng để đối chiếu và benchmark)"""
+    for intent, intent_patterns in patterns.items():
+        for pattern in intent_patterns:
+            if re.search(pattern, text):
+                return intent
+    return default_intent
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Chế độ pre-fork cho ShoeMart ChatBot Web API
+Process master nạp config, chatbot (intent pattern đã biên dịch, index trigram, template)
+và catalog snapshot một lần rồi fork N worker dùng chung bộ nhớ đó (copy-on-write).
+Mỗi worker có connection pool riêng, tổng số connection không vượt DB_MAX_CONNECTIONS.
+SIGHUP: restart lần lượt từng worker (nạp lại snapshot), SIGTERM/SIGINT: dừng êm
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import logging
+from typing import Dict, Optional, Tuple
+from werkzeug.serving import make_server
+from catalog_snapshot import CatalogSnapshot
+from database_manager import DatabaseManager, DatabaseService
+from history_store import get_history_writer
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+from shoe_store_web_chatbot import create_app
+from config import DATABASE_CONFIG, SERVER_CONFIG, SNAPSHOT_CONFIG
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def worker_pool_sizes(workers: int) -> Tuple[int, int]:
+    """(pool_size, pool_max_size) của mỗi worker để workers * pool_max_size
+    không vượt max_connections - connection_reserve"""
+    budget = DATABASE_CONFIG['max_connections'] - DATABASE_CONFIG['connection_reserve']
+    per_worker = max(budget // max(workers, 1), 1)
+    if per_worker * workers > budget:
+        logger.warning(f"{workers} workers need at least {workers} connections, budget is {budget}")
+    max_size = min(DATABASE_CONFIG['pool_max_size'], per_worker)
+    return min(DATABASE_CONFIG['pool_size'], max_size), max_size
+
+class PreforkServer:
+    """Master process: giữ socket lắng nghe, fork và giám sát các worker"""
+
+    def __init__(self, workers: int = None, host: str = None, port: int = None, sqlite_path: str = None):
+        self.workers = max(workers or SERVER_CONFIG['workers'], 1)
+        self.host = host or SERVER_CONFIG['host']
+        self.port = port or SERVER_CONFIG['port']
+        self.sqlite_path = sqlite_path  # chạy thử trên file SQLite thay vì MySQL
+        self.graceful_timeout = SERVER_CONFIG['graceful_timeout']
+        self.pool_size, self.pool_max_size = worker_pool_sizes(self.workers)
+        self.chatbot = None
+        self.generation = 0
+        self.restarts = 0
+        self._children = {}       # pid -> (generation, slot)
+        self._retiring = {}       # pid -> thời điểm (monotonic) gửi SIGTERM
+        self._listener = None
+        self._stopping = False
+        self._reload_requested = False
+
+    def _create_db_manager(self) -> DatabaseManager:
+        """DatabaseManager của một thế hệ worker (không mở connection trong master)"""
+        if self.sqlite_path:
+            from sqlite_backend import SQLiteDatabaseManager
+            return SQLiteDatabaseManager(self.sqlite_path, self.pool_size, self.pool_max_size)
+        return DatabaseManager()
+
+    def prepare(self):
+        """Dựng trong master những gì mọi worker dùng chung: chatbot và catalog snapshot
+
+        Connection, thread và socket không sống sót qua fork nên master không mở cái nào:
+        pool được tạo với lazy_connect, chatbot với autostart=False. Mỗi worker nhận
+        một bản copy-on-write của pool rỗng và tự kết nối sau khi fork.
+        """
+        gc.unfreeze()  # object của thế hệ trước được dọn khi không còn dùng
+        DATABASE_CONFIG['lazy_connect'] = True
+        DATABASE_CONFIG['pool_size'] = self.pool_size
+        DATABASE_CONFIG['pool_max_size'] = self.pool_max_size
+
+        db_service = DatabaseService(self._create_db_manager())
+        data = CatalogSnapshot().load() if SNAPSHOT_CONFIG['enabled'] else None
+        if data:
+            db_service.restore_snapshot(data)
+            logger.info(f"Master loaded catalog snapshot ({len(data['products'])} products)")
+        else:
+            logger.warning("No catalog snapshot: each worker loads the catalog from the database")
+        self.chatbot = ShoeMartMySQLChatBot(db_service, autostart=False)
+        self.generation += 1
+
+        # Đưa các object đã dựng ra khỏi GC để việc dọn rác trong worker không ghi vào (và copy) các trang nhớ dùng chung
+        gc.collect()
+        gc.freeze()
+
+    def _open_listener(self) -> socket.socket:
+        """Socket lắng nghe dùng chung cho mọi worker"""
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(socket.SOMAXCONN)
+        listener.set_inheritable(True)
+        return listener
+
+    def serve(self):
+        """Chạy master cho tới khi nhận SIGTERM/SIGINT"""
+        self._listener = self._open_listener()
+        self.prepare()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        logger.info(f"Pre-fork master {os.getpid()} on {self.host}:{self.port}: {self.workers} workers, "
+                    f"pool {self.pool_size}-{self.pool_max_size} connections each")
+
+        try:
+            while True:
+                self._reap()
+                if self._stopping:
+                    if not self._children:
+                        break
+                    self._terminate_all()
+                else:
+                    if self._reload_requested:
+                        self._reload_requested = False
+                        self.prepare()
+                        logger.info(f"Graceful restart: rolling workers to generation {self.generation}")
+                    self._retire_old_generation()
+                    self._spawn_missing()
+                time.sleep(0.1)
+        finally:
+            self._listener.close()
+        logger.info("Pre-fork master stopped")
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _spawn_missing(self):
+        """Fork worker mới cho tới khi đủ số lượng (worker đang dừng vẫn được tính)"""
+        free_slots = sorted(set(range(self.workers)) - {slot for _, slot in self._children.values()})
+        for slot in free_slots:
+            pid = os.fork()
+            if pid == 0:
+                self._run_worker(slot)  # không bao giờ return
+            self._children[pid] = (self.generation, slot)
+
+    def _retire_old_generation(self):
+        """Restart lần lượt: mỗi lúc dừng một worker thế hệ cũ, worker mới được fork khi nó thoát
+        (số worker, và do đó số connection, không vượt giới hạn trong lúc restart)"""
+        if self._retiring:
+            return
+        for pid, (generation, _) in self._children.items():
+            if generation != self.generation:
+                self._signal(pid, signal.SIGTERM)
+                self._retiring[pid] = time.monotonic()
+                self.restarts += 1
+                return
+
+    def _terminate_all(self):
+        """Gửi SIGTERM cho mọi worker, SIGKILL nếu quá graceful_timeout"""
+        now = time.monotonic()
+        for pid in self._children:
+            if pid not in self._retiring:
+                self._signal(pid, signal.SIGTERM)
+                self._retiring[pid] = now
+            elif now - self._retiring[pid] > self.graceful_timeout:
+                logger.warning(f"Worker {pid} did not stop in {self.graceful_timeout}s, killing")
+                self._signal(pid, signal.SIGKILL)
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        """Thu các worker đã thoát; worker chết ngoài ý muốn được _spawn_missing fork lại"""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+            if pid == 0:
+                return
+            self._children.pop(pid, None)
+            expected = self._retiring.pop(pid, None) is not None
+            if not expected:
+                logger.error(f"Worker {pid} exited unexpectedly (status {status}), respawning")
+
+    def _run_worker(self, slot: int):
+        """Thân của process worker: kết nối database rồi phục vụ HTTP trên socket của master"""
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C do master xử lý
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            random.seed()  # không dùng chung trạng thái random với các worker khác
+            if slot == 0 and SNAPSHOT_CONFIG['enabled'] and not self.sqlite_path:
+                # Một worker giữ snapshot mới cho lần khởi động/restart sau
+                self.chatbot.db_service.start_snapshot_writer()
+            self.chatbot.start_warm_up()
+
+            app = create_app(self.chatbot)
+            server = make_server(self.host, self.port, app, threaded=True, fd=self._listener.fileno())
+            # Thread request không phải daemon: server_close() chờ các request đang xử lý xong
+            server.daemon_threads = False
+            server.block_on_close = True
+
+            def shutdown(signum, frame):
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+            signal.signal(signal.SIGTERM, shutdown)
+            logger.info(f"Worker {os.getpid()} (slot {slot}, generation {self.generation}) serving")
+            try:
+                server.serve_forever()
+            finally:
+                server.server_close()
+                self.chatbot.db_service.close_connections()
+                writer = get_history_writer()
+                if writer:
+                    writer.stop()
+            logger.info(f"Worker {os.getpid()} stopped")
+        except BaseException as e:
+            logger.error(f"Worker {os.getpid()} failed: {e}")
+            exit_code = 1
+        finally:
+            # Không quay lại vòng lặp của master trong process con
+            os._exit(exit_code)
+
+    def stats(self) -> Dict[str, object]:
+        """Trạng thái master"""
+        return {
+            'workers': self.workers,
+            'alive': len(self._children),
+            'generation': self.generation,
+            'restarts': self.restarts,
+            'pool_size': self.pool_size,
+            'pool_max_size': self.pool_max_size
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="ShoeMart ChatBot Web API chế độ pre-fork")
+    parser.add_argument('--workers', type=int, help="Số worker process (mặc định API_WORKERS)")
+    parser.add_argument('--host', help="Địa chỉ lắng nghe (mặc định API_HOST)")
+    parser.add_argument('--port', type=int, help="Cổng (mặc định API_PORT)")
+    parser.add_argument('--sqlite', help="Chạy thử trên file SQLite thay vì MySQL")
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        print("❌ Chế độ pre-fork cần os.fork (Linux/macOS); dùng shoe_store_web_chatbot.py")
+        sys.exit(1)
+    PreforkServer(args.workers, args.host, args.port, args.sqlite).serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Record gọn cho kết quả truy vấn của ShoeMart ChatBot
+ProductRow/OrderRow giữ mỗi cột trong một slot (không có dict riêng cho từng dòng),
+được dựng thẳng từ tuple của cursor và vẫn truy cập như dict (row['Name'], row.get(...), dict(row))
+"""
+
+import logging
+from collections.abc import Mapping
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class Record(Mapping):
+    """Dòng kết quả với tập cột cố định (__slots__ của lớp con)
+
+    Cột không có trong result set thì slot để trống và không xuất hiện như một khóa,
+    nên get_popular_products (không có Description) vẫn trả default của row.get(...).
+    """
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(cls.__slots__)
+        cls._field_set = frozenset(cls.__slots__)
+        cls._layouts = {}  # tuple tên cột -> setter của từng slot (None nếu có cột lạ)
+
+    @classmethod
+    def layout(cls, columns: Sequence[str]) -> Optional[Tuple]:
+        """Setter theo thứ tự cột của result set, None nếu record không chứa hết các cột"""
+        columns = tuple(columns)
+        try:
+            return cls._layouts[columns]
+        except KeyError:
+            setters = None
+            if cls._field_set.issuperset(columns):
+                setters = tuple(getattr(cls, name).__set__ for name in columns)
+            cls._layouts[columns] = setters
+            return setters
+
+    @classmethod
+    def from_values(cls, setters: Tuple, values: Sequence) -> 'Record':
+        """Dựng record từ tuple giá trị theo layout đã tính"""
+        record = cls.__new__(cls)
+        for setter, value in zip(setters, values):
+            setter(record, value)
+        return record
+
+    @classmethod
+    def from_rows(cls, columns: Sequence[str], rows: Iterable[Sequence]) -> Optional[List['Record']]:
+        """Dựng record cho cả result set (None nếu result set có cột ngoài record)"""
+        setters = cls.layout(columns)
+        if setters is None:
+            return None
+        from_values = cls.from_values
+        return [from_values(setters, values) for values in rows]
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> 'Record':
+        """Chuyển một dòng dạng dict (snapshot, aiomysql...) sang record, bỏ qua cột lạ"""
+        record = cls.__new__(cls)
+        for name, value in mapping.items():
+            if name in cls._field_set:
+                setattr(record, name, value)
+        return record
+
+    @classmethod
+    def coerce_all(cls, rows: Iterable[Mapping]) -> List['Record']:
+        """Danh sách record từ các dòng bất kỳ, giữ nguyên dòng đã đúng kiểu"""
+        return [row if type(row) is cls else cls.from_mapping(row) for row in rows]
+
+    def __getitem__(self, key):
+        if key in self._field_set:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            return getattr(self, key, default)
+        return default
+
+    def __contains__(self, key) -> bool:
+        return key in self._field_set and hasattr(self, key)
+
+    def __iter__(self):
+        return (name for name in self._fields if hasattr(self, name))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+class ProductRow(Record):
+    """Một sản phẩm (Products, kèm SoldCount của get_popular_products)"""
+
+    __slots__ = ('Id', 'Name', 'Description', 'Price', 'ImageUrl', 'Category', 'SoldCount')
+
+class OrderRow(Record):
+    """Một dòng đơn hàng của get_user_orders (đơn hàng + một OrderItem)"""
+
+    __slots__ = ('Id', 'OrderDate', 'TotalAmount', 'PaymentMethod', 'Status',
+                 'ProductId', 'Quantity', 'Price', 'ProductName')
+
+# Kiểu record của từng query trong SQL_QUERIES (query không có ở đây trả về ResultRow)
+QUERY_ROW_TYPES = {
+    'get_all_products': ProductRow,
+    'get_products_by_category': ProductRow,
+    'search_products_by_name': ProductRow,
+    'get_products_page': ProductRow,
+    'get_products_page_after': ProductRow,
+    'get_products_by_category_page': ProductRow,
+    'get_products_by_category_page_after': ProductRow,
+    'get_products_by_price_range_page': ProductRow,
+    'get_products_by_price_range_page_after': ProductRow,
+    'filter_products_page': ProductRow,
+    'filter_products_page_after': ProductRow,
+    'filter_products': ProductRow,
+    'get_product_by_id': ProductRow,
+    'get_products_by_price_range': ProductRow,
+    'get_popular_products': ProductRow,
+    'get_user_orders': OrderRow
+}
+
+class ProductView(Mapping):
+    """Sản phẩm đã format để hiển thị (khóa chữ thường như format_product trước đây)
+
+    Đọc thẳng từ dòng gốc thay vì copy sang dict mới; dict(view) khi cần JSON.
+    """
+
+    __slots__ = ('row', 'formatted_price')
+
+    # khóa hiển thị -> (cột gốc, giá trị mặc định); formatted_price được tính sẵn
+    COLUMNS = {
+        'id': ('Id', None),
+        'name': ('Name', ''),
+        'description': ('Description', ''),
+        'price': ('Price', 0),
+        'category': ('Category', ''),
+        'image_url': ('ImageUrl', '')
+    }
+    KEYS = ('id', 'name', 'description', 'price', 'formatted_price', 'category', 'image_url')
+
+    def __init__(self, row: Mapping, formatted_price: str):
+        self.row = row
+        self.formatted_price = formatted_price
+
+    def __getitem__(self, key):
+        if key == 'formatted_price':
+            return self.formatted_price
+        column, default = self.COLUMNS[key]
+        return self.row.get(column, default)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
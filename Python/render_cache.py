@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Cache chuỗi đã render cho ShoeMart ChatBot
+Fragment của từng sản phẩm và nguyên trang trả lời được gắn với phiên bản catalog
+(ProductCatalogCache.version): catalog đổi thì cache tự xóa ở lần truy cập sau
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class RenderCache:
+    """LRU chuỗi đã render, khóa thực tế là (phiên bản catalog, key)
+
+    Chỉ giữ entry của một phiên bản: gặp phiên bản khác thì xóa sạch thay vì
+    để entry cũ nằm chờ bị đẩy ra. version None nghĩa là không cache.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.resets = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync_version_locked(self, version: int):
+        """Xóa toàn bộ entry khi catalog đổi phiên bản (gọi khi đang giữ lock)"""
+        if version != self.version:
+            if self._entries:
+                self.resets += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, version: Optional[int], key: Hashable) -> Optional[Any]:
+        """Lấy giá trị đã render (None nếu chưa có hoặc không cache được)"""
+        if version is None or self.max_entries <= 0:
+            return None
+        with self._lock:
+            self._sync_version_locked(version)
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, version: Optional[int], key: Hashable, value: Any):
+        """Lưu giá trị đã render cho phiên bản catalog version"""
+        if version is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._sync_version_locked(version)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        with self._lock:
+            self._entries.clear()
+            self.version = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'version': self.version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'resets': self.resets,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0
+        }
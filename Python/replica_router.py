@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Định tuyến đọc tới read replica cho ShoeMart ChatBot
+Chọn replica theo round-robin hoặc latency thấp nhất, loại replica lỗi liên tiếp
+và thử lại (probe) ở thread nền sau replica_retry_interval giây
+"""
+
+import threading
+import time
+import logging
+from typing import List, Dict, Any, Callable, Optional
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('round_robin', 'least_latency')
+
+class Replica:
+    """Một read replica: pool riêng và trạng thái sức khỏe"""
+
+    def __init__(self, name: str, pool):
+        self.name = name
+        self.pool = pool
+        self.healthy = True
+        self.failures = 0       # số lỗi liên tiếp
+        self.retry_at = 0.0     # thời điểm (monotonic) được probe lại khi đã bị loại
+        self.probing = False
+        self.latency = None     # EWMA latency đọc (giây)
+        self.reads = 0
+        self.errors = 0
+        self.ejections = 0
+        self.recoveries = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái của replica"""
+        return {
+            'name': self.name,
+            'healthy': self.healthy,
+            'failures': self.failures,
+            'reads': self.reads,
+            'errors': self.errors,
+            'ejections': self.ejections,
+            'recoveries': self.recoveries,
+            'latency_ms': round(self.latency * 1000, 3) if self.latency is not None else None,
+            'pool': {'size': self.pool.size, 'in_use': self.pool.in_use}
+        }
+
+class ReplicaRouter:
+    """Chọn replica cho mỗi lần đọc; None khi không còn replica khỏe (đọc từ primary)
+
+    probe(replica) -> bool kiểm tra một replica đã bị loại (vd. SELECT 1).
+    """
+
+    LATENCY_WEIGHT = 0.2  # trọng số của lần đo mới trong EWMA
+
+    def __init__(self, replicas: List[Replica], probe: Callable[[Replica], bool],
+                 strategy: str = 'round_robin', max_failures: int = 3, retry_interval: float = 30.0):
+        if strategy not in STRATEGIES:
+            logger.warning(f"Unknown replica strategy '{strategy}', using round_robin")
+            strategy = 'round_robin'
+        self.replicas = list(replicas)
+        self.probe = probe
+        self.strategy = strategy
+        self.max_failures = max(max_failures, 1)
+        self.retry_interval = retry_interval
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def choose(self) -> Optional[Replica]:
+        """Replica cho lần đọc tiếp theo"""
+        now = time.monotonic()
+        with self._lock:
+            healthy = []
+            for replica in self.replicas:
+                if replica.healthy:
+                    healthy.append(replica)
+                elif not replica.probing and now >= replica.retry_at:
+                    replica.probing = True
+                    threading.Thread(target=self._probe, args=(replica,), daemon=True,
+                                     name=f"replica-probe-{replica.name}").start()
+            if not healthy:
+                return None
+            if self.strategy == 'least_latency':
+                # Replica chưa có số đo được thử trước
+                return min(healthy, key=lambda replica: replica.latency or 0.0)
+            replica = healthy[self._next % len(healthy)]
+            self._next += 1
+            return replica
+
+    def record_success(self, replica: Replica, seconds: float):
+        """Ghi nhận một lần đọc thành công"""
+        with self._lock:
+            replica.reads += 1
+            replica.failures = 0
+            if replica.latency is None:
+                replica.latency = seconds
+            else:
+                replica.latency += self.LATENCY_WEIGHT * (seconds - replica.latency)
+
+    def record_failure(self, replica: Replica, error: Exception):
+        """Ghi nhận lỗi; đủ max_failures lỗi liên tiếp thì loại replica"""
+        with self._lock:
+            replica.errors += 1
+            replica.failures += 1
+            if replica.healthy and replica.failures >= self.max_failures:
+                self._eject_locked(replica)
+                logger.warning(f"Replica {replica.name} ejected after {replica.failures} failures: {error}")
+
+    def eject(self, replica: Replica):
+        """Loại replica ngay (vd. không kết nối được lúc khởi động)"""
+        with self._lock:
+            if replica.healthy:
+                self._eject_locked(replica)
+
+    def _eject_locked(self, replica: Replica):
+        replica.healthy = False
+        replica.ejections += 1
+        replica.retry_at = time.monotonic() + self.retry_interval
+
+    def _probe(self, replica: Replica):
+        """Thử lại replica đã bị loại (chạy ở thread nền)"""
+        try:
+            ok = self.probe(replica)
+        except Exception as e:
+            logger.debug(f"Replica {replica.name} probe failed: {e}")
+            ok = False
+        with self._lock:
+            replica.probing = False
+            if ok:
+                replica.healthy = True
+                replica.failures = 0
+                replica.latency = None
+                replica.recoveries += 1
+            else:
+                replica.retry_at = time.monotonic() + self.retry_interval
+        if ok:
+            logger.info(f"Replica {replica.name} is healthy again")
+
+    def close(self):
+        """Đóng pool của các replica"""
+        for replica in self.replicas:
+            replica.pool.close_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê định tuyến"""
+        return {
+            'strategy': self.strategy,
+            'healthy': sum(1 for replica in self.replicas if replica.healthy),
+            'replicas': [replica.stats() for replica in self.replicas]
+        }
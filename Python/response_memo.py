@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Memo câu trả lời cho ShoeMart ChatBot
+Lưu câu trả lời theo tin nhắn đã chuẩn hóa để câu hỏi lặp lại (chào, help, liên hệ,
+sản phẩm bán chạy...) bỏ qua toàn bộ get_response kể cả phân loại intent.
+TTL theo intent: intent tĩnh không hết hạn, intent cần database hết hạn sau vài giây
+và bị xóa khi catalog đổi phiên bản hoặc có câu lệnh ghi
+"""
+
+import random
+import re
+import threading
+import time
+import unicodedata
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Union, Tuple
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# Dấu câu ở hai đầu không đổi ý nghĩa câu hỏi ("xin chào!" = "xin chào")
+EDGE_PUNCTUATION = ' ?!.,;:…~'
+
+def normalize_message(text: str) -> str:
+    """Chữ thường, NFC, gộp khoảng trắng và bỏ dấu câu ở hai đầu (giữ dấu tiếng Việt)"""
+    text = unicodedata.normalize('NFC', text).lower()
+    return WHITESPACE_PATTERN.sub(' ', text).strip(EDGE_PUNCTUATION)
+
+class ResponseMemo:
+    """LRU câu trả lời theo tin nhắn đã chuẩn hóa
+
+    Giá trị là một chuỗi, hoặc tuple các biến thể (intent tĩnh) để mỗi lần trúng cache
+    vẫn chọn ngẫu nhiên như static_response. ttls: intent -> giây, None = không hết hạn;
+    intent không có trong ttls không được memo. Entry có TTL gắn với phiên bản catalog
+    và thế hệ ghi (on_write) lúc lưu.
+    """
+
+    def __init__(self, max_entries: int, ttls: Dict[str, Optional[float]]):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.generation = 0  # tăng sau mỗi câu lệnh ghi
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.hits_by_intent = {}
+        self._entries = OrderedDict()  # tin nhắn chuẩn hóa -> (intent, giá trị, hết hạn, phiên bản catalog, thế hệ)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def is_cacheable(self, intent: str) -> bool:
+        """Intent có được memo hay không"""
+        return intent in self.ttls
+
+    def is_static(self, intent: str) -> bool:
+        """Intent không phụ thuộc database (không hết hạn, không bị xóa khi ghi)"""
+        return intent in self.ttls and self.ttls[intent] is None
+
+    def get(self, message: str, catalog_version: Optional[int] = None) -> Optional[str]:
+        """Câu trả lời đã memo (khớp nguyên văn trước, sau đó theo dạng chuẩn hóa)"""
+        with self._lock:
+            key = message
+            entry = self._entries.get(key)
+            exact = entry is not None
+            if entry is None:
+                key = normalize_message(message)
+                entry = self._entries.get(key) if key != message else None
+            if entry is None:
+                self.misses += 1
+                return None
+
+            intent, value, expires_at, version, generation = entry
+            if expires_at is not None and (expires_at <= time.monotonic() or version != catalog_version
+                                           or generation != self.generation):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if exact:
+                self.exact_hits += 1
+            else:
+                self.normalized_hits += 1
+            self.hits_by_intent[intent] = self.hits_by_intent.get(intent, 0) + 1
+        return self.resolve(value)
+
+    def put(self, message: str, intent: str, value: Union[str, Tuple[str, ...]],
+            catalog_version: Optional[int] = None):
+        """Lưu câu trả lời cho intent (bỏ qua nếu intent không được memo)"""
+        if intent not in self.ttls or self.max_entries <= 0:
+            return
+        ttl = self.ttls[intent]
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            key = normalize_message(message)
+            self._entries[key] = (intent, value, expires_at, catalog_version, self.generation)
+            self._entries.move_to_end(key)
+            self.stores += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @staticmethod
+    def resolve(value: Union[str, Tuple[str, ...]]) -> str:
+        """Câu trả lời thực tế: chọn ngẫu nhiên một biến thể nếu value là tuple"""
+        return random.choice(value) if isinstance(value, tuple) else value
+
+    def on_write(self, query: str):
+        """Write listener: mọi câu trả lời cần database lưu trước đó đều hết hiệu lực"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+
+    def clear(self):
+        """Xóa toàn bộ memo"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss"""
+        hits = self.exact_hits + self.normalized_hits
+        total = hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'exact_hits': self.exact_hits,
+            'normalized_hits': self.normalized_hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'hits_by_intent': dict(self.hits_by_intent),
+            'hit_ratio': round(hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Materialized sales aggregates cho ShoeMart ChatBot
+Giữ thống kê doanh thu theo danh mục và số lượng bán theo sản phẩm trong bộ nhớ,
+cập nhật tăng dần từ các dòng OrderItems mới thay vì GROUP BY toàn bộ lịch sử
+"""
+
+import heapq
+import threading
+import time
+import logging
+from typing import List, Dict, Any, Optional
+from config import SQL_QUERIES, AGGREGATE_CONFIG, TABLES
+from records import ProductRow
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+COMPLETED_STATUS = 'Completed'
+
+class SalesAggregates:
+    """Aggregate tương đương get_sales_stats / get_popular_products, refresh theo high-water mark
+
+    high_water_mark là OrderItems.Id lớn nhất đã xử lý. Item của đơn chưa
+    Completed được ghi nhớ theo đơn hàng (pending) và được cộng vào khi đơn
+    chuyển sang Completed; đơn ở trạng thái kết thúc (terminal_statuses, vd. Cancelled)
+    không được ghi nhớ, đơn pending chuyển sang trạng thái đó bị bỏ khỏi danh sách.
+    Định kỳ rebuild toàn bộ để bắt các thay đổi khác (đơn bị hủy sau khi hoàn thành,
+    sản phẩm đổi danh mục...).
+    """
+
+    def __init__(self, db_manager, refresh_interval: int = None, full_refresh_interval: int = None,
+                 batch_size: int = None):
+        self.db = db_manager
+        self.refresh_interval = AGGREGATE_CONFIG['refresh_interval'] if refresh_interval is None else refresh_interval
+        self.full_refresh_interval = (AGGREGATE_CONFIG['full_refresh_interval']
+                                      if full_refresh_interval is None else full_refresh_interval)
+        self.batch_size = batch_size or AGGREGATE_CONFIG['batch_size']
+        self.terminal_statuses = frozenset(AGGREGATE_CONFIG['terminal_statuses'])
+        self.high_water_mark = 0
+        self.incremental_refreshes = 0
+        self.full_refreshes = 0
+        self.rows_applied = 0
+        self._category_stats = {}   # Category -> {'Category', 'TotalSold', 'Revenue'}
+        self._product_stats = {}    # ProductId -> {'Id', 'Name', 'Category', 'Price', 'SoldCount'}
+        self._pending_orders = {}   # OrderId -> OrderItems.Id lớn nhất đã thấy khi đơn chưa Completed
+        self._refreshed_at = None
+        self._full_refreshed_at = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self.db.add_write_listener(self._on_write)
+
+    def _on_write(self, query: str):
+        """Đánh dấu cần refresh khi có ghi vào Orders/OrderItems"""
+        lowered = query.lower()
+        if TABLES['orders'].lower() in lowered or TABLES['order_items'].lower() in lowered:
+            self._stale = True
+
+    def _reset(self):
+        """Xóa toàn bộ aggregate"""
+        self.high_water_mark = 0
+        self._category_stats = {}
+        self._product_stats = {}
+        self._pending_orders = {}
+
+    def _apply(self, row: Dict[str, Any]):
+        """Cộng một dòng OrderItems (đơn đã Completed) vào aggregate"""
+        category = row['Category']
+        category_stat = self._category_stats.get(category)
+        if category_stat is None:
+            category_stat = self._category_stats[category] = {'Category': category, 'TotalSold': 0, 'Revenue': 0}
+        category_stat['TotalSold'] += 1
+        category_stat['Revenue'] += row['Price'] * row['Quantity']
+
+        product_id = row['ProductId']
+        product_stat = self._product_stats.get(product_id)
+        if product_stat is None:
+            product_stat = self._product_stats[product_id] = {'Id': product_id, 'SoldCount': 0}
+        # Luôn giữ thông tin sản phẩm mới nhất như khi JOIN Products
+        product_stat['Name'] = row['Name']
+        product_stat['Category'] = category
+        product_stat['Price'] = row['ProductPrice']
+        product_stat['SoldCount'] += 1
+        self.rows_applied += 1
+
+    def _consume_new_items(self):
+        """Đọc các OrderItems có Id > high_water_mark theo từng batch"""
+        while True:
+            rows = self.db.execute_query(
+                SQL_QUERIES['get_order_items_since'],
+                (self.high_water_mark, self.batch_size),
+                query_name='get_order_items_since'
+            )
+            for row in rows:
+                if row['Status'] == COMPLETED_STATUS:
+                    self._apply(row)
+                elif row['Status'] not in self.terminal_statuses:
+                    self._pending_orders[row['OrderId']] = row['Id']
+                self.high_water_mark = max(self.high_water_mark, row['Id'])
+            if len(rows) < self.batch_size:
+                break
+
+    def _resolve_pending_orders(self):
+        """Cộng item của các đơn pending vừa chuyển sang Completed, bỏ các đơn đã kết thúc (vd. bị hủy)"""
+        if not self._pending_orders:
+            return
+
+        order_ids = list(self._pending_orders)
+        statuses = (COMPLETED_STATUS,) + tuple(self.terminal_statuses)
+        for start in range(0, len(order_ids), self.batch_size):
+            chunk = order_ids[start:start + self.batch_size]
+            query = SQL_QUERIES['get_resolved_order_items'].format(
+                statuses=', '.join(['%s'] * len(statuses)),
+                order_ids=', '.join(['%s'] * len(chunk))
+            )
+            rows = self.db.execute_query(query, statuses + tuple(chunk), query_name='get_resolved_order_items')
+            resolved = set()
+            for row in rows:
+                # Chỉ cộng item đã thấy lúc pending, item mới hơn do _consume_new_items xử lý
+                if row['Status'] == COMPLETED_STATUS and row['Id'] <= self._pending_orders[row['OrderId']]:
+                    self._apply(row)
+                resolved.add(row['OrderId'])
+            for order_id in resolved:
+                del self._pending_orders[order_id]
+
+    def refresh(self, full: bool = False):
+        """Cập nhật aggregate (tăng dần, hoặc rebuild toàn bộ khi full=True)"""
+        with self._lock:
+            now = time.monotonic()
+            if full or self._full_refreshed_at is None or now - self._full_refreshed_at >= self.full_refresh_interval:
+                if self._category_stats and not self.db.test_connection():
+                    # Không rebuild từ kết quả rỗng khi DB lỗi, giữ số liệu hiện có
+                    logger.warning("Database unreachable, keeping current sales aggregates")
+                    self._refreshed_at = now
+                    return
+                self._reset()
+                self._consume_new_items()
+                self._full_refreshed_at = now
+                self.full_refreshes += 1
+                logger.info(f"Sales aggregates rebuilt up to OrderItems.Id {self.high_water_mark}")
+            else:
+                self._resolve_pending_orders()
+                self._consume_new_items()
+                self.incremental_refreshes += 1
+            self._refreshed_at = now
+            self._stale = False
+
+    def _ensure_fresh(self):
+        """Refresh nếu có ghi mới hoặc đã quá refresh_interval"""
+        if (self._stale or self._refreshed_at is None
+                or time.monotonic() - self._refreshed_at >= self.refresh_interval):
+            self.refresh()
+
+    def get_sales_statistics(self) -> List[Dict[str, Any]]:
+        """Thống kê theo danh mục, cùng định dạng với query get_sales_stats"""
+        self._ensure_fresh()
+        with self._lock:
+            stats = [dict(stat) for stat in self._category_stats.values()]
+        return sorted(stats, key=lambda stat: stat['Revenue'], reverse=True)
+
+    def get_popular_products(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Sản phẩm bán chạy, cùng định dạng với query get_popular_products"""
+        self._ensure_fresh()
+        with self._lock:
+            top = heapq.nlargest(limit, self._product_stats.values(), key=lambda stat: stat['SoldCount'])
+            return [ProductRow.from_mapping(stat) for stat in top]
+
+    def export_state(self) -> Dict[str, Any]:
+        """Trạng thái đầy đủ (đã refresh) để ghi snapshot"""
+        self._ensure_fresh()
+        with self._lock:
+            return {
+                'high_water_mark': self.high_water_mark,
+                'category_stats': [dict(stat) for stat in self._category_stats.values()],
+                'product_stats': [dict(stat) for stat in self._product_stats.values()],
+                'pending_orders': dict(self._pending_orders)
+            }
+
+    def restore(self, state: Dict[str, Any], refresh: bool = True):
+        """Nạp lại trạng thái từ snapshot
+
+        refresh=True: lần truy cập sau refresh tăng dần từ high_water_mark của snapshot.
+        refresh=False (offline): dùng nguyên số liệu snapshot, không truy vấn database.
+        """
+        with self._lock:
+            self.high_water_mark = state['high_water_mark']
+            self._category_stats = {stat['Category']: dict(stat) for stat in state['category_stats']}
+            self._product_stats = {stat['Id']: dict(stat) for stat in state['product_stats']}
+            self._pending_orders = dict(state['pending_orders'])
+            now = time.monotonic()
+            self._full_refreshed_at = now
+            if refresh:
+                self._stale = True
+            else:
+                self._refreshed_at = now
+                self._stale = False
+                self.refresh_interval = float('inf')
+        logger.info(f"Sales aggregates restored up to OrderItems.Id {self.high_water_mark}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Trạng thái aggregate"""
+        return {
+            'high_water_mark': self.high_water_mark,
+            'categories': len(self._category_stats),
+            'products': len(self._product_stats),
+            'pending_orders': len(self._pending_orders),
+            'rows_applied': self.rows_applied,
+            'incremental_refreshes': self.incremental_refreshes,
+            'full_refreshes': self.full_refreshes
+        }
@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Inverted index cho tìm kiếm sản phẩm ShoeMart
+Thay thế truy vấn LIKE '%term%' bằng tra cứu token trong bộ nhớ,
+kèm index trigram để khớp từ gõ sai ("addidas" -> "adidas")
+"""
+
+import bisect
+import re
+import unicodedata
+from collections import Counter
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+# Các từ nối dùng để chuyển sang chế độ OR ("nike hoặc adidas", "nike or adidas")
+OR_OPERATORS = {'or', 'hoac'}
+
+# Trọng số mặc định cho các cột của bảng Products
+DEFAULT_FIELD_WEIGHTS = {
+    'Name': 3.0,
+    'Category': 2.0,
+    'Description': 1.0
+}
+
+# Điểm cộng khi token khớp cả dấu tiếng Việt (vd. "giày" khớp "giày" thay vì "giay")
+EXACT_MATCH_BONUS = 0.5
+
+# Khớp gần đúng (trigram): ngưỡng độ tương đồng Dice và số ứng viên tối đa được chấm điểm
+DEFAULT_MIN_SIMILARITY = 0.6
+DEFAULT_MAX_CANDIDATES = 32
+# Hệ số điểm của token khớp gần đúng (nhân với độ tương đồng), thấp hơn khớp prefix
+FUZZY_MATCH_FACTOR = 0.5
+# Khớp chặt (strict, cho từ khóa dùng để định tuyến): chênh lệch độ dài tối đa (tỉ lệ theo độ dài term,
+# ít nhất 1 ký tự), term ngắn từ SHORT_TERM_LENGTH ký tự trở xuống cần độ tương đồng cao hơn
+STRICT_LENGTH_TOLERANCE = 0.2
+SHORT_TERM_LENGTH = 5
+DEFAULT_SHORT_TERM_SIMILARITY = 0.7
+
+def fold_diacritics(text: str) -> str:
+    """Bỏ dấu tiếng Việt: 'giày thể thao' -> 'giay the thao'"""
+    text = text.replace('đ', 'd').replace('Đ', 'D')
+    decomposed = unicodedata.normalize('NFD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+def tokenize(text: str) -> List[str]:
+    """Tách text thành các token chữ thường (giữ dấu)"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(unicodedata.normalize('NFC', str(text).lower()))
+
+def trigrams(term: str) -> set:
+    """Tập trigram của term, thêm khoảng trắng ở hai đầu như pg_trgm ('nike' -> '  n', ' ni', 'nik', 'ike', 'ke ')"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a: str, b: str) -> float:
+    """Độ tương đồng Dice trên trigram của hai từ"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    return 2.0 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+class TrigramIndex:
+    """Index trigram trên một tập từ/cụm từ cố định để tìm từ gần đúng nhất
+
+    Posting của mỗi trigram được sắp theo số trigram của term, nên mỗi lần tra chỉ
+    đếm các term có độ dài đủ gần để đạt min_similarity; sau đó chỉ chấm điểm
+    max_candidates term chung nhiều trigram nhất.
+
+    strict=True (từ khóa định tuyến như thương hiệu/danh mục): term còn phải có độ dài gần
+    với từ cần tra, cùng ký tự đầu, và term ngắn cần đạt short_term_similarity
+    ("pumpkin" không khớp "pump", "thanh toan" không khớp "the thao").
+    """
+
+    def __init__(self, terms: Iterable[str] = (), min_similarity: float = DEFAULT_MIN_SIMILARITY,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES, min_length: int = 3, fold: bool = True,
+                 strict: bool = False, short_term_similarity: float = DEFAULT_SHORT_TERM_SIMILARITY):
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self.min_length = min_length  # từ ngắn hơn không được khớp gần đúng
+        self.fold = fold              # bỏ dấu cả term lẫn từ cần tra
+        self.strict = strict
+        self.short_term_similarity = max(short_term_similarity, min_similarity)
+        self._terms = []              # term gốc theo id
+        self._normalized = []         # term đã chuẩn hóa theo id
+        self._sizes = []              # số trigram của từng term
+        self._postings = {}           # trigram -> (số trigram tăng dần, id term)
+        self._word_counts = ()        # số từ của các term (cho find)
+        self.build(terms)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def normalize(self, text: str) -> str:
+        """Chữ thường, tách token, bỏ dấu nếu fold ('Flip-Flop' -> 'flip flop')"""
+        text = ' '.join(tokenize(text))
+        return fold_diacritics(text) if self.fold else text
+
+    def build(self, terms: Iterable[str]):
+        """Xây dựng lại index"""
+        entries = {}
+        for term in terms:
+            normalized = self.normalize(term)
+            if normalized:
+                entries.setdefault(normalized, term)
+
+        originals, normalized_terms, sizes, grouped, word_counts = [], [], [], {}, set()
+        for term_id, (normalized, term) in enumerate(entries.items()):
+            grams = trigrams(normalized)
+            originals.append(term)
+            normalized_terms.append(normalized)
+            sizes.append(len(grams))
+            word_counts.add(normalized.count(' ') + 1)
+            for gram in grams:
+                grouped.setdefault(gram, []).append((len(grams), term_id))
+
+        postings = {}
+        for gram, items in grouped.items():
+            items.sort()
+            postings[gram] = ([size for size, _ in items], [term_id for _, term_id in items])
+
+        # Gán một lần để các thread đang đọc luôn thấy index nhất quán
+        self._terms, self._normalized, self._sizes, self._postings = originals, normalized_terms, sizes, postings
+        self._word_counts = tuple(sorted(word_counts))
+
+    def _lookup(self, normalized: str, limit: int) -> List[Tuple[str, float, int]]:
+        """(term gốc, độ tương đồng, số từ của term) của các term gần normalized nhất"""
+        if len(normalized) < self.min_length:
+            return []
+        grams = trigrams(normalized)
+        size = len(grams)
+        # Dice = 2 * chung / (size + n) >= s chỉ có thể khi n nằm trong [low, high]
+        similarity = self.min_similarity
+        low = size * similarity / (2 - similarity)
+        high = size * (2 - similarity) / similarity if similarity else float('inf')
+        counts = Counter()
+        postings = self._postings
+        for gram in grams:
+            entry = postings.get(gram)
+            if entry is not None:
+                sizes, ids = entry
+                counts.update(ids[bisect.bisect_left(sizes, low):bisect.bisect_right(sizes, high)])
+
+        terms, normalized_terms, term_sizes = self._terms, self._normalized, self._sizes
+        matches = []
+        for term_id, shared in counts.most_common(self.max_candidates):
+            score = 2.0 * shared / (size + term_sizes[term_id])
+            if score >= similarity and (not self.strict or self._strict_match(normalized, normalized_terms[term_id], score)):
+                matches.append((score, term_id))
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return [(terms[term_id], score, normalized_terms[term_id].count(' ') + 1)
+                for score, term_id in matches[:limit]]
+
+    def _strict_match(self, normalized: str, term: str, score: float) -> bool:
+        """Điều kiện thêm của chế độ strict: cùng ký tự đầu, độ dài gần nhau, term ngắn cần điểm cao hơn;
+        term nhiều từ thì từng cặp từ cũng phải gần nhau ("toan the" không khớp "the thao")"""
+        if normalized[0] != term[0]:
+            return False
+        if abs(len(normalized) - len(term)) > max(1, int(len(term) * STRICT_LENGTH_TOLERANCE)):
+            return False
+        if len(term) <= SHORT_TERM_LENGTH and score < self.short_term_similarity:
+            return False
+        words, term_words = normalized.split(), term.split()
+        if len(term_words) > 1:
+            for word, term_word in zip(words, term_words):
+                if word == term_word:
+                    continue
+                if word[0] != term_word[0] or dice(word, term_word) < self.min_similarity:
+                    return False
+        return True
+
+    def lookup(self, term: str, limit: int = 3) -> List[Tuple[str, float]]:
+        """Tối đa limit term gần term nhất (độ tương đồng giảm dần, 1.0 = trùng khớp)"""
+        return [(match, score) for match, score, _ in self._lookup(self.normalize(term), limit)]
+
+    def find(self, text: str) -> Optional[Tuple[str, float]]:
+        """Term khớp tốt nhất với một cụm từ liên tiếp trong text (cùng số từ với term)"""
+        words = self.normalize(text).split()
+        best = None
+        for count in self._word_counts:
+            for start in range(len(words) - count + 1):
+                window = ' '.join(words[start:start + count])
+                for term, score, term_words in self._lookup(window, self.max_candidates):
+                    if term_words == count and (best is None or score > best[1]):
+                        best = (term, score)
+                        break
+        return best
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê kích thước index"""
+        return {
+            'terms': len(self._terms),
+            'trigrams': len(self._postings)
+        }
+
+class ProductSearchIndex:
+    """Inverted index trên Name, Description, Category của sản phẩm
+
+    Từ khóa không khớp token nào (kể cả prefix) được thay bằng các token gần đúng
+    của index trigram trên từ vựng (fuzzy=False để tắt).
+    """
+
+    def __init__(self, products: Optional[Iterable[Dict[str, Any]]] = None,
+                 field_weights: Optional[Dict[str, float]] = None,
+                 name_field: str = 'Name', fuzzy: bool = True,
+                 min_similarity: float = DEFAULT_MIN_SIMILARITY,
+                 max_candidates: int = DEFAULT_MAX_CANDIDATES):
+        self.field_weights = field_weights or DEFAULT_FIELD_WEIGHTS
+        self.name_field = name_field
+        self.fuzzy = fuzzy
+        self.min_similarity = min_similarity
+        self.max_candidates = max_candidates
+        self._products = []
+        self._postings = {}       # token không dấu -> {vị trí sản phẩm: điểm}
+        self._exact_postings = {} # token có dấu -> set(vị trí sản phẩm)
+        self._vocabulary = []     # danh sách token không dấu đã sắp xếp (tra prefix)
+        self._trigrams = None     # TrigramIndex trên từ vựng không dấu
+        if products is not None:
+            self.build(products)
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def build(self, products: Iterable[Dict[str, Any]]):
+        """Xây dựng lại index từ danh sách sản phẩm"""
+        products = list(products)
+        postings = {}
+        exact_postings = {}
+
+        for position, product in enumerate(products):
+            for field, weight in self.field_weights.items():
+                for token in tokenize(product.get(field) or ''):
+                    folded = fold_diacritics(token)
+                    scores = postings.setdefault(folded, {})
+                    scores[position] = scores.get(position, 0.0) + weight
+                    exact_postings.setdefault(token, set()).add(position)
+
+        vocabulary = sorted(postings)
+        fuzzy_index = None
+        if self.fuzzy:
+            fuzzy_index = TrigramIndex(vocabulary, self.min_similarity, self.max_candidates, fold=False)
+
+        # Gán một lần để các thread đang đọc luôn thấy index nhất quán
+        self._products, self._postings, self._exact_postings = products, postings, exact_postings
+        self._vocabulary, self._trigrams = vocabulary, fuzzy_index
+
+    def _expand_prefix(self, folded_term: str) -> List[str]:
+        """Các token trong index bắt đầu bằng folded_term ('sneak' -> 'sneaker', 'sneakers')"""
+        vocabulary = self._vocabulary
+        start = bisect.bisect_left(vocabulary, folded_term)
+        end = bisect.bisect_left(vocabulary, folded_term + '\uffff')
+        return vocabulary[start:end]
+
+    def _match_term(self, term: str) -> Dict[int, float]:
+        """Điểm của từng sản phẩm khớp với một từ khóa"""
+        folded = fold_diacritics(term)
+        matches = {}
+        # Khớp nguyên token được điểm cao hơn khớp prefix
+        candidates = [(token, 1.0 if token == folded else 0.5) for token in self._expand_prefix(folded)]
+        if not candidates and self._trigrams is not None:
+            # Không token nào bắt đầu bằng từ khóa -> có thể gõ sai ("addidas")
+            candidates = [(token, FUZZY_MATCH_FACTOR * similarity)
+                          for token, similarity in self._trigrams.lookup(folded)]
+        for token, factor in candidates:
+            for position, score in self._postings[token].items():
+                matches[position] = matches.get(position, 0.0) + score * factor
+
+        if term != folded:
+            for position in self._exact_postings.get(term, ()):
+                if position in matches:
+                    matches[position] += EXACT_MATCH_BONUS
+        return matches
+
+    def search(self, query: str, mode: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Tìm kiếm và xếp hạng sản phẩm
+
+        mode: 'and' (mặc định) hoặc 'or'. Nếu không chỉ định, query chứa
+        'or'/'hoặc' sẽ được hiểu là OR.
+        """
+        tokens = tokenize(query)
+        terms = [t for t in tokens if fold_diacritics(t) not in OR_OPERATORS]
+        if not terms:
+            return []
+        if mode is None:
+            mode = 'or' if len(terms) < len(tokens) else 'and'
+
+        # Xử lý từ khóa ít kết quả trước để giao tập nhỏ nhất
+        term_matches = sorted((self._match_term(t) for t in dict.fromkeys(terms)), key=len)
+
+        if mode == 'and':
+            if not term_matches[0]:
+                return []
+            scores = dict(term_matches[0])
+            for matches in term_matches[1:]:
+                scores = {p: s + matches[p] for p, s in scores.items() if p in matches}
+                if not scores:
+                    return []
+        else:
+            scores = {}
+            for matches in term_matches:
+                for position, score in matches.items():
+                    scores[position] = scores.get(position, 0.0) + score
+
+        products = self._products
+        name_field = self.name_field
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (-item[1], (products[item[0]].get(name_field) or '').lower())
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [products[position] for position, _ in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê kích thước index"""
+        return {
+            'documents': len(self._products),
+            'terms': len(self._postings),
+            'trigrams': self._trigrams.stats()['trigrams'] if self._trigrams is not None else 0
+        }
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Session Manager cho ShoeMart ChatBot
+Quản lý nhiều phiên hội thoại nhẹ trên một chatbot (DatabaseService + intent model) dùng chung
+"""
+
+import threading
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Tuple
+from history_store import ConversationHistory, get_history_writer
+from config import CHATBOT_CONFIG
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ChatSession:
+    """Trạng thái riêng của một người dùng"""
+
+    __slots__ = ('session_id', 'user_id', 'history', 'pagination', 'created_at', 'last_active')
+
+    def __init__(self, session_id: str, max_history: int, user_id: Optional[int] = None, history_writer=None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.history = ConversationHistory(max_history, session_id, history_writer)
+        self.pagination = None
+        self.created_at = time.monotonic()
+        self.last_active = self.created_at
+
+    def add_to_history(self, user_message: str, bot_response: str):
+        """Thêm vào lịch sử hội thoại (ring buffer tự bỏ tin nhắn cũ nhất)"""
+        self.history.append(user_message, bot_response)
+
+class SessionManager:
+    """Quản lý các ChatSession với giới hạn số lượng và dọn phiên nhàn rỗi"""
+
+    def __init__(self, chatbot, max_sessions: int = None, idle_timeout: int = None, max_history: int = None):
+        self.chatbot = chatbot
+        self.max_sessions = max_sessions or CHATBOT_CONFIG['max_sessions']
+        self.idle_timeout = idle_timeout or CHATBOT_CONFIG['session_idle_timeout']
+        self.max_history = max_history or CHATBOT_CONFIG['max_history']
+        self.history_writer = get_history_writer()
+        self.evicted = 0
+        self._sessions = OrderedDict()  # session_id -> ChatSession, cũ nhất ở đầu
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict_idle_locked(self, now: float) -> int:
+        """Xóa các phiên nhàn rỗi quá idle_timeout (gọi khi đang giữ lock)"""
+        cutoff = now - self.idle_timeout
+        evicted = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_active > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def get_or_create(self, session_id: Optional[str] = None, user_id: Optional[int] = None) -> ChatSession:
+        """Lấy phiên theo ID hoặc tạo phiên mới"""
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                self._evict_idle_locked(now)
+                while len(self._sessions) >= self.max_sessions:
+                    # Vượt giới hạn -> bỏ phiên ít hoạt động nhất
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+                session = ChatSession(session_id or uuid.uuid4().hex, self.max_history, user_id, self.history_writer)
+                self._sessions[session.session_id] = session
+            else:
+                self._sessions.move_to_end(session.session_id)
+                if user_id is not None:
+                    session.user_id = user_id
+            session.last_active = now
+            return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Lấy phiên nếu tồn tại"""
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def handle_message(self, session_id: Optional[str], message: str,
+                       user_id: Optional[int] = None) -> Tuple[ChatSession, str]:
+        """Xử lý một tin nhắn trong phiên tương ứng"""
+        session = self.get_or_create(session_id, user_id)
+        with self._routing_session(session):
+            response = self.chatbot.get_response(message, session)
+        session.add_to_history(message, response)
+        return session, response
+
+    def handle_messages(self, session_id: Optional[str], messages: List[str],
+                        user_id: Optional[int] = None) -> Tuple[ChatSession, List[str]]:
+        """Xử lý nhiều tin nhắn trong một phiên bằng chatbot.get_responses (truy vấn được gom theo lô)"""
+        session = self.get_or_create(session_id, user_id)
+        with self._routing_session(session):
+            responses = self.chatbot.get_responses(messages, session)
+        for message, response in zip(messages, responses):
+            session.add_to_history(message, response)
+        return session, responses
+
+    def _routing_session(self, session: ChatSession):
+        """Gắn các query của tin nhắn với người dùng để đọc lại được dữ liệu vừa ghi khi có read replica"""
+        db_manager = getattr(getattr(self.chatbot, 'db_service', None), 'db_manager', None)
+        routing_session = getattr(db_manager, 'routing_session', None)
+        if routing_session is None:
+            return nullcontext()
+        return routing_session(session.user_id or session.session_id)
+
+    def get_history(self, session_id: str) -> List[Dict[str, Any]]:
+        """Lịch sử hội thoại của phiên"""
+        session = self.get(session_id)
+        return session.history.to_list() if session else []
+
+    def clear(self, session_id: str) -> bool:
+        """Xóa lịch sử của phiên"""
+        session = self.get(session_id)
+        if not session:
+            return False
+        session.history.clear()
+        return True
+
+    def end_session(self, session_id: str) -> bool:
+        """Kết thúc phiên"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """Dọn các phiên nhàn rỗi"""
+        with self._lock:
+            evicted = self._evict_idle_locked(time.monotonic())
+        if evicted:
+            logger.info(f"Evicted {evicted} idle sessions")
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê phiên"""
+        return {
+            'active_sessions': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'idle_timeout': self.idle_timeout,
+            'evicted': self.evicted,
+            'history_writer': self.history_writer.stats() if self.history_writer else None
+        }
@@ -6,37 +6,101 @@ Chatbot thông minh lấy dữ liệu thực từ database Shoe_stores
 
 import random
 import re
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple
 import logging
 from database_manager import get_database_service, DatabaseService
-from config import CHATBOT_CONFIG, CATEGORY_MAPPING, PRICE_RANGES, ERROR_MESSAGES
+from search_index import ProductSearchIndex, TrigramIndex
+from intent_engine import IntentClassifier
+from tracing import get_tracer
+from catalog_snapshot import open_snapshot_service
+from render_cache import RenderCache
+from response_memo import ResponseMemo
+from history_store import ConversationHistory, get_history_writer
+from config import (CHATBOT_CONFIG, CATEGORY_MAPPING, PRICE_RANGES, ERROR_MESSAGES, PAGINATION_CONFIG,
+                    SNAPSHOT_CONFIG, CACHE_CONFIG, FUZZY_CONFIG, RESPONSE_MEMO_TTLS)
 
 # Cấu hình logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Pattern khoảng giá biên dịch một lần khi import
+PRICE_UNDER_PATTERN = re.compile(r'dưới\s*(\d+)\s*(?:triệu|tr)')
+PRICE_OVER_PATTERN = re.compile(r'trên\s*(\d+)\s*(?:triệu|tr)')
+PRICE_BETWEEN_PATTERN = re.compile(r'từ\s*(\d+)\s*(?:đến|tới)\s*(\d+)\s*(?:triệu|tr)')
+
+# Từ khóa -> khoảng giá preset, theo thứ tự ưu tiên
+PRICE_PRESET_KEYWORDS = [
+    (('rẻ', 'budget'), PRICE_RANGES['budget']),
+    (('trung bình', 'mid'), PRICE_RANGES['mid_range']),
+    (('cao cấp', 'premium'), PRICE_RANGES['premium']),
+    (('luxury', 'xa xỉ'), PRICE_RANGES['luxury'])
+]
+
+def keyword_pattern(keywords) -> re.Pattern:
+    """Regex khớp một trong các từ khóa như nguyên từ ('rẻ' không khớp trong "trẻ", 'mid' trong "midnight")"""
+    return re.compile(r'\b(?:' + '|'.join(re.escape(keyword) for keyword in keywords) + r')\b')
+
+PRICE_PRESETS = [(keyword_pattern(keywords), price_range) for keywords, price_range in PRICE_PRESET_KEYWORDS]
+# Từ của các preset giá: bỏ ra trước khi khớp gần đúng thương hiệu/danh mục ("cao cấp" không thành "cao cổ")
+PRICE_PRESET_WORDS = keyword_pattern(keyword for keywords, _ in PRICE_PRESET_KEYWORDS for keyword in keywords)
+
+# Intent patterns theo thứ tự ưu tiên (dùng chung mọi instance, benchmark/test đọc trực tiếp)
+INTENT_PATTERNS = {
+    'greetings': [r'xin chào', r'chào', r'hello', r'hi', r'hey'],
+    'product_search': [r'tìm.*kiếm', r'xem.*sản.*phẩm', r'có.*gì', r'sản.*phẩm.*nào', r'giày.*gì'],
+    'brand_search': [r'nike', r'adidas', r'converse', r'timberland', r'birkenstock', r'puma', r'vans'],
+    'category_search': [r'sneaker', r'thể.*thao', r'tây', r'công.*sở', r'boot', r'sandal', r'dép'],
+    'price_search': [r'giá', r'tiền', r'dưới', r'trên', r'từ.*đến', r'khoảng', r'budget'],
+    'popular_products': [r'bán.*chạy', r'phổ.*biến', r'hot', r'trend', r'nổi.*tiếng'],
+    'product_detail': [r'chi.*tiết', r'thông.*tin.*sản.*phẩm', r'mô.*tả'],
+    'size_help': [r'size', r'cỡ', r'số', r'chọn.*size'],
+    'contact': [r'liên.*hệ', r'địa.*chỉ', r'hotline', r'cửa.*hàng'],
+    'help': [r'help', r'giúp.*đỡ', r'hướng.*dẫn', r'có.*thể.*làm.*gì'],
+    'statistics': [r'thống.*kê', r'báo.*cáo', r'doanh.*số', r'stats'],
+    'all_products': [r'tất.*cả.*sản.*phẩm', r'toàn.*bộ', r'xem.*hết'],
+    # Ưu tiên thấp nhất: "xem thêm giày nike" vẫn là tìm kiếm, chỉ câu không có intent nào khác mới là 'trang sau'
+    'next_page': [r'trang.*sau', r'trang.*tiếp', r'xem.*thêm', r'tiếp.*theo', r'\bnext\b']
+}
+
+def preprocess_text(text: str) -> str:
+    """Tiền xử lý text đầu vào trước khi phân loại intent"""
+    return text.lower().strip()
+
 class ShoeMartMySQLChatBot:
     """ChatBot ShoeMart kết nối MySQL Database"""
     
-    def __init__(self):
+    # Intent trả lời bằng template cố định -> key trong self.responses
+    STATIC_INTENT_RESPONSES = {
+        'greetings': 'greetings',
+        'size_help': 'size_help',
+        'contact': 'contact_info',
+        'help': 'help'
+    }
+    EMPTY_INPUT_RESPONSE = "Bạn có thể hỏi tôi bất cứ điều gì về sản phẩm ShoeMart! 😊"
+    ERROR_RESPONSE = "😅 Xin lỗi, có lỗi xảy ra. Vui lòng thử lại!"
+    PRICE_RANGE_HINT = "💰 Vui lòng cho biết khoảng giá cụ thể. Ví dụ: 'giày dưới 2 triệu', 'từ 1 đến 3 triệu'"
+    NO_NEXT_PAGE = "📭 Không còn trang nào để xem tiếp. Hãy thử 'xem tất cả sản phẩm' hoặc tìm theo danh mục!"
+    # Intent tìm sản phẩm: nếu câu có từ 2 slot (thương hiệu, danh mục, giá) thì lọc kết hợp một lần
+    SLOT_INTENTS = ('product_search', 'brand_search', 'category_search', 'price_search')
+    # Intent cần database: khi khởi động lazy phải chờ warm-up kết nối xong
+    DATABASE_INTENTS = SLOT_INTENTS + ('next_page', 'all_products', 'popular_products', 'statistics')
+    
+    def __init__(self, db_service: Optional[DatabaseService] = None, autostart: bool = True):
+        """autostart=False: không kết nối database trong constructor, caller tự gọi start_warm_up()
+        (prefork_server dựng chatbot trong process master rồi mới kết nối ở từng worker)"""
         self.name = CHATBOT_CONFIG['name']
         self.version = CHATBOT_CONFIG['version']
-        self.conversation_history = []
         self.max_history = CHATBOT_CONFIG['max_history']
+        self.conversation_history = ConversationHistory(self.max_history, f"console-{uuid.uuid4().hex}",
+                                                        get_history_writer())
         
-        # Khởi tạo database service
-        try:
-            self.db_service = get_database_service()
-            self.is_db_connected = self.db_service.health_check()['connected']
-            if self.is_db_connected:
-                logger.info("✅ ChatBot connected to MySQL database successfully")
-            else:
-                logger.error("❌ Failed to connect to MySQL database")
-        except Exception as e:
-            logger.error(f"Database initialization error: {e}")
-            self.db_service = None
-            self.is_db_connected = False
+        # Khởi tạo database service (mặc định dùng singleton MySQL)
+        self._init_database(db_service)
         
         # Fallback data khi không có database
         self.fallback_products = [
@@ -46,9 +110,31 @@ class ShoeMartMySQLChatBot:
             {'name': 'Oxford Classic Leather', 'price': 2800000, 'category': 'Formal', 'description': 'Giày tây công sở cao cấp, da thật 100%'},
             {'name': 'Timberland Work Boots', 'price': 4200000, 'category': 'Boots', 'description': 'Giày boot cao cổ chống nước, bền bỉ'}
         ]
+        self.fallback_index = ProductSearchIndex(
+            self.fallback_products,
+            field_weights={'name': 3.0, 'category': 2.0, 'description': 1.0},
+            name_field='name',
+            fuzzy=FUZZY_CONFIG['enabled'],
+            min_similarity=FUZZY_CONFIG['min_similarity'],
+            max_candidates=FUZZY_CONFIG['max_candidates']
+        )
         
         # Current user context (có thể mở rộng để hỗ trợ nhiều users)
         self.current_user_id = None
+        # Trạng thái phân trang cho chế độ console (web dùng ChatSession.pagination)
+        self.pagination = None
+        
+        # Fragment đã render của từng sản phẩm và các trang trả lời, xóa khi catalog đổi phiên bản
+        self.fragment_cache = RenderCache(CACHE_CONFIG['fragment_cache_size'])
+        self.response_cache = RenderCache(CACHE_CONFIG['response_cache_size'])
+        
+        # Memo câu trả lời theo tin nhắn đã chuẩn hóa (bỏ qua cả phân loại intent khi trúng)
+        self.response_memo = None
+        if CACHE_CONFIG['response_memo_size'] > 0:
+            self.response_memo = ResponseMemo(CACHE_CONFIG['response_memo_size'], RESPONSE_MEMO_TTLS)
+            db_manager = getattr(self.db_service, 'db_manager', None)
+            if hasattr(db_manager, 'add_write_listener'):
+                db_manager.add_write_listener(self.response_memo.on_write)
         
         # Response templates
         self.responses = {
@@ -83,69 +169,166 @@ class ShoeMartMySQLChatBot:
             ]
         }
         
-        # Intent patterns
-        self.patterns = {
-            'greetings': [r'xin chào', r'chào', r'hello', r'hi', r'hey'],
-            'product_search': [r'tìm.*kiếm', r'xem.*sản.*phẩm', r'có.*gì', r'sản.*phẩm.*nào', r'giày.*gì'],
-            'brand_search': [r'nike', r'adidas', r'converse', r'timberland', r'birkenstock', r'puma', r'vans'],
-            'category_search': [r'sneaker', r'thể.*thao', r'tây', r'công.*sở', r'boot', r'sandal', r'dép'],
-            'price_search': [r'giá', r'tiền', r'dưới', r'trên', r'từ.*đến', r'khoảng', r'budget'],
-            'popular_products': [r'bán.*chạy', r'phổ.*biến', r'hot', r'trend', r'nổi.*tiếng'],
-            'product_detail': [r'chi.*tiết', r'thông.*tin.*sản.*phẩm', r'mô.*tả'],
-            'size_help': [r'size', r'cỡ', r'số', r'chọn.*size'],
-            'contact': [r'liên.*hệ', r'địa.*chỉ', r'hotline', r'cửa.*hàng'],
-            'help': [r'help', r'giúp.*đỡ', r'hướng.*dẫn', r'có.*thể.*làm.*gì'],
-            'statistics': [r'thống.*kê', r'báo.*cáo', r'doanh.*số', r'stats'],
-            'all_products': [r'tất.*cả.*sản.*phẩm', r'toàn.*bộ', r'xem.*hết']
-        }
+        # Intent patterns (theo thứ tự ưu tiên)
+        self.patterns = INTENT_PATTERNS
+        
+        # Biên dịch patterns một lần khi khởi động
+        self.intent_classifier = IntentClassifier(self.patterns)
+        self.brand_pattern = re.compile('|'.join(f'(?:{pattern})' for pattern in self.patterns['brand_search']))
+        
+        # Index trigram cho thương hiệu và từ khóa danh mục: khớp từ gõ sai/thiếu dấu ("addidas", "giay the thao")
+        self.category_keywords = {keyword: category for category, keywords in CATEGORY_MAPPING.items()
+                                  for keyword in [category] + keywords}
+        # Từ khóa danh mục là nguyên từ (dài trước): "pumpkin" không chứa từ khóa "pump"
+        self.category_keyword_pattern = keyword_pattern(sorted(self.category_keywords, key=len, reverse=True))
+        self.brand_index = self.category_index = None
+        if FUZZY_CONFIG['enabled']:
+            # Thương hiệu không bỏ dấu ("vẫn" không khớp "vans"); từ khóa danh mục không dấu dưới 4 ký tự
+            # ("dep", "tay") quá dễ nhầm nên chỉ khớp đúng như trước. Cả hai khớp strict vì kết quả
+            # quyết định intent ("pumpkin" không thành "pump", "thanh toán" không thành "thể thao")
+            self.brand_index = TrigramIndex(self.patterns['brand_search'], FUZZY_CONFIG['min_similarity'],
+                                            FUZZY_CONFIG['max_candidates'], fold=False, strict=True,
+                                            short_term_similarity=FUZZY_CONFIG['short_term_similarity'])
+            self.category_index = TrigramIndex(self.category_keywords, FUZZY_CONFIG['min_similarity'],
+                                               FUZZY_CONFIG['max_candidates'], min_length=4, strict=True,
+                                               short_term_similarity=FUZZY_CONFIG['short_term_similarity'])
+        
+        # Đo thời gian từng giai đoạn (chỉ bọc method khi TRACING_CONFIG['enabled'])
+        get_tracer().instrument_chatbot(self)
+        
+        if autostart:
+            self.start_warm_up()
+
+    def _init_database(self, db_service: Optional[DatabaseService] = None):
+        """Tạo database service; kết nối thực hiện trong start_warm_up()"""
+        self.is_db_connected = False
+        self.db_ready = threading.Event()
+        self.warmup_seconds = None
+        self._snapshot_fallback = db_service is None  # chỉ service mặc định mới chuyển sang snapshot
+        self._owns_db_service = False  # chỉ đóng service do chính chatbot tạo (snapshot offline)
+        try:
+            self.db_service = db_service or get_database_service()
+        except Exception as e:
+            logger.error(f"Database initialization error: {e}")
+            self.db_service = None
+    
+    def start_warm_up(self):
+        """Kết nối database: ở thread nền khi lazy_startup (intent tĩnh trả lời ngay), ngược lại chờ tại chỗ"""
+        if CHATBOT_CONFIG['lazy_startup']:
+            threading.Thread(target=self.warm_up, name='shoemart-warmup', daemon=True).start()
+        else:
+            self._connect_database()
+            self.db_ready.set()
+    
+    def warm_up(self):
+        """Kết nối database rồi nạp trước catalog, search index và sales aggregates"""
+        start = time.perf_counter()
+        try:
+            self._connect_database()
+        finally:
+            self.db_ready.set()
+        if self.is_db_connected:
+            try:
+                self.db_service.preload()
+            except Exception as e:
+                logger.warning(f"Warm-up preload failed: {e}")
+        self.warmup_seconds = time.perf_counter() - start
+        logger.info(f"Warm-up finished in {self.warmup_seconds * 1000:.0f} ms")
+    
+    def wait_for_database(self, timeout: Optional[float] = None) -> bool:
+        """Chờ warm-up kết nối database xong (tối đa CHATBOT_CONFIG['warmup_wait'] giây)"""
+        return self.db_ready.wait(CHATBOT_CONFIG['warmup_wait'] if timeout is None else timeout)
+    
+    def _connect_database(self):
+        """Health check database, MySQL lỗi thì chuyển sang snapshot chỉ đọc nếu có"""
+        try:
+            self.is_db_connected = self.db_service is not None and self.db_service.health_check()['connected']
+            if self.is_db_connected:
+                logger.info("✅ ChatBot connected to MySQL database successfully")
+            else:
+                logger.error("❌ Failed to connect to MySQL database")
+        except Exception as e:
+            logger.error(f"Database initialization error: {e}")
+            self.is_db_connected = False
+        
+        if not self.is_db_connected and self._snapshot_fallback and SNAPSHOT_CONFIG['enabled']:
+            # MySQL lỗi -> phục vụ chỉ đọc từ snapshot cục bộ nếu có
+            offline_service = open_snapshot_service()
+            if offline_service:
+                self.db_service = offline_service
+                self._owns_db_service = True
+                self.is_db_connected = True
+                # instrument_chatbot trong __init__ chỉ bọc service cũ
+                get_tracer().instrument_service(offline_service)
 
     def preprocess(self, text: str) -> str:
         """Tiền xử lý text đầu vào"""
-        return text.lower().strip()
+        return preprocess_text(text)
 
     def classify_intent(self, text: str) -> str:
         """Phân loại ý định người dùng"""
         text = self.preprocess(text)
+        intent = self.intent_classifier.classify(text)
+        if intent == self.intent_classifier.default_intent or intent == 'next_page':
+            # Thương hiệu/danh mục gõ sai cũng được ưu tiên hơn 'trang sau' ("xem thêm addidas")
+            intent = self.fuzzy_intent(text) or intent
+        return intent
+
+    def fuzzy_intent(self, text: str) -> Optional[str]:
+        """Intent cho câu không khớp pattern nào nhưng có thương hiệu/danh mục gõ sai hoặc thiếu dấu"""
+        if self.extract_brand(text):
+            return 'brand_search'
+        if self.fuzzy_category(text):
+            return 'category_search'
+        return None
+
+    def keyword_category(self, text: str) -> Optional[str]:
+        """Danh mục của từ khóa xuất hiện nguyên từ trong text ("pumpkin" không khớp "pump")"""
+        keyword_match = self.category_keyword_pattern.search(self.preprocess(text))
+        return self.category_keywords[keyword_match.group(0)] if keyword_match else None
+
+    def fuzzy_category(self, text: str) -> Optional[str]:
+        """Danh mục cho câu không khớp intent nào: từ khóa phải là nguyên từ, không thì khớp gần đúng
+        (bỏ qua từ của preset giá)"""
+        text = self.preprocess(text)
+        category = self.keyword_category(text)
+        if category:
+            return category
         
-        for intent, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text):
-                    return intent
+        if self.category_index is not None:
+            match = self.category_index.find(PRICE_PRESET_WORDS.sub(' ', text))
+            if match:
+                return self.category_keywords[match[0]]
         
-        return 'default'
+        return None
 
     def extract_price_range(self, text: str) -> Optional[tuple]:
         """Trích xuất khoảng giá từ text"""
         text = self.preprocess(text)
         
         # Tìm pattern "dưới X triệu/triệu"
-        under_match = re.search(r'dưới\s*(\d+)\s*(?:triệu|tr)', text)
+        under_match = PRICE_UNDER_PATTERN.search(text)
         if under_match:
             max_price = int(under_match.group(1)) * 1000000
             return (0, max_price)
         
         # Tìm pattern "trên X triệu"
-        over_match = re.search(r'trên\s*(\d+)\s*(?:triệu|tr)', text)
+        over_match = PRICE_OVER_PATTERN.search(text)
         if over_match:
             min_price = int(over_match.group(1)) * 1000000
             return (min_price, float('inf'))
         
         # Tìm pattern "từ X đến Y triệu"
-        range_match = re.search(r'từ\s*(\d+)\s*(?:đến|tới)\s*(\d+)\s*(?:triệu|tr)', text)
+        range_match = PRICE_BETWEEN_PATTERN.search(text)
         if range_match:
             min_price = int(range_match.group(1)) * 1000000
             max_price = int(range_match.group(2)) * 1000000
             return (min_price, max_price)
         
         # Preset ranges
-        if 'rẻ' in text or 'budget' in text:
-            return PRICE_RANGES['budget']
-        elif 'trung bình' in text or 'mid' in text:
-            return PRICE_RANGES['mid_range'] 
-        elif 'cao cấp' in text or 'premium' in text:
-            return PRICE_RANGES['premium']
-        elif 'luxury' in text or 'xa xỉ' in text:
-            return PRICE_RANGES['luxury']
+        for pattern, price_range in PRICE_PRESETS:
+            if pattern.search(text):
+                return price_range
         
         return None
 
@@ -158,128 +341,338 @@ class ShoeMartMySQLChatBot:
                 if keyword in text:
                     return category
         
+        return self.fuzzy_category(text)
+
+    def extract_brand(self, text: str, fuzzy: bool = True) -> Optional[str]:
+        """Trích xuất thương hiệu từ text (khớp gần đúng nếu gõ sai: "addidas" -> "adidas"; fuzzy=False để tắt)"""
+        text = self.preprocess(text)
+        brand_match = self.brand_pattern.search(text)
+        if brand_match:
+            return brand_match.group(0)
+        
+        if fuzzy and self.brand_index is not None:
+            match = self.brand_index.find(PRICE_PRESET_WORDS.sub(' ', text))
+            if match:
+                return match[0]
+        
         return None
 
+    def extract_slots(self, text: str) -> Dict[str, Any]:
+        """Trích cùng lúc thương hiệu, danh mục và khoảng giá từ một câu
+        (vd. "giày nike sneaker dưới 3 triệu" -> nike, sneakers, (0, 3000000))
+
+        Chỉ khớp đúng (thương hiệu theo pattern, từ khóa danh mục nguyên từ): khớp gần đúng chỉ dùng
+        cho câu không khớp intent nào (fuzzy_intent), không thêm slot vào lọc kết hợp.
+        """
+        text = self.preprocess(text)
+        return {
+            'brand': self.extract_brand(text, fuzzy=False),
+            'category': self.keyword_category(text),
+            'price_range': self.extract_price_range(text)
+        }
+
+    def is_compound(self, slots: Dict[str, Any]) -> bool:
+        """Câu hỏi có từ 2 slot trở lên -> lọc kết hợp thay vì một intent"""
+        return sum(value is not None for value in slots.values()) >= 2
+
+    def catalog_version(self, fresh_only: bool = False) -> Optional[int]:
+        """Phiên bản catalog cache dùng làm khóa cho render cache (None = không cache)
+
+        fresh_only: trả None khi catalog đã hết TTL, để request đi qua DAO và nạp lại catalog.
+        """
+        cache = getattr(self.db_service, 'catalog_cache', None)
+        if cache is None or (fresh_only and not cache.is_fresh()):
+            return None
+        return cache.version
+
+    def product_fragment(self, product: Dict) -> str:
+        """Phần sau số thứ tự của một sản phẩm trong danh sách, cache theo (Id, phiên bản catalog)"""
+        version = self.catalog_version()
+        key = product.get('Id')
+        fragment = self.fragment_cache.get(version, key)
+        if fragment is None:
+            formatted = self.db_service.format_product(product)
+            parts = [formatted['name'], "**\n   💰 Giá: ", formatted['formatted_price'],
+                     "\n   🏷️ Loại: ", formatted['category'], "\n"]
+            if formatted['description']:
+                parts += ["   📝 ", formatted['description'][:100], "...\n"]
+            parts.append("\n")
+            fragment = ''.join(parts)
+            if key is not None:
+                self.fragment_cache.put(version, key, fragment)
+        return fragment
+
+    def format_product_item(self, index: int, product: Dict) -> str:
+        """Format một sản phẩm trong danh sách"""
+        return f"**{index}. {self.product_fragment(product)}"
+
+    def append_product_items(self, parts: List[str], products: List[Dict], start: int = 1):
+        """Thêm các sản phẩm (đánh số từ start) vào danh sách chuỗi cần join"""
+        product_fragment = self.product_fragment
+        for index, product in enumerate(products, start):
+            parts += ["**", str(index), ". ", product_fragment(product)]
+
     def format_product_list(self, products: List[Dict], title: str = "", max_display: int = 10) -> str:
         """Format danh sách sản phẩm để hiển thị"""
         if not products:
             return random.choice(self.responses['no_results'])
         
-        result = f"🛍️ **{title}**\n" if title else "🛍️ **Sản phẩm tìm thấy:**\n"
-        result += f"📦 Có {len(products)} sản phẩm phù hợp\n\n"
+        parts = [f"🛍️ **{title}**\n" if title else "🛍️ **Sản phẩm tìm thấy:**\n",
+                 f"📦 Có {len(products)} sản phẩm phù hợp\n\n"]
+        self.append_product_items(parts, products[:max_display])
         
-        display_products = products[:max_display]
+        if len(products) > max_display:
+            parts.append(f"... và {len(products) - max_display} sản phẩm khác.\n"
+                         "Hãy thử tìm kiếm cụ thể hơn để xem đầy đủ!\n")
         
-        for i, product in enumerate(display_products, 1):
-            formatted = self.db_service.format_product(product)
-            result += f"**{i}. {formatted['name']}**\n"
-            result += f"   💰 Giá: {formatted['formatted_price']}\n"
-            result += f"   🏷️ Loại: {formatted['category']}\n"
-            if formatted['description']:
-                result += f"   📝 {formatted['description'][:100]}...\n"
-            result += "\n"
+        return ''.join(parts)
+
+    def format_product_page(self, page: Dict[str, Any], title: str, shown_before: int = 0) -> str:
+        """Format một trang sản phẩm, tổng số lấy từ COUNT riêng"""
+        products = page['products']
+        if not products:
+            return self.NO_NEXT_PAGE if shown_before else random.choice(self.responses['no_results'])
         
-        if len(products) > max_display:
-            result += f"... và {len(products) - max_display} sản phẩm khác.\n"
-            result += "Hãy thử tìm kiếm cụ thể hơn để xem đầy đủ!\n"
+        total = page['total'] if page['total'] is not None else shown_before + len(products)
+        shown = shown_before + len(products)
+        
+        parts = [f"🛍️ **{title}**\n" if title else "🛍️ **Sản phẩm tìm thấy:**\n"]
+        if shown_before:
+            parts.append(f"📦 Có {total} sản phẩm phù hợp (đang xem {shown_before + 1}-{shown})\n\n")
+        else:
+            parts.append(f"📦 Có {total} sản phẩm phù hợp\n\n")
+        
+        self.append_product_items(parts, products, shown_before + 1)
+        
+        if total > shown:
+            parts.append(f"... và {total - shown} sản phẩm khác.\nGõ 'trang sau' để xem tiếp!\n")
+        
+        return ''.join(parts)
+
+    def page_cache_key(self, listing: str, args: tuple, title: str, limit: int, after: Optional[tuple],
+                       shown_before: int, total: Optional[int]) -> tuple:
+        """Khóa response cache của một trang listing"""
+        return (listing, tuple(args), title, limit, tuple(after) if after else None, shown_before, total)
+
+    def store_rendered_page(self, key: tuple, page: Dict[str, Any], title: str, shown_before: int = 0,
+                            total: Optional[int] = None) -> tuple:
+        """Render trang vừa truy vấn và lưu vào response cache (trang rỗng không cache vì trả lời ngẫu nhiên)"""
+        if total is not None:
+            page['total'] = total
+        rendered = (page, self.format_product_page(page, title, shown_before))
+        if page['products']:
+            self.response_cache.put(self.catalog_version(fresh_only=True), key, rendered)
+        return rendered
+
+    def render_product_page(self, listing: str, args: tuple, title: str, limit: int, after: Optional[tuple] = None,
+                            shown_before: int = 0, total: Optional[int] = None) -> tuple:
+        """(page, text) của một trang listing; listing giống hệt (vd. 'tất cả sản phẩm') lấy từ
+        response cache cho tới khi catalog đổi
+
+        total: tổng đã biết từ trang đầu (trang sau không cần COUNT lại).
+        """
+        key = self.page_cache_key(listing, args, title, limit, after, shown_before, total)
+        cached = self.response_cache.get(self.catalog_version(fresh_only=True), key)
+        if cached is not None:
+            return cached
+        page = self.db_service.products.get_product_page(listing, args, limit, after=after, with_total=total is None)
+        return self.store_rendered_page(key, page, title, shown_before, total)
+
+    def render_cache_stats(self) -> Dict[str, Any]:
+        """Thống kê fragment cache và response cache"""
+        return {'fragments': self.fragment_cache.stats(), 'responses': self.response_cache.stats(),
+                'memo': self.response_memo.stats() if self.response_memo else None}
+
+    def remember_page(self, context, listing: str, args: tuple, title: str, limit: int,
+                      page: Dict[str, Any], shown_before: int = 0):
+        """Lưu vị trí trang hiện tại vào context để xử lý 'trang sau'"""
+        shown = shown_before + len(page['products'])
+        total = page['total'] if page['total'] is not None else shown
+        if page['next_cursor'] is not None and shown < total:
+            context.pagination = {
+                'listing': listing,
+                'args': args,
+                'title': title,
+                'limit': limit,
+                'cursor': page['next_cursor'],
+                'shown': shown,
+                'total': total
+            }
+        else:
+            context.pagination = None
+
+    def show_product_page(self, listing: str, args: tuple, title: str, limit: int, context) -> str:
+        """Lấy trang đầu của listing, ghi nhớ vị trí và format"""
+        page, text = self.render_product_page(listing, args, title, limit)
+        self.remember_page(context, listing, args, title, limit, page)
+        return text
+
+    def get_next_page(self, context=None) -> str:
+        """Xem trang tiếp theo của danh sách gần nhất"""
+        context = context if context is not None else self
+        state = context.pagination
+        if not state:
+            return self.NO_NEXT_PAGE
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
         
-        return result
+        try:
+            page, text = self.render_product_page(
+                state['listing'], state['args'], state['title'], state['limit'],
+                after=state['cursor'], shown_before=state['shown'], total=state['total']
+            )
+            self.remember_page(context, state['listing'], state['args'], state['title'],
+                               state['limit'], page, state['shown'])
+            return text
+            
+        except Exception as e:
+            logger.error(f"Next page error: {e}")
+            return ERROR_MESSAGES['query_failed']
 
     def search_products_fallback(self, search_term: str) -> List[Dict]:
         """Tìm kiếm sản phẩm từ fallback data"""
-        results = []
-        search_lower = search_term.lower()
-        
-        for product in self.fallback_products:
-            if (search_lower in product['name'].lower() or 
-                search_lower in product['category'].lower() or 
-                search_lower in product['description'].lower()):
-                results.append(product)
-        
-        return results
+        return self.fallback_index.search(search_term)
 
     def format_price_fallback(self, price: float) -> str:
         """Format giá cho fallback mode"""
         return f"{int(price):,}".replace(',', '.') + " VNĐ"
 
-    def search_products(self, text: str) -> str:
-        """Tìm kiếm sản phẩm từ database hoặc fallback"""
+    def extract_search_term(self, text: str) -> str:
+        """Lấy từ khóa tìm kiếm từ câu hỏi"""
         # Cải thiện text processing
         search_term = text.replace('giày', '').replace('tìm', '').replace('xem', '').replace('mua', '').strip()
         # Loại bỏ các từ phổ biến
         common_words = ['có', 'gì', 'nào', 'của', 'tôi', 'bạn', 'được', 'cho']
         words = search_term.split()
-        filtered_words = [word for word in words if word.lower() not in common_words]
-        search_term = ' '.join(filtered_words).strip()
+        filtered_words = [self.correct_brand(word) for word in words if word.lower() not in common_words]
+        return ' '.join(filtered_words).strip()
+
+    def correct_brand(self, word: str) -> str:
+        """Sửa thương hiệu gõ sai trong từ khóa ("addidas" -> "adidas") để cả truy vấn LIKE cũng khớp"""
+        if self.brand_index is None or self.brand_pattern.search(word.lower()):
+            return word
+        matches = self.brand_index.lookup(word, limit=1)
+        return matches[0][0] if matches else word
+
+    def format_fallback_search(self, search_term: str) -> str:
+        """Tìm kiếm và format kết quả ở chế độ offline"""
+        products = self.search_products_fallback(search_term)
+        if products:
+            result = f"🛍️ **Kết quả tìm kiếm '{search_term}' (chế độ offline):**\n📦 Có {len(products)} sản phẩm phù hợp\n\n"
+            for i, product in enumerate(products, 1):
+                result += f"**{i}. {product['name']}**\n"
+                result += f"   💰 Giá: {self.format_price_fallback(product['price'])}\n"
+                result += f"   🏷️ Loại: {product['category']}\n"
+                result += f"   📝 {product['description']}\n\n"
+            result += "⚠️ *Dữ liệu hiển thị ở chế độ offline. Kết nối database để có thông tin mới nhất.*"
+            return result
+        else:
+            return f"🔍 Không tìm thấy sản phẩm nào với từ khóa '{search_term}' trong dữ liệu offline.\n\nGợi ý: Thử 'Nike', 'Adidas', 'sneakers', 'boots'"
+
+    def format_search_results(self, search_term: str, products: List[Dict]) -> str:
+        """Format kết quả tìm kiếm từ database"""
+        if products:
+            return self.format_product_list(products, f"Kết quả tìm kiếm '{search_term}':")
+        else:
+            return f"🔍 Không tìm thấy sản phẩm nào với từ khóa '{search_term}'\n\nGợi ý: Thử tìm theo thương hiệu (Nike, Adidas) hoặc loại giày (sneakers, boots)"
+
+    def search_products(self, text: str) -> str:
+        """Tìm kiếm sản phẩm từ database hoặc fallback"""
+        search_term = self.extract_search_term(text)
         
         if not search_term:
             return "🔍 Vui lòng nhập từ khóa tìm kiếm cụ thể hơn. Ví dụ: 'Nike', 'Adidas', 'boots'..."
         
         if not self.is_db_connected:
             # Sử dụng fallback data
-            products = self.search_products_fallback(search_term)
-            if products:
-                result = f"🛍️ **Kết quả tìm kiếm '{search_term}' (chế độ offline):**\n📦 Có {len(products)} sản phẩm phù hợp\n\n"
-                for i, product in enumerate(products, 1):
-                    result += f"**{i}. {product['name']}**\n"
-                    result += f"   💰 Giá: {self.format_price_fallback(product['price'])}\n"
-                    result += f"   🏷️ Loại: {product['category']}\n"
-                    result += f"   📝 {product['description']}\n\n"
-                result += "⚠️ *Dữ liệu hiển thị ở chế độ offline. Kết nối database để có thông tin mới nhất.*"
-                return result
-            else:
-                return f"🔍 Không tìm thấy sản phẩm nào với từ khóa '{search_term}' trong dữ liệu offline.\n\nGợi ý: Thử 'Nike', 'Adidas', 'sneakers', 'boots'"
+            return self.format_fallback_search(search_term)
         
         try:
             # Sử dụng database
             products = self.db_service.products.search_products_by_name(search_term)
-            
-            if products:
-                return self.format_product_list(products, f"Kết quả tìm kiếm '{search_term}':")
-            else:
-                return f"🔍 Không tìm thấy sản phẩm nào với từ khóa '{search_term}'\n\nGợi ý: Thử tìm theo thương hiệu (Nike, Adidas) hoặc loại giày (sneakers, boots)"
+            return self.format_search_results(search_term, products)
                 
         except Exception as e:
             logger.error(f"Product search error: {e}")
             return ERROR_MESSAGES['query_failed']
 
-    def get_products_by_category(self, category: str) -> str:
+    def get_products_by_category(self, category: str, context=None) -> str:
         """Lấy sản phẩm theo danh mục"""
         if not self.is_db_connected:
             return random.choice(self.responses['database_error'])
         
         try:
-            products = self.db_service.products.get_products_by_category(category)
-            return self.format_product_list(products, f"Sản phẩm {category.upper()}:")
+            return self.show_product_page(
+                'category', (category,), f"Sản phẩm {category.upper()}:",
+                PAGINATION_CONFIG['page_size'], context if context is not None else self
+            )
             
         except Exception as e:
             logger.error(f"Category search error: {e}")
             return ERROR_MESSAGES['query_failed']
 
-    def get_products_by_price_range(self, text: str) -> str:
-        """Lấy sản phẩm theo khoảng giá"""
+    def filter_title(self, slots: Dict[str, Any]) -> str:
+        """Tiêu đề cho danh sách sản phẩm lọc theo thương hiệu/danh mục/khoảng giá"""
+        label = ' '.join(['Sản phẩm'] + [slots[name].upper() for name in ('brand', 'category') if slots.get(name)])
+        if not slots.get('price_range'):
+            return f"{label}:"
+        min_price, max_price = slots['price_range']
+        if max_price == float('inf'):
+            return f"{label} từ {self.db_service.format_price(min_price)} trở lên:"
+        return f"{label} từ {self.db_service.format_price(min_price)} đến {self.db_service.format_price(max_price)}:"
+    
+    def slot_listing(self, slots: Dict[str, Any]) -> tuple:
+        """(listing, args, title): chỉ có giá -> 'price', ngược lại 'filter' (một query/một lần lọc)"""
+        min_price, max_price = slots.get('price_range') or (None, None)
+        if not slots.get('brand') and not slots.get('category') and slots.get('price_range'):
+            return 'price', (min_price, max_price), self.filter_title(slots)
+        return 'filter', (slots.get('brand'), slots.get('category'), min_price, max_price), self.filter_title(slots)
+    
+    def get_filtered_products(self, slots: Dict[str, Any], context=None) -> str:
+        """Lấy sản phẩm theo các slot đã trích (thương hiệu + danh mục + khoảng giá)"""
         if not self.is_db_connected:
             return random.choice(self.responses['database_error'])
         
-        price_range = self.extract_price_range(text)
-        if not price_range:
-            return "💰 Vui lòng cho biết khoảng giá cụ thể. Ví dụ: 'giày dưới 2 triệu', 'từ 1 đến 3 triệu'"
-        
         try:
-            min_price, max_price = price_range
-            products = self.db_service.products.get_products_by_price_range(min_price, max_price)
-            
-            if max_price == float('inf'):
-                title = f"Sản phẩm từ {self.db_service.format_price(min_price)} trở lên:"
-            else:
-                title = f"Sản phẩm từ {self.db_service.format_price(min_price)} đến {self.db_service.format_price(max_price)}:"
-            
-            return self.format_product_list(products, title)
+            listing, args, title = self.slot_listing(slots)
+            return self.show_product_page(
+                listing, args, title, PAGINATION_CONFIG['page_size'], context if context is not None else self
+            )
             
         except Exception as e:
-            logger.error(f"Price range search error: {e}")
+            logger.error(f"Filtered search error: {e}")
             return ERROR_MESSAGES['query_failed']
 
+    def get_products_by_price_range(self, text: str, context=None) -> str:
+        """Lấy sản phẩm theo khoảng giá"""
+        if not self.is_db_connected:
+            return random.choice(self.responses['database_error'])
+        
+        slots = self.extract_slots(text)
+        if not slots['price_range']:
+            return self.PRICE_RANGE_HINT
+        return self.get_filtered_products(slots, context)
+
+    def format_popular_products(self, products: List[Dict]) -> str:
+        """Format danh sách sản phẩm bán chạy"""
+        if products:
+            version = self.catalog_version()
+            parts = ["🔥 **TOP SẢN PHẨM BÁN CHẠY:**\n\n"]
+            for i, product in enumerate(products, 1):
+                key = ('popular', product.get('Id'))
+                fragment = self.fragment_cache.get(version, key)
+                if fragment is None:
+                    formatted = self.db_service.format_product(product)
+                    fragment = (f"{formatted['name']}**\n   💰 {formatted['formatted_price']}\n",
+                                f"   🏷️ {formatted['category']}\n\n")
+                    if key[1] is not None:
+                        self.fragment_cache.put(version, key, fragment)
+                parts += ["**", str(i), ". ", fragment[0],
+                          "   📊 Đã bán: ", str(product.get('SoldCount', 0)), " đôi\n", fragment[1]]
+            return ''.join(parts)
+        else:
+            return "📊 Chưa có dữ liệu bán hàng để thống kê sản phẩm hot."
+
     def get_popular_products(self) -> str:
         """Lấy sản phẩm bán chạy"""
         if not self.is_db_connected:
@@ -287,36 +680,47 @@ class ShoeMartMySQLChatBot:
         
         try:
             products = self.db_service.products.get_popular_products(10)
-            if products:
-                result = "🔥 **TOP SẢN PHẨM BÁN CHẠY:**\n\n"
-                for i, product in enumerate(products, 1):
-                    formatted = self.db_service.format_product(product)
-                    sold_count = product.get('SoldCount', 0)
-                    result += f"**{i}. {formatted['name']}**\n"
-                    result += f"   💰 {formatted['formatted_price']}\n"
-                    result += f"   📊 Đã bán: {sold_count} đôi\n"
-                    result += f"   🏷️ {formatted['category']}\n\n"
-                return result
-            else:
-                return "📊 Chưa có dữ liệu bán hàng để thống kê sản phẩm hot."
+            return self.format_popular_products(products)
                 
         except Exception as e:
             logger.error(f"Popular products error: {e}")
             return ERROR_MESSAGES['query_failed']
 
-    def get_all_products(self) -> str:
+    def get_all_products(self, context=None) -> str:
         """Lấy tất cả sản phẩm"""
         if not self.is_db_connected:
             return random.choice(self.responses['database_error'])
         
         try:
-            products = self.db_service.products.get_all_products()
-            return self.format_product_list(products, "TẤT CẢ SẢN PHẨM SHOEMART:", 15)
+            return self.show_product_page(
+                'all', (), "TẤT CẢ SẢN PHẨM SHOEMART:",
+                PAGINATION_CONFIG['all_products_page_size'], context if context is not None else self
+            )
             
         except Exception as e:
             logger.error(f"Get all products error: {e}")
             return ERROR_MESSAGES['query_failed']
 
+    def format_sales_statistics(self, stats: List[Dict]) -> str:
+        """Format thống kê bán hàng theo danh mục"""
+        if stats:
+            parts = ["📊 **THỐNG KÊ BÁN HÀNG THEO DANH MỤC:**\n\n"]
+            total_revenue = 0
+            for stat in stats:
+                category = stat.get('Category', 'Unknown')
+                sold = stat.get('TotalSold', 0)
+                revenue = stat.get('Revenue', 0)
+                total_revenue += revenue
+                
+                parts.append(f"🏷️ **{category}:**\n"
+                             f"   📦 Số lượng bán: {sold} đôi\n"
+                             f"   💰 Doanh thu: {self.db_service.format_price(revenue)}\n\n")
+            
+            parts.append(f"💎 **Tổng doanh thu: {self.db_service.format_price(total_revenue)}**")
+            return ''.join(parts)
+        else:
+            return "📊 Chưa có dữ liệu bán hàng."
+
     def get_sales_statistics(self) -> str:
         """Lấy thống kê bán hàng"""
         if not self.is_db_connected:
@@ -324,87 +728,261 @@ class ShoeMartMySQLChatBot:
         
         try:
             stats = self.db_service.orders.get_sales_statistics()
-            if stats:
-                result = "📊 **THỐNG KÊ BÁN HÀNG THEO DANH MỤC:**\n\n"
-                total_revenue = 0
-                for stat in stats:
-                    category = stat.get('Category', 'Unknown')
-                    sold = stat.get('TotalSold', 0)
-                    revenue = stat.get('Revenue', 0)
-                    total_revenue += revenue
-                    
-                    result += f"🏷️ **{category}:**\n"
-                    result += f"   📦 Số lượng bán: {sold} đôi\n"
-                    result += f"   💰 Doanh thu: {self.db_service.format_price(revenue)}\n\n"
-                
-                result += f"💎 **Tổng doanh thu: {self.db_service.format_price(total_revenue)}**"
-                return result
-            else:
-                return "📊 Chưa có dữ liệu bán hàng."
+            return self.format_sales_statistics(stats)
                 
         except Exception as e:
             logger.error(f"Sales statistics error: {e}")
             return ERROR_MESSAGES['query_failed']
 
-    def get_response(self, user_input: str) -> str:
-        """Lấy phản hồi chính"""
+    def static_response(self, intent: str) -> str:
+        """Phản hồi cho các intent không cần truy vấn database"""
+        return random.choice(self.static_variants(intent))
+
+    def static_variants(self, intent: str) -> List[str]:
+        """Các biến thể câu trả lời của intent tĩnh"""
+        return self.responses[self.STATIC_INTENT_RESPONSES.get(intent, 'default')]
+
+    def memoized_response(self, user_input: str) -> Optional[str]:
+        """Câu trả lời đã memo cho tin nhắn (None nếu chưa có/hết hạn)"""
+        if self.response_memo is None:
+            return None
+        return self.response_memo.get(user_input, self.catalog_version())
+
+    def remember_response(self, user_input: str, intent: str, value) -> str:
+        """Memo câu trả lời của một route không phụ thuộc hội thoại và trả về câu trả lời thực tế
+
+        value là chuỗi hoặc tuple biến thể (intent tĩnh). Câu trả lời cần database chỉ được
+        memo khi database đang kết nối và truy vấn không lỗi.
+        """
+        memo = self.response_memo
+        if memo is not None and memo.is_cacheable(intent) and (
+                memo.is_static(intent) or (self.is_db_connected and value != ERROR_MESSAGES['query_failed'])):
+            memo.put(user_input, intent, value, self.catalog_version())
+        return ResponseMemo.resolve(value)
+
+    def get_response(self, user_input: str, context=None) -> str:
+        """Lấy phản hồi chính
+        
+        context là đối tượng giữ trạng thái hội thoại (vd. ChatSession),
+        mặc định là chính chatbot ở chế độ console.
+        """
         if not user_input.strip():
-            return "Bạn có thể hỏi tôi bất cứ điều gì về sản phẩm ShoeMart! 😊"
+            return self.EMPTY_INPUT_RESPONSE
         
+        cached = self.memoized_response(user_input)
+        if cached is not None:
+            get_tracer().label_request('memo')
+            return cached
+        
+        context = context if context is not None else self
         intent = self.classify_intent(user_input)
+        if intent in self.DATABASE_INTENTS and not self.db_ready.is_set():
+            self.wait_for_database()
         
         try:
-            if intent == 'greetings':
-                return random.choice(self.responses['greetings'])
+            if intent in self.SLOT_INTENTS:
+                slots = self.extract_slots(user_input)
+                if self.is_compound(slots):
+                    return self.get_filtered_products(slots, context)
+            
+            if intent == 'next_page':
+                return self.get_next_page(context)
             
             elif intent == 'all_products':
-                return self.get_all_products()
+                return self.get_all_products(context)
             
             elif intent == 'product_search' or intent == 'brand_search':
-                return self.search_products(user_input)
+                return self.remember_response(user_input, intent, self.search_products(user_input))
             
             elif intent == 'category_search':
                 category = self.extract_category(user_input)
                 if category:
-                    return self.get_products_by_category(category)
-                return self.search_products(user_input)
+                    return self.get_products_by_category(category, context)
+                return self.remember_response(user_input, intent, self.search_products(user_input))
             
             elif intent == 'price_search':
-                return self.get_products_by_price_range(user_input)
+                return self.get_products_by_price_range(user_input, context)
             
             elif intent == 'popular_products':
-                return self.get_popular_products()
+                return self.remember_response(user_input, intent, self.get_popular_products())
             
             elif intent == 'statistics':
-                return self.get_sales_statistics()
-            
-            elif intent == 'size_help':
-                return random.choice(self.responses['size_help'])
-            
-            elif intent == 'contact':
-                return random.choice(self.responses['contact_info'])
-            
-            elif intent == 'help':
-                return random.choice(self.responses['help'])
+                return self.remember_response(user_input, intent, self.get_sales_statistics())
             
             else:
-                return random.choice(self.responses['default'])
+                return self.remember_response(user_input, intent, tuple(self.static_variants(intent)))
                 
         except Exception as e:
             logger.error(f"Response generation error: {e}")
-            return "😅 Xin lỗi, có lỗi xảy ra. Vui lòng thử lại!"
+            return self.ERROR_RESPONSE
 
-    def add_to_history(self, user_message: str, bot_response: str):
-        """Thêm vào lịch sử hội thoại"""
-        self.conversation_history.append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
-            'user': user_message,
-            'bot': bot_response
-        })
+    def plan_response(self, user_input: str) -> Tuple[str, str, Any]:
+        """Cách trả lời một tin nhắn của get_responses: (intent, route, args), cùng quy tắc với get_response
+
+        route: 'listing' (args = (listing, args, tiêu đề, limit)), 'search' (args = từ khóa),
+        'popular', 'statistics', 'static' hoặc 'sequential' (trả lời riêng bằng get_response).
+        """
+        intent = self.classify_intent(user_input)
+        if intent in self.SLOT_INTENTS:
+            slots = self.extract_slots(user_input)
+            if self.is_compound(slots):
+                return intent, 'listing', self.slot_listing(slots) + (PAGINATION_CONFIG['page_size'],)
+        
+        if intent == 'all_products':
+            return intent, 'listing', ('all', (), "TẤT CẢ SẢN PHẨM SHOEMART:", PAGINATION_CONFIG['all_products_page_size'])
+        if intent == 'category_search':
+            category = self.extract_category(user_input)
+            if category:
+                return intent, 'listing', ('category', (category,), f"Sản phẩm {category.upper()}:",
+                                           PAGINATION_CONFIG['page_size'])
+        if intent in ('product_search', 'brand_search', 'category_search'):
+            search_term = self.extract_search_term(user_input)
+            return (intent, 'search', search_term) if search_term else (intent, 'sequential', None)
+        if intent == 'price_search':
+            slots = self.extract_slots(user_input)
+            if slots['price_range']:
+                return intent, 'listing', self.slot_listing(slots) + (PAGINATION_CONFIG['page_size'],)
+            return intent, 'sequential', None
+        if intent in ('popular_products', 'statistics'):
+            return intent, 'popular' if intent == 'popular_products' else 'statistics', None
+        if intent == 'next_page':
+            return intent, 'sequential', None
+        return intent, 'static', None
+
+    def run_fetches(self, fetches: Dict[str, Callable[[], Any]], workers: int) -> Dict[str, Any]:
+        """Chạy các nhóm truy vấn độc lập, song song trên thread pool khi workers > 1
+
+        Thread của pool dùng cùng routing session với thread gọi (read-your-writes).
+        """
+        if workers <= 1 or len(fetches) <= 1:
+            return {name: fetch() for name, fetch in fetches.items()}
+        
+        db_manager = getattr(self.db_service, 'db_manager', None)
+        current_session = getattr(db_manager, 'current_routing_session', None)
+        session = current_session() if current_session else None
+        
+        def run(fetch):
+            with db_manager.routing_session(session) if session is not None else nullcontext():
+                return fetch()
+        
+        with ThreadPoolExecutor(max_workers=min(workers, len(fetches)), thread_name_prefix='shoemart-batch') as pool:
+            futures = {name: pool.submit(run, fetch) for name, fetch in fetches.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def prefetch_responses(self, plans: Iterable[Tuple[str, str, Any]], workers: int) -> Dict[str, Any]:
+        """Gom việc truy vấn của các kế hoạch trả lời: mỗi listing, từ khóa, danh sách bán chạy
+        và thống kê chỉ được truy vấn một lần cho cả lô
+
+        Trả về 'pages' (khóa response cache -> (page, text) đã render), 'search' (từ khóa -> sản phẩm)
+        và câu trả lời 'popular'/'statistics' nếu có.
+        """
+        version = self.catalog_version(fresh_only=True)
+        rendered = {}
+        listings = {}
+        search_terms = []
+        routes = set()
+        for _, route, args in plans:
+            routes.add(route)
+            if route == 'listing':
+                listing, listing_args, title, limit = args
+                key = self.page_cache_key(listing, listing_args, title, limit, None, 0, None)
+                if key in rendered or key in listings:
+                    continue
+                cached = self.response_cache.get(version, key)
+                if cached is not None:
+                    rendered[key] = cached
+                else:
+                    listings[key] = args
+            elif route == 'search':
+                search_terms.append(args)
         
-        # Giới hạn lịch sử
-        if len(self.conversation_history) > self.max_history:
-            self.conversation_history = self.conversation_history[-self.max_history:]
+        products = self.db_service.products
+        fetches = {}
+        if listings:
+            fetches['pages'] = lambda: products.get_first_pages(
+                (listing, listing_args, limit) for listing, listing_args, _, limit in listings.values())
+        if search_terms:
+            fetches['search'] = lambda: products.search_products_by_names(search_terms)
+        if 'popular' in routes:
+            fetches['popular'] = self.get_popular_products
+        if 'statistics' in routes:
+            fetches['statistics'] = self.get_sales_statistics
+        results = self.run_fetches(fetches, workers)
+        
+        pages = results.pop('pages', {})
+        for key, (listing, listing_args, title, limit) in listings.items():
+            page = pages.get((listing, listing_args, limit))
+            if page is not None:
+                rendered[key] = self.store_rendered_page(key, page, title)
+        results['pages'] = rendered
+        results.setdefault('search', {})
+        return results
+
+    def answer_planned(self, user_input: str, plan: Tuple[str, str, Any], prefetched: Dict[str, Any], context) -> str:
+        """Câu trả lời của một tin nhắn từ dữ liệu đã prefetch (thiếu dữ liệu thì dùng get_response)"""
+        intent, route, args = plan
+        try:
+            if route == 'listing':
+                listing, listing_args, title, limit = args
+                rendered = prefetched['pages'].get(self.page_cache_key(listing, listing_args, title, limit, None, 0, None))
+                if rendered is not None:
+                    page, text = rendered
+                    self.remember_page(context, listing, listing_args, title, limit, page)
+                    return text
+            elif route == 'search' and args in prefetched['search']:
+                return self.remember_response(user_input, intent,
+                                              self.format_search_results(args, prefetched['search'][args]))
+            elif route in ('popular', 'statistics') and route in prefetched:
+                return self.remember_response(user_input, intent, prefetched[route])
+            elif route == 'static':
+                return self.remember_response(user_input, intent, tuple(self.static_variants(intent)))
+        except Exception as e:
+            logger.error(f"Batch response error: {e}")
+        return self.get_response(user_input, context)
+
+    def get_responses(self, messages: List[str], context=None, workers: Optional[int] = None) -> List[str]:
+        """Trả lời nhiều tin nhắn trong một lần gọi (đánh giá offline, load test, trả lời FAQ hàng loạt)
+
+        Phân loại mọi tin nhắn trước, gom các tin nhắn cùng listing/từ khóa/thống kê để mỗi
+        truy vấn chỉ chạy một lần (không có catalog cache thì gộp thành UNION ALL), rồi trả lời
+        theo đúng thứ tự: kết quả và trạng thái 'trang sau' của context như khi gọi get_response
+        lần lượt. workers > 1 chạy các nhóm truy vấn song song (mặc định CHATBOT_BATCH_WORKERS).
+        """
+        context = context if context is not None else self
+        workers = CHATBOT_CONFIG['batch_workers'] if workers is None else workers
+        responses = [None] * len(messages)
+        plans = {}
+        pending = []
+        for i, message in enumerate(messages):
+            if not message.strip():
+                responses[i] = self.EMPTY_INPUT_RESPONSE
+                continue
+            cached = self.memoized_response(message)
+            if cached is not None:
+                responses[i] = cached
+                continue
+            if message not in plans:
+                plans[message] = self.plan_response(message)
+            pending.append(i)
+        if not pending:
+            return responses
+        
+        if not self.db_ready.is_set() and any(intent in self.DATABASE_INTENTS for intent, _, _ in plans.values()):
+            self.wait_for_database()
+        prefetched = {'pages': {}, 'search': {}}
+        if self.is_db_connected:
+            try:
+                prefetched = self.prefetch_responses(plans.values(), workers)
+            except Exception as e:
+                logger.error(f"Batch prefetch error: {e}")
+        
+        for i in pending:
+            responses[i] = self.answer_planned(messages[i], plans[messages[i]], prefetched, context)
+        return responses
+
+    def add_to_history(self, user_message: str, bot_response: str):
+        """Thêm vào lịch sử hội thoại (ring buffer tự bỏ tin nhắn cũ nhất, ghi nền nếu bật HISTORY_PERSIST)"""
+        self.conversation_history.append(user_message, bot_response)
 
     def chat(self):
         """Bắt đầu chat session"""
@@ -412,7 +990,9 @@ class ShoeMartMySQLChatBot:
         print(f"🤖 {self.name} v{self.version} - Kết nối MySQL Database")
         print("💾 Dữ liệu thực tế từ hệ thống Shoe_stores")
         
-        if self.is_db_connected:
+        if not self.db_ready.is_set():
+            print("⏳ Database: Đang kết nối ở nền...")
+        elif self.is_db_connected:
             print("✅ Database: Đã kết nối")
         else:
             print("❌ Database: Lỗi kết nối")
@@ -445,8 +1025,9 @@ class ShoeMartMySQLChatBot:
                 print(f"\n🤖 {self.name}: Có lỗi xảy ra. Vui lòng thử lại!")
 
     def __del__(self):
-        """Cleanup khi object bị destroy"""
-        if hasattr(self, 'db_service') and self.db_service:
+        """Cleanup khi object bị destroy: service truyền vào hoặc singleton dùng chung
+        (có thể còn chatbot/session khác đang dùng) không bị đóng"""
+        if getattr(self, '_owns_db_service', False) and self.db_service:
             self.db_service.close_connections()
 
 def main():
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+ShoeMart ChatBot Web API
+HTTP server phục vụ nhiều người dùng đồng thời, mỗi người một session riêng
+"""
+
+import logging
+from flask import Flask, Response, jsonify, request
+from connection_pool import PoolExhaustedError
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+from session_manager import SessionManager
+from tracing import get_tracer
+from config import SERVER_CONFIG, CHATBOT_CONFIG, ERROR_MESSAGES
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def create_app(chatbot: ShoeMartMySQLChatBot = None) -> Flask:
+    """Tạo Flask app dùng chung một chatbot cho tất cả sessions"""
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+
+    chatbot = chatbot or ShoeMartMySQLChatBot()
+    sessions = SessionManager(chatbot)
+    app.config['SESSION_MANAGER'] = sessions
+
+    @app.post('/chat')
+    def chat():
+        """Gửi tin nhắn và nhận phản hồi"""
+        data = request.get_json(silent=True) or {}
+        message = str(data.get('message', ''))
+        if not message.strip():
+            return jsonify({'error': ERROR_MESSAGES['invalid_input']}), 400
+
+        session, response = sessions.handle_message(data.get('session_id'), message, data.get('user_id'))
+        return jsonify({'session_id': session.session_id, 'response': response})
+
+    @app.post('/chat/batch')
+    def chat_batch():
+        """Gửi nhiều tin nhắn và nhận các phản hồi theo cùng thứ tự"""
+        data = request.get_json(silent=True) or {}
+        messages = data.get('messages')
+        if (not isinstance(messages, list) or not messages
+                or len(messages) > CHATBOT_CONFIG['batch_max_messages']):
+            return jsonify({'error': ERROR_MESSAGES['invalid_input']}), 400
+
+        session, responses = sessions.handle_messages(data.get('session_id'), [str(m) for m in messages],
+                                                      data.get('user_id'))
+        return jsonify({'session_id': session.session_id, 'responses': responses})
+
+    @app.get('/history')
+    def history():
+        """Lịch sử hội thoại của session"""
+        session_id = request.args.get('session_id', '')
+        return jsonify({'session_id': session_id, 'history': sessions.get_history(session_id)})
+
+    @app.post('/clear')
+    def clear():
+        """Xóa lịch sử hội thoại của session"""
+        data = request.get_json(silent=True) or {}
+        return jsonify({'cleared': sessions.clear(data.get('session_id', ''))})
+
+    @app.get('/products')
+    @app.get('/products/<category>')
+    def products(category: str = None):
+        """Danh sách sản phẩm (tất cả hoặc theo danh mục)"""
+        if not chatbot.wait_for_database() or not chatbot.is_db_connected:
+            return jsonify({'error': ERROR_MESSAGES['db_connection_failed']}), 503
+
+        try:
+            if category:
+                rows = chatbot.db_service.products.get_products_by_category(category)
+            else:
+                rows = chatbot.db_service.products.get_all_products()
+        except PoolExhaustedError:
+            return jsonify({'error': ERROR_MESSAGES['pool_exhausted']}), 503
+        return jsonify({'products': [dict(chatbot.db_service.format_product(row)) for row in rows]})
+
+    @app.get('/health')
+    def health():
+        """Trạng thái database và sessions"""
+        database = chatbot.db_service.health_check() if chatbot.db_service else {'connected': False}
+        return jsonify({'database': database, 'sessions': sessions.stats(), 'render_cache': chatbot.render_cache_stats()})
+
+    @app.get('/metrics')
+    def metrics():
+        """Histogram tracing (text Prometheus, hoặc JSON với ?format=json)"""
+        tracer = get_tracer()
+        if request.args.get('format') == 'json':
+            return jsonify({'enabled': tracer.enabled, 'metrics': tracer.snapshot()})
+        return Response(tracer.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+    return app
+
+def main():
+    """Chạy web server"""
+    app = create_app()
+    app.run(
+        host=SERVER_CONFIG['host'],
+        port=SERVER_CONFIG['port'],
+        debug=SERVER_CONFIG['debug'],
+        threaded=True
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite stand-in cho database Shoe_stores
+Chạy cùng bộ SQL_QUERIES trên SQLite để test/benchmark không cần MySQL server
+"""
+
+import asyncio
+import re
+import sqlite3
+import threading
+import uuid
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Iterable
+from async_database_manager import AsyncDatabaseManager
+from database_manager import DatabaseManager
+from connection_pool import MonitoredConnectionPool
+from statement_cache import rows_from_values
+from records import QUERY_ROW_TYPES
+from config import DATABASE_CONFIG, ERROR_MESSAGES, SUCCESS_MESSAGES
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Schema tương ứng với migrations của C# backend
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Users (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Username TEXT NOT NULL,
+    Email TEXT NOT NULL,
+    PasswordHash TEXT NOT NULL,
+    Role TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS Products (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    Name TEXT NOT NULL COLLATE NOCASE,
+    Description TEXT NOT NULL COLLATE NOCASE,
+    Price REAL NOT NULL,
+    ImageUrl TEXT NOT NULL,
+    Category TEXT NOT NULL COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS Orders (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserId INTEGER NOT NULL,
+    OrderDate TEXT NOT NULL,
+    TotalAmount REAL NOT NULL,
+    PaymentMethod TEXT NOT NULL,
+    Status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS OrderItems (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    OrderId INTEGER NOT NULL,
+    ProductId INTEGER NOT NULL,
+    Quantity INTEGER NOT NULL,
+    Price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS CartItems (
+    Id INTEGER PRIMARY KEY AUTOINCREMENT,
+    UserId INTEGER NOT NULL,
+    ProductId INTEGER NOT NULL,
+    Quantity INTEGER NOT NULL,
+    UNIQUE (UserId, ProductId)
+);
+CREATE INDEX IF NOT EXISTS IX_Orders_UserId ON Orders (UserId);
+CREATE INDEX IF NOT EXISTS IX_OrderItems_OrderId ON OrderItems (OrderId);
+CREATE INDEX IF NOT EXISTS IX_OrderItems_ProductId ON OrderItems (ProductId);
+"""
+
+UPSERT_PATTERN = re.compile(r'ON\s+DUPLICATE\s+KEY\s+UPDATE', re.IGNORECASE)
+VALUES_FUNCTION_PATTERN = re.compile(r'VALUES\((\w+)\)', re.IGNORECASE)
+
+@lru_cache(maxsize=256)
+def translate_query(query: str) -> str:
+    """Chuyển câu SQL kiểu MySQL (%s, ON DUPLICATE KEY UPDATE) sang cú pháp SQLite"""
+    parts = UPSERT_PATTERN.split(query, maxsplit=1)
+    if len(parts) == 2:
+        update_clause = VALUES_FUNCTION_PATTERN.sub(r'excluded.\1', parts[1])
+        query = parts[0] + 'ON CONFLICT DO UPDATE SET' + update_clause
+    return query.replace('%s', '?')
+
+def connect_sqlite(path: str = ':memory:') -> sqlite3.Connection:
+    """Mở kết nối SQLite và tạo schema nếu chưa có"""
+    connection = sqlite3.connect(path, check_same_thread=False, uri=path.startswith('file:'))
+    connection.row_factory = sqlite3.Row
+    connection.executescript(SQLITE_SCHEMA)
+    return connection
+
+def insert_products(connection: sqlite3.Connection, products: Iterable[Dict[str, Any]]) -> int:
+    """Thêm sản phẩm (dict theo cột của bảng Products) vào SQLite"""
+    rows = [
+        (p['Name'], p.get('Description', ''), float(p['Price']), p.get('ImageUrl', ''), p['Category'])
+        for p in products
+    ]
+    connection.executemany(
+        "INSERT INTO Products (Name, Description, Price, ImageUrl, Category) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    connection.commit()
+    return len(rows)
+
+class SQLiteCursor:
+    """Cursor SQLite với API giống mysql.connector (dictionary=True trả về dict)"""
+
+    __slots__ = ('_cursor', '_dictionary')
+
+    def __init__(self, connection: sqlite3.Connection, dictionary: bool = False):
+        self._cursor = connection.cursor()
+        self._dictionary = dictionary
+
+    def execute(self, query: str, params: Tuple = None):
+        self._cursor.execute(translate_query(query), params or ())
+
+    def executemany(self, query: str, params_list: Iterable[Tuple]):
+        self._cursor.executemany(translate_query(query), params_list)
+
+    @property
+    def column_names(self) -> Tuple[str, ...]:
+        return tuple(column[0] for column in self._cursor.description or ())
+
+    def _convert(self, rows) -> list:
+        return [dict(row) for row in rows] if self._dictionary else [tuple(row) for row in rows]
+
+    def fetchall(self) -> list:
+        return self._convert(self._cursor.fetchall())
+
+    def fetchmany(self, size: int) -> list:
+        return self._convert(self._cursor.fetchmany(size))
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._convert([row])[0] if row is not None else None
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self) -> int:
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+class SQLiteConnection:
+    """Connection SQLite với API giống MySQLConnection (autocommit, start_transaction...)"""
+
+    unread_result = False
+
+    def __init__(self, path: str):
+        self._connection = connect_sqlite(path)
+        self._connection.isolation_level = None  # autocommit như DATABASE_CONFIG['autocommit']
+
+    def cursor(self, dictionary: bool = False, buffered: bool = None, prepared: bool = False) -> SQLiteCursor:
+        # sqlite3 tự cache câu lệnh đã biên dịch theo text, prepared chỉ cần trả về tuple như MySQL
+        return SQLiteCursor(self._connection, dictionary)
+
+    def start_transaction(self):
+        self._connection.execute("BEGIN")
+
+    def commit(self):
+        if self._connection.in_transaction:
+            self._connection.commit()
+
+    def rollback(self):
+        if self._connection.in_transaction:
+            self._connection.rollback()
+
+    def consume_results(self):
+        pass
+
+    def backup(self, target: sqlite3.Connection):
+        self._connection.backup(target)
+
+    def is_connected(self) -> bool:
+        return self._connection is not None
+
+    def reconnect(self):
+        raise sqlite3.ProgrammingError("Cannot reconnect a closed SQLite connection")
+
+    def reset_session(self):
+        self.rollback()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+class SQLiteDatabaseManager(DatabaseManager):
+    """DatabaseManager chạy trên SQLite qua MonitoredConnectionPool (test/benchmark không cần MySQL)
+
+    path ':memory:' được đổi thành một shared-cache in-memory database riêng
+    để mọi connection trong pool cùng thấy dữ liệu. replica_paths là các file SQLite
+    đóng vai read replica (mở chỉ đọc, việc sao chép dữ liệu do caller lo).
+    """
+
+    def __init__(self, path: str = ':memory:', pool_size: int = 1, pool_max_size: int = 4,
+                 replica_paths: Iterable[str] = ()):
+        self.in_memory = path == ':memory:'
+        self.path = f"file:shoemart_{uuid.uuid4().hex}?mode=memory&cache=shared" if self.in_memory else path
+        self.pool_size = max(pool_size, 1)  # giữ ít nhất một connection để in-memory database không bị xóa
+        self.pool_max_size = pool_max_size
+        self.replica_paths = list(replica_paths)
+        super().__init__()
+
+    def _replica_targets(self) -> List[str]:
+        return self.replica_paths
+
+    def _driver_errors(self) -> Tuple[type, ...]:
+        # Lỗi sqlite3 được giữ nguyên (không import mysql.connector)
+        return ()
+
+    def backup_to(self, path: str):
+        """Sao chép toàn bộ database sang file SQLite (vd. để process khác mở cùng dữ liệu)"""
+        target = sqlite3.connect(path)
+        try:
+            with self.get_connection() as connection:
+                connection.raw_connection.backup(target)
+        finally:
+            target.close()
+
+    def _create_replica_pool(self, target: str) -> MonitoredConnectionPool:
+        """Pool chỉ đọc tới file replica (file không tồn tại = replica không kết nối được)"""
+        uri = target if target.startswith('file:') else f"file:{target}?mode=ro"
+        return MonitoredConnectionPool(
+            lambda: SQLiteConnection(uri),
+            min_size=0,
+            max_size=self.pool_max_size,
+            acquire_timeout=DATABASE_CONFIG.get('pool_acquire_timeout', 5),
+            idle_timeout=DATABASE_CONFIG.get('pool_idle_timeout', 300)
+        )
+
+    def _initialize_connection_pool(self):
+        """Khởi tạo pool các SQLiteConnection"""
+        try:
+            self.pool = MonitoredConnectionPool(
+                lambda: SQLiteConnection(self.path),
+                min_size=self.pool_size,
+                max_size=self.pool_max_size,
+                acquire_timeout=DATABASE_CONFIG.get('pool_acquire_timeout', 5),
+                idle_timeout=DATABASE_CONFIG.get('pool_idle_timeout', 300),
+                # In-memory database chỉ tồn tại khi còn connection mở; file thì mở khi cần như MySQL
+                prefill=self.in_memory or not self.lazy_connect
+            )
+            self.is_connected = True
+            logger.info(SUCCESS_MESSAGES['db_connected'])
+
+        except sqlite3.Error as e:
+            logger.error(f"SQLite connection failed: {e}")
+            self.is_connected = False
+            raise Exception(ERROR_MESSAGES['db_connection_failed'])
+
+class AsyncSQLiteDatabaseManager(AsyncDatabaseManager):
+    """AsyncDatabaseManager chạy trên SQLite (dùng thread pool của asyncio)"""
+
+    def __init__(self, path: str = ':memory:'):
+        super().__init__()
+        self.path = path
+        self.connection = None
+        self._lock = threading.Lock()
+
+    async def connect(self):
+        """Mở kết nối SQLite"""
+        try:
+            self.connection = await asyncio.to_thread(connect_sqlite, self.path)
+            self.is_connected = True
+            logger.info(SUCCESS_MESSAGES['db_connected'])
+        except sqlite3.Error as e:
+            logger.error(f"SQLite connection failed: {e}")
+            self.is_connected = False
+            raise Exception(ERROR_MESSAGES['db_connection_failed'])
+
+    def _run(self, query: str, params: Tuple, fetch: bool, row_type=None):
+        """Thực thi câu lệnh trong worker thread"""
+        with self._lock:
+            cursor = self.connection.execute(translate_query(query), params or ())
+            if fetch:
+                return rows_from_values([column[0] for column in cursor.description], cursor.fetchall(), row_type)
+            self.connection.commit()
+            return cursor.rowcount
+
+    async def execute_query(self, query: str, params: Tuple = None, query_name: str = None) -> List[Dict[str, Any]]:
+        """Thực thi SELECT query và trả về kết quả"""
+        if not self.connection:
+            logger.error(f"Query execution failed: {ERROR_MESSAGES['db_connection_failed']}")
+            return []
+        try:
+            return await asyncio.to_thread(self._run, query, params, True, QUERY_ROW_TYPES.get(query_name))
+        except sqlite3.Error as e:
+            logger.error(f"Query execution failed: {e}")
+            return []
+
+    async def execute_update(self, query: str, params: Tuple = None) -> int:
+        """Thực thi INSERT/UPDATE/DELETE query"""
+        if not self.connection:
+            logger.error(f"Update execution failed: {ERROR_MESSAGES['db_connection_failed']}")
+            return 0
+        try:
+            affected_rows = await asyncio.to_thread(self._run, query, params, False)
+        except sqlite3.Error as e:
+            logger.error(f"Update execution failed: {e}")
+            return 0
+        self._notify_write(query)
+        return affected_rows
+
+    async def test_connection(self) -> bool:
+        """Test kết nối database"""
+        if not self.connection:
+            return False
+        try:
+            await asyncio.to_thread(self._run, "SELECT 1", (), True)
+            return True
+        except sqlite3.Error:
+            return False
+
+    async def close(self):
+        """Đóng kết nối SQLite"""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+        self.is_connected = False
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Prepared statements và dòng kết quả dạng tuple cho ShoeMart ChatBot
+Mỗi connection trong pool giữ một cursor prepared cho từng câu SQL đã dùng (MySQL chỉ
+parse/plan một lần), kết quả là tuple giá trị kèm index cột dùng chung thay vì một dict mỗi dòng
+"""
+
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import List, Dict, Any, Sequence
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ResultRow(Mapping):
+    """Một dòng kết quả, truy cập như dict (row['Name'], row.get(...), dict(row))
+
+    Chỉ giữ tuple giá trị và tham chiếu tới index cột {tên: vị trí} của cả result set,
+    tên cột chỉ được tra khi truy cập.
+    """
+
+    __slots__ = ('_columns', '_values')
+
+    def __init__(self, columns: Dict[str, int], values: Sequence):
+        self._columns = columns
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._values[self._columns[key]]
+
+    def get(self, key, default=None):
+        index = self._columns.get(key)
+        return default if index is None else self._values[index]
+
+    def __contains__(self, key) -> bool:
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def __repr__(self) -> str:
+        return f"ResultRow({dict(self)!r})"
+
+def column_index(cursor) -> Dict[str, int]:
+    """Index {tên cột: vị trí} của result set hiện tại trên cursor"""
+    return {name: index for index, name in enumerate(cursor.column_names)}
+
+def rows_from_values(column_names: Sequence[str], rows: List[Sequence], row_type=None) -> List[Mapping]:
+    """Bọc các tuple đã fetch: record row_type (records.py) nếu khớp các cột,
+    ngược lại ResultRow dùng chung một index cột"""
+    if row_type is not None:
+        records = row_type.from_rows(column_names, rows)
+        if records is not None:
+            return records
+    columns = {name: index for index, name in enumerate(column_names)}
+    return [ResultRow(columns, values) for values in rows]
+
+def rows_from_cursor(cursor, rows: List[Sequence], row_type=None) -> List[Mapping]:
+    """rows_from_values với tên cột của cursor mysql.connector"""
+    return rows_from_values(cursor.column_names, rows, row_type)
+
+class PreparedStatementCache:
+    """Cursor prepared của một connection, mỗi câu SQL một cursor (LRU tối đa max_statements)
+
+    mysql.connector chỉ prepare lại khi câu SQL truyền vào không phải cùng một object
+    với lần trước, nên cache giữ lại object SQL của lần đầu và luôn execute bằng object đó.
+    Cursor bị đẩy ra khỏi LRU được close (giải phóng statement trên server).
+    """
+
+    def __init__(self, connection, max_statements: int = 64):
+        self.connection = connection
+        self.max_statements = max_statements
+        self.prepares = 0
+        self.reuses = 0
+        self.evictions = 0
+        self._statements = OrderedDict()  # câu SQL -> (object SQL đã prepare, cursor)
+
+    def execute(self, query: str, params: Sequence = ()):
+        """Execute câu SQL bằng cursor prepared của nó, trả về cursor để fetch"""
+        entry = self._statements.get(query)
+        if entry is None:
+            entry = (query, self.connection.cursor(prepared=True))
+            self._statements[query] = entry
+            self.prepares += 1
+            if len(self._statements) > self.max_statements:
+                self._close_cursor(self._statements.popitem(last=False)[1][1])
+                self.evictions += 1
+        else:
+            self._statements.move_to_end(query)
+            self.reuses += 1
+        prepared_query, cursor = entry
+        cursor.execute(prepared_query, params)
+        return cursor
+
+    def _close_cursor(self, cursor):
+        try:
+            cursor.close()
+        except Exception as e:
+            logger.warning(f"Closing prepared statement failed: {e}")
+
+    def close(self):
+        """Đóng toàn bộ cursor prepared"""
+        for _, cursor in self._statements.values():
+            self._close_cursor(cursor)
+        self._statements.clear()
+
+    def __len__(self) -> int:
+        return len(self._statements)
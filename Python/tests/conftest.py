@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Fixtures chung cho test ShoeMart ChatBot
+Chạy trên SQLite stand-in (sqlite_backend) nên không cần MySQL server
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHATBOT_CONFIG, HISTORY_CONFIG, SNAPSHOT_CONFIG
+from database_manager import DatabaseService
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+from sqlite_backend import SQLiteDatabaseManager
+
+# (Name, Description, Price, Category)
+PRODUCTS = [
+    ('Nike Air Max Đen', 'Giày chạy bộ Nike êm ái', 2500000, 'Sneakers'),
+    ('Nike Air Force Trắng', 'Sneaker Nike cổ điển', 2800000, 'Sneakers'),
+    ('Adidas Ultraboost', 'Giày chạy bộ Adidas', 3200000, 'Sneakers'),
+    ('Adidas Stan Smith', 'Sneaker Adidas da trắng', 1900000, 'Sneakers'),
+    ('Converse Chuck Taylor', 'Giày vải Converse', 1200000, 'Sneakers'),
+    ('Timberland Work Boots', 'Boots da chống nước', 4500000, 'Boots'),
+    ('Dr. Martens Chelsea', 'Chelsea boot da thật', 3900000, 'Boots'),
+    ('Oxford Da Nâu', 'Giày tây công sở', 1500000, 'Formal'),
+    ('Birkenstock Arizona', 'Dép sandal quai ngang', 1100000, 'Sandals'),
+    ("Biti's Hunter Street", 'Sneaker Việt Nam', 900000, 'Sneakers'),
+    ('Cao Gót Mũi Nhọn', 'Giày cao gót dự tiệc', 1300000, 'Heels'),
+    ('Giày Bệt Da Mềm', 'Giày bệt nữ', 700000, 'Flats')
+]
+
+# (Id, Status, [(ProductId, Quantity)])
+ORDERS = [
+    (1, 'Completed', [(1, 2), (3, 1)]),
+    (2, 'Completed', [(1, 1), (6, 1)]),
+    (3, 'Pending', [(2, 3)]),
+    (4, 'Cancelled', [(5, 4)]),
+    (5, 'Completed', [(9, 2), (1, 1)])
+]
+
+def seed(db_manager: SQLiteDatabaseManager, products=PRODUCTS, orders=ORDERS):
+    """Thêm sản phẩm và đơn hàng mẫu"""
+    with db_manager.transaction():
+        db_manager.execute_many(
+            "INSERT INTO Products (Name, Description, Price, ImageUrl, Category) VALUES (%s, %s, %s, %s, %s)",
+            [(name, description, price, '', category) for name, description, price, category in products]
+        )
+        for order_id, status, items in orders:
+            add_order(db_manager, order_id, status, items)
+
+def add_order(db_manager: SQLiteDatabaseManager, order_id: int, status: str, items):
+    """Thêm một đơn hàng với giá lấy từ PRODUCTS"""
+    total = sum(PRODUCTS[product_id - 1][2] * quantity for product_id, quantity in items)
+    db_manager.execute_update(
+        "INSERT INTO Orders (Id, UserId, OrderDate, TotalAmount, PaymentMethod, Status) VALUES (%s, %s, %s, %s, %s, %s)",
+        (order_id, 1, '2024-05-01 10:00:00', total, 'COD', status)
+    )
+    db_manager.execute_many(
+        "INSERT INTO OrderItems (OrderId, ProductId, Quantity, Price) VALUES (%s, %s, %s, %s)",
+        [(order_id, product_id, quantity, PRODUCTS[product_id - 1][2]) for product_id, quantity in items]
+    )
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch):
+    """Không ghi snapshot/lịch sử ra file, chatbot kết nối database ngay trong constructor"""
+    monkeypatch.setitem(SNAPSHOT_CONFIG, 'enabled', False)
+    monkeypatch.setitem(HISTORY_CONFIG, 'persist', False)
+    monkeypatch.setitem(CHATBOT_CONFIG, 'lazy_startup', False)
+
+@pytest.fixture
+def db_manager():
+    manager = SQLiteDatabaseManager()
+    seed(manager)
+    return manager
+
+@pytest.fixture
+def db_service(db_manager):
+    service = DatabaseService(db_manager)
+    yield service
+    service.close_connections()
+
+@pytest.fixture
+def chatbot(db_service):
+    return ShoeMartMySQLChatBot(db_service)
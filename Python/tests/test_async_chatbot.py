@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Test AsyncShoeMartChatBot: API kế thừa từ bản đồng bộ chạy được trên bot async"""
+
+import asyncio
+
+from async_chatbot import AsyncShoeMartChatBot
+from async_database_manager import AsyncDatabaseService
+from sqlite_backend import AsyncSQLiteDatabaseManager, insert_products
+from conftest import PRODUCTS
+
+MESSAGES = ["giày nike", "sneakers", "trang sau", "giày dưới 2 triệu", "giày nike", ""]
+
+class Conversation:
+    pagination = None
+
+async def connected_chatbot() -> AsyncShoeMartChatBot:
+    db_manager = AsyncSQLiteDatabaseManager()
+    chatbot = AsyncShoeMartChatBot(AsyncDatabaseService(db_manager))
+    await chatbot.connect()
+    insert_products(db_manager.connection, [
+        {'Name': name, 'Description': description, 'Price': price, 'Category': category}
+        for name, description, price, category in PRODUCTS
+    ])
+    return chatbot
+
+def test_wait_for_database_follows_connect():
+    async def scenario():
+        chatbot = AsyncShoeMartChatBot(AsyncDatabaseService(AsyncSQLiteDatabaseManager()))
+        assert not await chatbot.wait_for_database(timeout=0.01)
+        assert await chatbot.connect()
+        assert await chatbot.wait_for_database()
+        assert chatbot.warmup_seconds is not None
+        await chatbot.close()
+    asyncio.run(scenario())
+
+def test_get_responses_matches_sequential():
+    async def scenario():
+        chatbot = await connected_chatbot()
+        sequential_context, batch_context = Conversation(), Conversation()
+        expected = [await chatbot.get_response(message, sequential_context) for message in MESSAGES]
+        actual = await chatbot.get_responses(MESSAGES, batch_context)
+        await chatbot.close()
+        return expected, actual, sequential_context, batch_context
+
+    expected, actual, sequential_context, batch_context = asyncio.run(scenario())
+    assert actual == expected
+    assert "Nike" in actual[0]
+    assert batch_context.pagination == sequential_context.pagination
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Test get_responses: cùng câu trả lời với get_response lần lượt, ít query hơn khi không có catalog cache"""
+
+import pytest
+
+from database_manager import ProductDataAccess, union_query
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+
+MESSAGES = [
+    "giày nike", "sneakers", "giày dưới 2 triệu", "nike sneaker dưới 3 triệu", "sản phẩm bán chạy",
+    "thống kê bán hàng", "xem tất cả sản phẩm", "trang sau", "boots", "tìm adidas", "giày nike",
+    "từ 1 đến 3 triệu", "sandals", "trang sau", "", "convers"
+]
+
+class Conversation:
+    pagination = None
+
+def answer_sequentially(chatbot, messages, context):
+    return [chatbot.get_response(message, context) if message.strip() else chatbot.EMPTY_INPUT_RESPONSE
+            for message in messages]
+
+@pytest.mark.parametrize('catalog', [True, False])
+def test_batch_matches_sequential(db_service, catalog):
+    if not catalog:
+        db_service.catalog_cache = db_service.products.cache = None
+    sequential_context, batch_context = Conversation(), Conversation()
+    expected = answer_sequentially(ShoeMartMySQLChatBot(db_service), MESSAGES, sequential_context)
+    actual = ShoeMartMySQLChatBot(db_service).get_responses(MESSAGES, batch_context, workers=4)
+    assert actual == expected
+    assert batch_context.pagination == sequential_context.pagination
+
+def test_batch_deduplicates_queries_without_catalog(db_service):
+    db_service.catalog_cache = db_service.products.cache = None
+    pool = db_service.db_manager.pool
+    messages = ["sneakers", "boots", "giày dưới 2 triệu", "từ 1 đến 3 triệu", "giày nike", "tìm adidas"] * 3
+
+    sequential_bot, batch_bot = ShoeMartMySQLChatBot(db_service), ShoeMartMySQLChatBot(db_service)
+
+    acquired = pool.acquired
+    answer_sequentially(sequential_bot, messages, Conversation())
+    sequential_queries = pool.acquired - acquired
+
+    acquired = pool.acquired
+    batch_bot.get_responses(messages, Conversation())
+    batch_queries = pool.acquired - acquired
+    # Listing danh mục và listing giá: mỗi loại một UNION ALL trang + một UNION ALL COUNT; tìm kiếm: một UNION ALL
+    assert batch_queries == 5
+    assert batch_queries < sequential_queries
+
+def test_first_pages_match_single_listing_queries(db_manager):
+    products = ProductDataAccess(db_manager)
+    keys = [('category', ('sneakers',), 3), ('category', ('boots',), 3), ('price', (1000000, 3000000), 2),
+            ('all', (), 5), ('filter', ('nike', 'sneakers', None, 3000000), 5)]
+    pages = products.get_first_pages(keys)
+    for listing, args, limit in keys:
+        expected = products.get_product_page(listing, args, limit)
+        page = pages[(listing, args, limit)]
+        assert [p['Id'] for p in page['products']] == [p['Id'] for p in expected['products']]
+        assert (page['total'], page['next_cursor']) == (expected['total'], expected['next_cursor'])
+
+def test_search_by_names_matches_single_searches(db_manager):
+    products = ProductDataAccess(db_manager)
+    terms = ['nike', 'adidas', 'boots', 'không có']
+    results = products.search_products_by_names(terms)
+    for term in terms:
+        assert [p['Id'] for p in results[term]] == [p['Id'] for p in products.search_products_by_name(term)]
+
+def test_union_query_tags_rows_with_batch_key():
+    sql, params = union_query([("SELECT Id FROM Products WHERE Price < %s", (1,)),
+                               ("SELECT Id FROM Products WHERE Price > %s", (2,))], ('Id',))
+    assert sql.count('UNION ALL') == 1
+    assert 'SELECT 1 AS BatchKey' in sql
+    assert sql.endswith('ORDER BY BatchKey, Id')
+    assert params == (1, 2)
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Test CartDataAccess.replace_cart: xóa và thêm trong một transaction, lỗi thì rollback"""
+
+from database_manager import CartDataAccess
+
+def cart_items(cart, user_id=1):
+    return sorted((item['ProductId'], item['Quantity']) for item in cart.get_user_cart(user_id))
+
+def test_replace_cart(db_manager):
+    cart = CartDataAccess(db_manager)
+    cart.add_many(1, [(1, 1), (2, 2)])
+    assert cart.replace_cart(1, [(3, 1), (3, 2), (4, 1)])
+    assert cart_items(cart) == [(3, 3), (4, 1)]
+
+def test_failed_add_rolls_back_clear(db_manager):
+    cart = CartDataAccess(db_manager)
+    cart.add_many(1, [(1, 1), (2, 2)])
+    writes = []
+    db_manager.add_write_listener(writes.append)
+
+    # ProductId NULL vi phạm NOT NULL khi thêm, sau khi giỏ đã bị xóa trong transaction
+    assert not cart.replace_cart(1, [(3, 1), (None, 1)])
+    assert cart_items(cart) == [(1, 1), (2, 2)]
+    assert writes == []
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Test ProductCatalogCache: TTL và invalidate khi có ghi vào Products"""
+
+import time
+
+from database_manager import ProductCatalogCache, ProductDataAccess
+
+def add_product(db_manager, name, price=1000000, category='Sneakers'):
+    db_manager.execute_update(
+        "INSERT INTO Products (Name, Description, Price, ImageUrl, Category) VALUES (%s, %s, %s, %s, %s)",
+        (name, '', price, '', category)
+    )
+
+def test_cache_is_loaded_once_and_hit_afterwards(db_manager):
+    cache = ProductCatalogCache(db_manager, ttl=60)
+    assert len(cache.get_all()) == 12
+    assert len(cache.get_all()) == 12
+    assert cache.loads == 1 and cache.hits == 1
+
+def test_ttl_expiry_reloads(db_manager):
+    cache = ProductCatalogCache(db_manager, ttl=0.05)
+    cache.get_all()
+    time.sleep(0.1)
+    assert not cache.is_fresh()
+    cache.get_all()
+    assert cache.loads == 2
+
+def test_write_to_products_invalidates(db_manager):
+    cache = ProductCatalogCache(db_manager, ttl=60)
+    products = ProductDataAccess(db_manager, cache)
+    assert products.search_products_by_name('puma') == []
+    version = cache.version
+
+    add_product(db_manager, 'Puma Suede Classic')
+    assert cache.version > version and not cache.is_fresh()
+    assert [p['Name'] for p in products.search_products_by_name('puma')] == ['Puma Suede Classic']
+    assert cache.loads == 2
+
+def test_write_to_other_tables_keeps_cache(db_manager):
+    cache = ProductCatalogCache(db_manager, ttl=60)
+    cache.get_all()
+    db_manager.execute_update("UPDATE Orders SET Status = %s WHERE Id = %s", ('Completed', 3))
+    assert cache.is_fresh()
+    cache.get_all()
+    assert cache.loads == 1
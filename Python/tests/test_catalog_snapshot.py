@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Test CatalogSnapshot: ghi rồi đọc lại giữ nguyên catalog/aggregates, chế độ offline không truy vấn database"""
+
+from catalog_snapshot import CatalogSnapshot, open_snapshot_service
+
+def save_snapshot(db_service, path):
+    snapshot = CatalogSnapshot(str(path))
+    assert snapshot.save(db_service.products.get_all_products(), db_service.sales_aggregates.export_state())
+    return snapshot
+
+def test_save_load_round_trip(db_service, tmp_path):
+    snapshot = save_snapshot(db_service, tmp_path / 'catalog.db')
+    data = snapshot.load()
+
+    products = db_service.products.get_all_products()
+    assert [(p['Id'], p['Name'], p['Price'], p['Category']) for p in data['products']] == \
+        [(p['Id'], p['Name'], p['Price'], p['Category']) for p in products]
+    assert data['meta']['product_count'] == 12
+    assert data['aggregates'] == db_service.sales_aggregates.export_state()
+
+def test_empty_catalog_does_not_overwrite_snapshot(db_service, tmp_path):
+    snapshot = save_snapshot(db_service, tmp_path / 'catalog.db')
+    assert not snapshot.save([])
+    assert len(snapshot.load()['products']) == 12
+
+def test_offline_service_serves_snapshot_without_refresh(db_service, tmp_path):
+    snapshot = save_snapshot(db_service, tmp_path / 'catalog.db')
+    offline = open_snapshot_service(snapshot)
+    try:
+        assert offline.offline
+        aggregates = offline.sales_aggregates
+        # restore(refresh=False): Orders/OrderItems không có trong snapshot nên mọi refresh đều sẽ lỗi
+        assert aggregates.get_sales_statistics() == db_service.sales_aggregates.get_sales_statistics()
+        assert aggregates.get_popular_products(3) == db_service.sales_aggregates.get_popular_products(3)
+        assert aggregates.full_refreshes == 0 and aggregates.incremental_refreshes == 0
+
+        assert [p['Name'] for p in offline.products.search_products_by_name('adidas')] == \
+            [p['Name'] for p in db_service.products.search_products_by_name('adidas')] != []
+        assert not offline.save_snapshot()
+    finally:
+        offline.close_connections()
+
+def test_missing_snapshot_has_no_offline_service(tmp_path):
+    assert open_snapshot_service(CatalogSnapshot(str(tmp_path / 'missing.db'))) is None
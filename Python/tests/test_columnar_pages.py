@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Test phân trang keyset trên ColumnarCatalog: từng trang giống hệt trang SQL keyset"""
+
+import pytest
+
+from columnar_catalog import numpy_available
+from database_manager import ProductCatalogCache, ProductDataAccess
+
+pytestmark = pytest.mark.skipif(not numpy_available(), reason="numpy không được cài")
+
+# Trùng giá/tên với sản phẩm có sẵn để kiểm tra thứ tự theo Id khi khóa bằng nhau
+EXTRA_PRODUCTS = [
+    ('Nike Pegasus', 'Giày chạy bộ Nike', 2500000, 'Sneakers'),
+    ('adidas stan smith', 'Sneaker Adidas', 1900000, 'Sneakers'),
+    ('Nike Blazer', 'Sneaker Nike cổ cao', 2500000, 'Sneakers'),
+    ('Chelsea Boots Nike', 'Boot Nike', 3900000, 'Boots')
+]
+
+LISTINGS = [
+    ('category', ('sneaker',)), ('category', ('boots',)), ('category', ('không có',)),
+    ('price', (1000000, 3000000)), ('price', (0, float('inf'))), ('price', (2500000, 2500000)),
+    ('filter', ('nike', None, None, None)), ('filter', (None, 'sneaker', 1500000, 3000000)),
+    ('filter', ('nike', 'sneaker', None, 2800000)), ('filter', (None, None, None, None)),
+    ('filter', ('adidas', None, 1900000, float('inf')))
+]
+
+@pytest.fixture
+def products(db_manager):
+    db_manager.execute_many(
+        "INSERT INTO Products (Name, Description, Price, ImageUrl, Category) VALUES (%s, %s, %s, %s, %s)",
+        [(name, description, price, '', category) for name, description, price, category in EXTRA_PRODUCTS]
+    )
+    cache = ProductCatalogCache(db_manager, ttl=60)
+    cache.get_all()
+    assert cache.columnar is not None
+    return ProductDataAccess(db_manager, cache), ProductDataAccess(db_manager)
+
+def all_pages(products, listing, args, limit):
+    pages = []
+    after = None
+    while True:
+        page = products.get_product_page(listing, args, limit, after)
+        pages.append(([row['Id'] for row in page['products']], page['total'], page['next_cursor']))
+        after = page['next_cursor']
+        if after is None:
+            return pages
+
+@pytest.mark.parametrize('listing, args', LISTINGS)
+@pytest.mark.parametrize('limit', [1, 2, 5])
+def test_columnar_pages_match_sql_keyset(products, listing, args, limit):
+    columnar, sql = products
+    assert all_pages(columnar, listing, args, limit) == all_pages(sql, listing, args, limit)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Test lọc kết hợp thương hiệu + danh mục + khoảng giá"""
+
+import pytest
+
+@pytest.mark.parametrize('message, slots', [
+    ("giày nike sneaker dưới 3 triệu", {'brand': 'nike', 'category': 'sneakers', 'price_range': (0, 3000000)}),
+    ("giày adidas cao cấp", {'brand': 'adidas', 'category': None, 'price_range': (3000000, 5000000)}),
+    # Preset giá chỉ khớp nguyên từ: 'rẻ' trong "trẻ", 'mid' trong "midnight" không phải khoảng giá
+    ("giày nike cho trẻ em", {'brand': 'nike', 'category': None, 'price_range': None}),
+    ("midnight nike", {'brand': 'nike', 'category': None, 'price_range': None})
+])
+def test_extract_slots(chatbot, message, slots):
+    assert chatbot.extract_slots(message) == slots
+
+def test_compound_query_filters_all_slots(chatbot):
+    response = chatbot.get_response("giày nike sneaker dưới 3 triệu")
+    assert "Nike Air Max Đen" in response and "Nike Air Force Trắng" in response
+    assert "Adidas" not in response
+
+def test_brand_with_premium_preset(chatbot):
+    response = chatbot.get_response("giày adidas cao cấp")
+    assert "Adidas Ultraboost" in response
+    assert "Adidas Stan Smith" not in response
+
+def test_single_slot_is_not_compound(chatbot):
+    # Một slot (thương hiệu) -> tìm kiếm như trước, không thành lọc Nike dưới 1 triệu
+    assert not chatbot.is_compound(chatbot.extract_slots("giày nike cho trẻ em"))
+    assert chatbot.get_response("giày nike cho trẻ em") == chatbot.search_products("giày nike cho trẻ em")
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Test MonitoredConnectionPool: dùng lại connection, đóng pool và báo pool cạn"""
+
+import gc
+
+import pytest
+
+from config import ERROR_MESSAGES
+from connection_pool import MonitoredConnectionPool, PoolExhaustedError
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def is_connected(self):
+        return not self.closed
+
+    def reconnect(self):
+        self.closed = False
+
+    def reset_session(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+def test_connections_are_reused():
+    pool = MonitoredConnectionPool(FakeConnection, min_size=1, max_size=2)
+    for _ in range(5):
+        pool.get_connection().close()
+    assert pool.created == 1
+    assert pool.acquired == 5
+    assert pool.in_use == 0
+
+def test_closed_pool_refuses_new_connections():
+    pool = MonitoredConnectionPool(FakeConnection, min_size=1, max_size=2)
+    held = pool.get_connection()
+    pool.close_all()
+    assert pool.is_closed
+    with pytest.raises(Exception):
+        pool.get_connection()
+    held.close()
+    assert pool.size == 0
+    assert pool.created == 1
+
+def test_collecting_chatbot_keeps_shared_pool_open(db_service):
+    first = ShoeMartMySQLChatBot(db_service)
+    second = ShoeMartMySQLChatBot(db_service)
+    first.get_response("giày nike")
+    created = db_service.db_manager.pool.created
+
+    del first
+    gc.collect()
+
+    pool = db_service.db_manager.pool
+    assert not pool.is_closed
+    rows = db_service.db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")
+    assert rows[0]['Total'] == 12
+    assert "Nike" in second.get_response("giày nike")
+    assert pool.created == created
+
+def exhaust(pool):
+    """Giữ hết connection của pool, acquire tiếp theo hết hạn ngay"""
+    pool.acquire_timeout = 0.01
+    return [pool.get_connection() for _ in range(pool.max_size)]
+
+def test_exhausted_pool_is_not_an_empty_result(db_manager):
+    held = exhaust(db_manager.pool)
+    with pytest.raises(PoolExhaustedError):
+        db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")
+    for connection in held:
+        connection.close()
+    assert db_manager.execute_query("SELECT COUNT(*) AS Total FROM Products")[0]['Total'] == 12
+
+def test_chatbot_does_not_memoize_exhausted_pool(chatbot, db_service):
+    db_service.catalog_cache.invalidate()
+    held = exhaust(db_service.db_manager.pool)
+    assert chatbot.get_response("giày nike") == ERROR_MESSAGES['query_failed']
+    assert len(chatbot.response_memo) == 0
+
+    for connection in held:
+        connection.close()
+    assert "Nike" in chatbot.get_response("giày nike")
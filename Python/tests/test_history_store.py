@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Test ConversationHistory (ring buffer) và HistoryWriter (ghi nền theo lô)"""
+
+import json
+import sqlite3
+
+import pytest
+
+from history_store import ConversationHistory, HistoryWriter
+
+def test_ring_buffer_keeps_latest_entries():
+    history = ConversationHistory(capacity=3)
+    for i in range(5):
+        history.append(f"hỏi {i}", f"đáp {i}")
+    assert len(history) == 3
+    assert [entry.user for entry in history] == ["hỏi 2", "hỏi 3", "hỏi 4"]
+    assert [entry.bot for entry in history.recent(2)] == ["đáp 3", "đáp 4"]
+    assert history.recent(0) == []
+    assert set(history.to_list()[0]) == {'timestamp', 'user', 'bot'}
+
+@pytest.mark.parametrize('format', ['sqlite', 'jsonl'])
+def test_writer_persists_all_entries_on_stop(tmp_path, format):
+    path = str(tmp_path / f"history.{format}")
+    writer = HistoryWriter(path, format, batch_size=4, flush_interval=0.05, queue_size=100)
+    writer.start()
+    history = ConversationHistory(capacity=2, session_id='s1', writer=writer)
+    for i in range(10):
+        history.append(f"hỏi {i}", f"đáp {i}")
+    writer.stop()
+
+    assert not writer.is_alive()
+    assert writer.written == 10 and writer.dropped == 0 and writer.errors == 0
+    if format == 'sqlite':
+        with sqlite3.connect(path) as connection:
+            rows = connection.execute("SELECT SessionId, UserMessage FROM ChatHistory ORDER BY Id").fetchall()
+        messages = [user for _, user in rows]
+        assert {session_id for session_id, _ in rows} == {'s1'}
+    else:
+        with open(path, encoding='utf-8') as f:
+            messages = [json.loads(line)['user'] for line in f]
+    assert messages == [f"hỏi {i}" for i in range(10)]
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    writer = HistoryWriter(str(tmp_path / "history.db"), 'sqlite', queue_size=2)  # chưa start
+    history = ConversationHistory(capacity=10, session_id='s1', writer=writer)
+    for i in range(5):
+        history.append(f"hỏi {i}", f"đáp {i}")
+    assert writer.dropped == 3 and writer.stats()['pending'] == 2
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Test phân loại intent: regex biên dịch khớp vòng lặp cũ, 'trang sau' không lấn các intent tìm kiếm"""
+
+import pytest
+
+from intent_engine import IntentClassifier, classify_intent_loop
+from shoe_store_mysql_chatbot import INTENT_PATTERNS, preprocess_text
+
+# Patterns trước khi có intent 'next_page'
+BASELINE_PATTERNS = {
+    'greetings': [r'xin chào', r'chào', r'hello', r'hi', r'hey'],
+    'product_search': [r'tìm.*kiếm', r'xem.*sản.*phẩm', r'có.*gì', r'sản.*phẩm.*nào', r'giày.*gì'],
+    'brand_search': [r'nike', r'adidas', r'converse', r'timberland', r'birkenstock', r'puma', r'vans'],
+    'category_search': [r'sneaker', r'thể.*thao', r'tây', r'công.*sở', r'boot', r'sandal', r'dép'],
+    'price_search': [r'giá', r'tiền', r'dưới', r'trên', r'từ.*đến', r'khoảng', r'budget'],
+    'popular_products': [r'bán.*chạy', r'phổ.*biến', r'hot', r'trend', r'nổi.*tiếng'],
+    'product_detail': [r'chi.*tiết', r'thông.*tin.*sản.*phẩm', r'mô.*tả'],
+    'size_help': [r'size', r'cỡ', r'số', r'chọn.*size'],
+    'contact': [r'liên.*hệ', r'địa.*chỉ', r'hotline', r'cửa.*hàng'],
+    'help': [r'help', r'giúp.*đỡ', r'hướng.*dẫn', r'có.*thể.*làm.*gì'],
+    'statistics': [r'thống.*kê', r'báo.*cáo', r'doanh.*số', r'stats'],
+    'all_products': [r'tất.*cả.*sản.*phẩm', r'toàn.*bộ', r'xem.*hết']
+}
+
+MESSAGES = [
+    "xin chào", "giày nike", "adidas ultraboost", "có giày thể thao nào không", "giày boots", "dép sandal",
+    "giày dưới 2 triệu", "từ 1 đến 3 triệu", "sản phẩm bán chạy", "thống kê bán hàng", "toàn bộ sản phẩm",
+    "tìm giày chạy bộ màu đen", "cách chọn size", "địa chỉ cửa hàng ở đâu", "cảm ơn", "help",
+    "xem thêm giày nike", "xem thêm sneaker", "tiếp theo giày dưới 2 triệu", "next nike", "xem thêm sản phẩm",
+    "trang sau", "xem thêm", "tiếp theo", "next", "trang tiếp", "chi tiết sản phẩm", "giày tây công sở",
+    "xem hết", "hot trend", "hi", "", "   ", "giày"
+]
+
+def test_compiled_classifier_matches_loop():
+    classifier = IntentClassifier(INTENT_PATTERNS)
+    for message in MESSAGES:
+        text = preprocess_text(message)
+        assert classifier.classify(text) == classify_intent_loop(INTENT_PATTERNS, text), message
+
+def test_next_page_does_not_override_other_intents(chatbot):
+    baseline = IntentClassifier(BASELINE_PATTERNS)
+    for message in MESSAGES:
+        before = baseline.classify(chatbot.preprocess(message))
+        if before != baseline.default_intent:
+            assert chatbot.classify_intent(message) == before, message
+
+@pytest.mark.parametrize('message', ["trang sau", "xem thêm", "tiếp theo", "next", "trang tiếp"])
+def test_next_page_phrases(chatbot, message):
+    assert chatbot.classify_intent(message) == 'next_page'
+
+def test_search_with_next_page_words_returns_results(chatbot):
+    response = chatbot.get_response("xem thêm giày nike")
+    assert response != chatbot.NO_NEXT_PAGE
+    assert "Nike" in response
+
+@pytest.mark.parametrize('message, intent', [
+    ("addidas", 'brand_search'), ("xem thêm addidas", 'brand_search'), ("timberlan", 'brand_search'),
+    ("giay the thao", 'category_search'), ("sandall", 'category_search'), ("snaker", 'category_search'),
+    # Khớp gần đúng sai không được đổi intent so với trước
+    ("thanh toán thế nào", 'default'), ("pumpkin", 'default'), ("giày cao cấp", 'default')
+])
+def test_fuzzy_intent(chatbot, message, intent):
+    assert chatbot.classify_intent(message) == intent
+
+def test_price_preset_words_are_not_fuzzy_categories(chatbot):
+    assert chatbot.fuzzy_category("giày adidas cao cấp") is None
+    assert chatbot.extract_slots("giày adidas cao cấp")['category'] is None
+    assert chatbot.fuzzy_category("cao co") == 'boots'
+
+def test_fuzzy_matches_are_not_slots(chatbot):
+    assert chatbot.extract_slots("addidas giay the thao") == {'brand': None, 'category': None, 'price_range': None}
+    assert chatbot.extract_slots("nike pumpkin")['category'] is None
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Test lazy startup: request đầu tiên không chờ warm-up nạp xong catalog"""
+
+import threading
+import time
+
+from config import CHATBOT_CONFIG
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+
+def test_first_load_in_progress_falls_back_to_sql(db_service):
+    cache = db_service.catalog_cache
+    results = []
+    with cache._lock:  # warm-up đang nạp catalog lần đầu ở thread khác
+        worker = threading.Thread(target=lambda: results.append(db_service.products.search_products_by_name('nike')))
+        worker.start()
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+    assert {p['Name'] for p in results[0]} == {'Nike Air Max Đen', 'Nike Air Force Trắng'}
+    assert cache.loads == 0
+    assert cache.ready() and cache.loads == 1
+
+def test_lazy_chatbot_answers_while_warming_up(db_service, monkeypatch):
+    monkeypatch.setitem(CHATBOT_CONFIG, 'lazy_startup', True)
+    chatbot = ShoeMartMySQLChatBot(db_service)
+    assert "Nike" in chatbot.get_response("giày nike")
+    deadline = time.monotonic() + 10
+    while chatbot.warmup_seconds is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert chatbot.is_db_connected and db_service.catalog_cache.is_fresh()
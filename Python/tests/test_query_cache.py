@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Test QueryResultCache: invalidate theo bảng bị ghi, không lưu kết quả đọc trùng lúc có ghi"""
+
+from config import SQL_QUERIES
+from database_manager import QueryResultCache
+
+STATS_QUERY = SQL_QUERIES['get_sales_stats']
+ORDERS_QUERY = SQL_QUERIES['get_user_orders']
+
+def sales_stats(db_manager):
+    return db_manager.execute_query(STATS_QUERY, query_name='get_sales_stats')
+
+def test_write_invalidates_queries_reading_the_table(db_manager):
+    cache = db_manager.query_cache
+    sales_stats(db_manager)
+    db_manager.execute_query(ORDERS_QUERY, (1,), 'get_user_orders')
+    assert cache.stats()['entries'] == 2
+
+    db_manager.execute_update("UPDATE Orders SET Status = %s WHERE Id = %s", ('Completed', 3))
+    assert cache.stats()['entries'] == 0
+    assert cache.invalidations == 2
+
+    sneakers = {row['Category']: row['Revenue'] for row in sales_stats(db_manager)}['Sneakers']
+    assert sneakers == 2500000 * 4 + 3200000 + 2800000 * 3
+
+def test_write_to_other_tables_keeps_entries(db_manager):
+    cache = db_manager.query_cache
+    sales_stats(db_manager)
+    db_manager.execute_update(
+        "INSERT INTO CartItems (UserId, ProductId, Quantity) VALUES (%s, %s, %s)", (1, 1, 1)
+    )
+    sales_stats(db_manager)
+    assert cache.stats()['entries'] == 1 and cache.hits == 1
+
+def test_put_after_invalidate_is_skipped():
+    cache = QueryResultCache(max_bytes=1 << 20, ttls={'get_sales_stats': 60})
+    token = cache.read_token(STATS_QUERY)
+    cache.invalidate_table('orders')
+    cache.put('get_sales_stats', (), STATS_QUERY, [{'Category': 'Sneakers'}], token)
+    assert cache.get('get_sales_stats', ()) is None
+    assert cache.stale_puts == 1
+
+    token = cache.read_token(STATS_QUERY)
+    cache.invalidate_table('cartitems')
+    cache.put('get_sales_stats', (), STATS_QUERY, [{'Category': 'Sneakers'}], token)
+    assert cache.get('get_sales_stats', ()) == [{'Category': 'Sneakers'}]
+
+def test_write_during_read_is_not_cached(db_manager):
+    pooled_read = db_manager._pooled_read
+
+    def read_then_write(*args, **kwargs):
+        # Đọc xong nhưng trước khi put, một session khác ghi vào Orders
+        result = pooled_read(*args, **kwargs)
+        db_manager._pooled_read = pooled_read
+        db_manager.execute_update("UPDATE Orders SET Status = %s WHERE Id = %s", ('Completed', 3))
+        return result
+
+    db_manager._pooled_read = read_then_write
+    stale = sales_stats(db_manager)
+    assert db_manager.query_cache.stale_puts == 1
+    assert sales_stats(db_manager) != stale
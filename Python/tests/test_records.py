@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Test Record/ProductRow: hành xử như dict của dòng kết quả"""
+
+import pytest
+
+from records import OrderRow, ProductRow, ProductView
+
+COLUMNS = ('Id', 'Name', 'Price', 'Category', 'SoldCount')
+VALUES = (1, 'Nike Air Max Đen', 2500000, 'Sneakers', 4)
+
+def test_from_rows_behaves_like_dict():
+    row = ProductRow.from_rows(COLUMNS, [VALUES])[0]
+    assert dict(row) == dict(zip(COLUMNS, VALUES))
+    assert row['Name'] == 'Nike Air Max Đen'
+    assert 'Description' not in row and row.get('Description', '') == ''
+    assert len(row) == len(COLUMNS)
+    with pytest.raises(KeyError):
+        row['Description']
+    with pytest.raises(KeyError):
+        row['Unknown']
+
+def test_unknown_column_has_no_layout():
+    assert ProductRow.from_rows(('Id', 'Total'), [(1, 2)]) is None
+    assert ProductRow.layout(COLUMNS) is ProductRow.layout(list(COLUMNS))  # layout được cache
+
+def test_from_mapping_skips_unknown_columns():
+    row = ProductRow.from_mapping({'Id': 3, 'Name': 'Adidas Ultraboost', 'BatchKey': 1})
+    assert dict(row) == {'Id': 3, 'Name': 'Adidas Ultraboost'}
+    assert ProductRow.coerce_all([row])[0] is row
+
+def test_order_row_fields():
+    row = OrderRow.from_mapping({'Id': 1, 'Status': 'Completed', 'ProductName': 'Oxford Da Nâu'})
+    assert row == {'Id': 1, 'Status': 'Completed', 'ProductName': 'Oxford Da Nâu'}
+
+def test_product_view_reads_through_row():
+    row = ProductRow.from_rows(COLUMNS, [VALUES])[0]
+    view = ProductView(row, '2.500.000 VNĐ')
+    assert dict(view) == {'id': 1, 'name': 'Nike Air Max Đen', 'description': '', 'price': 2500000,
+                          'formatted_price': '2.500.000 VNĐ', 'category': 'Sneakers', 'image_url': ''}
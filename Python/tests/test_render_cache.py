@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Test RenderCache: fragment và trang đã render bị xóa khi catalog đổi phiên bản"""
+
+from render_cache import RenderCache
+
+def test_version_change_resets_entries():
+    cache = RenderCache(max_entries=2)
+    cache.put(1, 'a', 'A')
+    cache.put(1, 'b', 'B')
+    assert cache.get(1, 'a') == 'A'
+    assert cache.get(2, 'a') is None
+    assert cache.stats()['size'] == 0 and cache.resets == 1
+    # version None: không cache
+    cache.put(None, 'a', 'A')
+    assert cache.get(None, 'a') is None
+
+def test_lru_eviction():
+    cache = RenderCache(max_entries=2)
+    cache.put(1, 'a', 'A')
+    cache.put(1, 'b', 'B')
+    cache.get(1, 'a')
+    cache.put(1, 'c', 'C')
+    assert cache.get(1, 'b') is None and cache.get(1, 'a') == 'A'
+    assert cache.evictions == 1
+
+def test_catalog_write_drops_rendered_pages(chatbot, db_manager):
+    _, text = chatbot.render_product_page('category', ('boots',), 'Boots', 5)
+    assert "4.500.000 VNĐ" in text
+    assert chatbot.render_product_page('category', ('boots',), 'Boots', 5)[1] == text
+    assert chatbot.response_cache.hits == 1 and chatbot.fragment_cache.stats()['size'] == 2
+    version = chatbot.catalog_version()
+
+    db_manager.execute_update("UPDATE Products SET Price = %s WHERE Id = %s", (4200000, 6))
+    _, text = chatbot.render_product_page('category', ('boots',), 'Boots', 5)
+    assert chatbot.catalog_version() > version
+    assert "4.200.000 VNĐ" in text and "4.500.000 VNĐ" not in text
+    assert chatbot.response_cache.resets == 1 and chatbot.fragment_cache.resets == 1
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Test ReplicaRouter: round-robin, loại replica lỗi và probe lại ở thread nền"""
+
+import threading
+import time
+
+from replica_router import Replica, ReplicaRouter
+
+def make_router(probe=lambda replica: True, **kwargs):
+    replicas = [Replica('r1', None), Replica('r2', None)]
+    return ReplicaRouter(replicas, probe, **kwargs), replicas
+
+def test_round_robin_alternates():
+    router, (r1, r2) = make_router()
+    assert [router.choose() for _ in range(4)] == [r1, r2, r1, r2]
+
+def test_least_latency_prefers_fastest():
+    router, (r1, r2) = make_router(strategy='least_latency')
+    router.record_success(r1, 0.050)
+    router.record_success(r2, 0.010)
+    assert router.choose() is r2
+
+def test_consecutive_failures_eject_replica():
+    router, (r1, r2) = make_router(max_failures=2, retry_interval=60)
+    router.record_failure(r1, Exception('timeout'))
+    router.record_success(r1, 0.01)  # thành công thì đếm lại từ đầu
+    router.record_failure(r1, Exception('timeout'))
+    assert r1.healthy
+    router.record_failure(r1, Exception('timeout'))
+    assert not r1.healthy and r1.ejections == 1
+    assert {router.choose() for _ in range(4)} == {r2}
+    router.eject(r2)
+    assert router.choose() is None  # đọc từ primary
+
+def test_probe_restores_ejected_replica():
+    probed = threading.Event()
+    def probe(replica):
+        probed.set()
+        return True
+    router, (r1, r2) = make_router(probe, retry_interval=0)
+    router.eject(r1)
+    router.choose()  # đến hạn retry -> probe ở thread nền
+    assert probed.wait(5)
+    for _ in range(500):
+        if r1.healthy:
+            break
+        time.sleep(0.01)
+    assert r1.healthy and r1.recoveries == 1 and not r1.probing
+
+def test_failed_probe_keeps_replica_ejected():
+    done = threading.Event()
+    def probe(replica):
+        try:
+            raise Exception('connection refused')
+        finally:
+            done.set()
+    router, (r1, r2) = make_router(probe, retry_interval=0)
+    router.eject(r1)
+    router.choose()
+    assert done.wait(5)
+    for _ in range(500):
+        if not r1.probing:
+            break
+        time.sleep(0.01)
+    assert not r1.healthy and r1.recoveries == 0
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Test ResponseMemo: entry cần database hết hạn khi có ghi hoặc catalog đổi phiên bản, lỗi không được memo"""
+
+from config import ERROR_MESSAGES
+from response_memo import ResponseMemo
+
+TTLS = {'greetings': None, 'brand_search': 30}
+
+def test_database_entries_expire_on_write_and_version():
+    memo = ResponseMemo(10, TTLS)
+    memo.put("Giày Nike ", 'brand_search', "nike", catalog_version=1)
+    memo.put("xin chào", 'greetings', ("chào",), catalog_version=1)
+    assert memo.get("giày nike", 1) == "nike"
+    assert memo.get("giày nike", 2) is None
+
+    memo.put("giày nike", 'brand_search', "nike", catalog_version=1)
+    memo.on_write("UPDATE Orders SET Status = 'Completed'")
+    assert memo.get("giày nike", 1) is None
+    assert memo.expirations == 2
+
+    # Intent tĩnh không phụ thuộc database
+    assert memo.get("xin chào!", 2) == "chào"
+
+def test_chatbot_memo_follows_writes(chatbot, db_manager):
+    memo = chatbot.response_memo
+    first = chatbot.get_response("giày nike")
+    assert chatbot.get_response("giày nike") == first
+    assert memo.exact_hits == 1
+
+    db_manager.execute_update(
+        "INSERT INTO CartItems (UserId, ProductId, Quantity) VALUES (%s, %s, %s)", (1, 1, 1)
+    )
+    assert chatbot.get_response("giày nike") == first
+    assert memo.exact_hits == 1 and memo.expirations == 1
+
+    db_manager.execute_update("UPDATE Products SET Name = %s WHERE Id = %s", ('Nike Air Max Xanh', 1))
+    response = chatbot.get_response("giày nike")
+    assert "Nike Air Max Xanh" in response and "Nike Air Max Đen" not in response
+    assert memo.expirations == 2
+
+def test_error_replies_are_not_memoized(chatbot):
+    products = chatbot.db_service.products
+
+    def failing_search(search_term):
+        raise RuntimeError("database unavailable")
+
+    products.search_products_by_name = failing_search
+    assert chatbot.get_response("giày nike") == ERROR_MESSAGES['query_failed']
+    assert len(chatbot.response_memo) == 0
+
+    del products.search_products_by_name
+    assert "Nike" in chatbot.get_response("giày nike")
+    assert len(chatbot.response_memo) == 1
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Test SalesAggregates: refresh tăng dần cho cùng kết quả với GROUP BY toàn bộ lịch sử"""
+
+from config import SQL_QUERIES
+from sales_aggregates import SalesAggregates
+from conftest import add_order
+
+def sql_sales_stats(db_manager):
+    rows = db_manager.execute_query(SQL_QUERIES['get_sales_stats'])
+    return {row['Category']: (row['TotalSold'], row['Revenue']) for row in rows}
+
+def aggregate_sales_stats(aggregates):
+    return {stat['Category']: (stat['TotalSold'], stat['Revenue']) for stat in aggregates.get_sales_statistics()}
+
+def sold_counts(products):
+    return {product['Id']: product['SoldCount'] for product in products}
+
+def set_status(db_manager, order_id, status):
+    db_manager.execute_update("UPDATE Orders SET Status = %s WHERE Id = %s", (status, order_id))
+
+def test_full_refresh_matches_sql(db_manager):
+    aggregates = SalesAggregates(db_manager)
+    assert aggregate_sales_stats(aggregates) == sql_sales_stats(db_manager)
+    expected = db_manager.execute_query(SQL_QUERIES['get_popular_products'], (10,))
+    assert sold_counts(aggregates.get_popular_products(10)) == sold_counts(expected)
+
+def test_terminal_orders_are_not_tracked_as_pending(db_manager):
+    aggregates = SalesAggregates(db_manager)
+    aggregates.refresh(full=True)
+    # Đơn 3 Pending được theo dõi, đơn 4 Cancelled thì không
+    assert set(aggregates.export_state()['pending_orders']) == {3}
+
+def test_incremental_refresh_after_status_changes(db_manager):
+    aggregates = SalesAggregates(db_manager)
+    aggregates.refresh(full=True)
+
+    set_status(db_manager, 3, 'Completed')
+    add_order(db_manager, 6, 'Pending', [(4, 1)])
+    add_order(db_manager, 7, 'Processing', [(10, 2)])
+    add_order(db_manager, 8, 'Cancelled', [(1, 5)])
+    aggregates.refresh()
+    assert set(aggregates.export_state()['pending_orders']) == {6, 7}
+
+    set_status(db_manager, 6, 'Cancelled')
+    set_status(db_manager, 7, 'Completed')
+    aggregates.refresh()
+    assert aggregates.export_state()['pending_orders'] == {}
+    assert aggregates.incremental_refreshes == 2
+
+    assert aggregate_sales_stats(aggregates) == sql_sales_stats(db_manager)
+    rebuilt = SalesAggregates(db_manager)
+    assert sold_counts(aggregates.get_popular_products(20)) == sold_counts(rebuilt.get_popular_products(20))
+
+def test_restored_terminal_pending_orders_are_dropped(db_manager):
+    aggregates = SalesAggregates(db_manager)
+    state = aggregates.export_state()
+    # Snapshot cũ có thể còn đơn đã hủy trong pending_orders
+    state['pending_orders'][4] = 5
+    aggregates.restore(state)
+    aggregates.refresh()
+    assert 4 not in aggregates.export_state()['pending_orders']
+    assert aggregate_sales_stats(aggregates) == sql_sales_stats(db_manager)
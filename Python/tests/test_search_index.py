@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Test ProductSearchIndex và TrigramIndex"""
+
+from search_index import ProductSearchIndex, TrigramIndex, fold_diacritics
+from conftest import PRODUCTS
+
+def build_index(**kwargs) -> ProductSearchIndex:
+    products = [{'Id': i, 'Name': name, 'Description': description, 'Price': price, 'Category': category}
+                for i, (name, description, price, category) in enumerate(PRODUCTS, 1)]
+    return ProductSearchIndex(products, **kwargs)
+
+def names(products):
+    return [p['Name'] for p in products]
+
+def test_fold_diacritics():
+    assert fold_diacritics('Giày Đỏ thể thao') == 'Giay Do the thao'
+
+def test_and_or_and_prefix():
+    index = build_index()
+    assert set(names(index.search('nike'))) == {'Nike Air Max Đen', 'Nike Air Force Trắng'}
+    assert names(index.search('nike max')) == ['Nike Air Max Đen']
+    assert set(names(index.search('nike hoặc converse'))) == {'Nike Air Max Đen', 'Nike Air Force Trắng',
+                                                              'Converse Chuck Taylor'}
+    assert 'Adidas Ultraboost' in names(index.search('ultra'))
+    assert index.search('') == [] and index.search('hoặc') == []
+
+def test_name_match_ranks_before_category_match():
+    # Timberland có "Boots" trong Name, Dr. Martens chỉ có trong Category
+    assert names(build_index().search('boots')) == ['Timberland Work Boots', 'Dr. Martens Chelsea']
+
+def test_diacritics_are_optional():
+    index = build_index()
+    assert names(index.search('giay bet')) == names(index.search('giày bệt')) == ['Giày Bệt Da Mềm']
+
+def test_fuzzy_matches_misspelled_terms():
+    index = build_index()
+    assert {'Adidas Ultraboost', 'Adidas Stan Smith'} <= set(names(index.search('addidas')))
+    assert build_index(fuzzy=False).search('addidas') == []
+
+def test_trigram_lookup_and_find():
+    index = TrigramIndex(['nike', 'adidas', 'new balance', 'converse'])
+    assert index.lookup('addidas')[0][0] == 'adidas'
+    assert index.lookup('nike')[0] == ('nike', 1.0)
+    assert index.lookup('xyz') == []
+    assert index.lookup('ni') == []  # ngắn hơn min_length
+    assert index.find('tìm giày new balanse size 42')[0] == 'new balance'
+    assert index.find('giày rẻ') is None
+
+def test_strict_trigram_rejects_loose_matches():
+    loose = TrigramIndex(['pump', 'the thao', 'sandal'])
+    strict = TrigramIndex(['pump', 'the thao', 'sandal'], strict=True)
+    assert loose.find('pumpkin')[0] == 'pump'
+    assert strict.find('pumpkin') is None                     # độ dài khác xa
+    assert strict.find('thanh toan the nao') is None          # từng từ không gần nhau
+    assert strict.lookup('pums') == []                        # term ngắn cần độ tương đồng cao hơn
+    assert strict.find('dep sandall')[0] == 'sandal'
+    assert strict.find('giay the thao')[0] == 'the thao'
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Test PreparedStatementCache: câu SQL dùng lại cursor prepared, LRU đẩy ra thì close cursor"""
+
+import sqlite3
+
+import pytest
+
+from config import DATABASE_CONFIG, SQL_QUERIES
+from sqlite_backend import SQLiteConnection
+from statement_cache import PreparedStatementCache
+
+def test_statement_is_reused_and_evicted():
+    connection = SQLiteConnection(':memory:')
+    statements = PreparedStatementCache(connection, max_statements=2)
+    first = "SELECT 1 AS Value"
+    cursor = statements.execute(first)
+    # Câu SQL bằng nhau nhưng khác object vẫn execute bằng object của lần đầu (mysql.connector không prepare lại)
+    assert statements.execute(''.join(["SELECT 1 ", "AS Value"])) is cursor
+    assert statements._statements[first][0] is first
+    assert statements.prepares == 1 and statements.reuses == 1
+
+    statements.execute("SELECT 2 AS Value")
+    statements.execute(first)
+    statements.execute("SELECT 3 AS Value")
+    assert len(statements) == 2 and statements.evictions == 1
+    assert "SELECT 2 AS Value" not in statements._statements
+    assert statements.execute(first) is cursor
+
+    statements.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        cursor.execute(first)
+
+def test_named_queries_use_prepared_statements(db_manager, monkeypatch):
+    monkeypatch.setitem(DATABASE_CONFIG, 'statement_cache_size', 1)
+    for _ in range(3):
+        assert db_manager.execute_query(SQL_QUERIES['get_product_by_id'], (1,), 'get_product_by_id')
+    stats = db_manager.statement_stats()
+    assert stats['prepares'] == 1 and stats['reuses'] == 2
+
+    db_manager.execute_query(SQL_QUERIES['get_user_cart'], (1,), 'get_user_cart')
+    db_manager.execute_query(SQL_QUERIES['get_product_by_id'], (1,), 'get_product_by_id')
+    stats = db_manager.statement_stats()
+    assert stats['statements'] == 1 and stats['evictions'] == 2 and stats['prepares'] == 3
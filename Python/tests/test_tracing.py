@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""Test Tracer: nhãn intent của memo hit, service snapshot offline cũng được đo"""
+
+import pytest
+
+import tracing
+from catalog_snapshot import CatalogSnapshot
+from config import SNAPSHOT_CONFIG
+from shoe_store_mysql_chatbot import ShoeMartMySQLChatBot
+
+@pytest.fixture
+def tracer(monkeypatch):
+    tracer = tracing.Tracer(enabled=True)
+    monkeypatch.setattr(tracing, '_tracer_instance', tracer)
+    return tracer
+
+def test_memo_hits_are_labelled(tracer, db_service):
+    chatbot = ShoeMartMySQLChatBot(db_service)
+    chatbot.get_response("xin chào")
+    chatbot.get_response("xin chào")
+    chatbot.get_response("giày nike")
+    chatbot.get_response("giày nike")
+    requests = tracer.snapshot()['chatbot_request']
+    assert set(requests) == {'greetings', 'brand_search', 'memo'}
+    assert requests['memo']['count'] == 2
+
+def test_offline_snapshot_service_is_instrumented(tracer, db_service, tmp_path, monkeypatch):
+    path = str(tmp_path / 'catalog.db')
+    assert CatalogSnapshot(path).save(db_service.products.get_all_products())
+    monkeypatch.setitem(SNAPSHOT_CONFIG, 'enabled', True)
+    monkeypatch.setitem(SNAPSHOT_CONFIG, 'path', path)
+
+    chatbot = ShoeMartMySQLChatBot(db_service, autostart=False)
+    chatbot._snapshot_fallback = True
+    db_service.close_connections()  # MySQL "mất kết nối"
+    chatbot.start_warm_up()
+    try:
+        assert chatbot.db_service is not db_service and chatbot.db_service.offline
+        assert "Nike" in chatbot.get_response("giày nike")
+        assert tracer.snapshot()['chatbot_stage']['db']['count'] >= 1
+    finally:
+        chatbot.db_service.close_connections()
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Tracing theo từng giai đoạn cho ShoeMart ChatBot
+Đo thời gian classify_intent / extract_* / DB / format trong get_response và từng
+execute_query (theo tên query), gom vào histogram, xuất log JSON hoặc text kiểu Prometheus.
+Khi tắt, không có hàm nào bị bọc nên hot path không tốn thêm gì.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+import logging
+from typing import Dict, Any, Callable, Iterable, Optional
+from connection_pool import LatencyHistogram
+from config import TRACING_CONFIG
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Giai đoạn của get_response -> tên method trên chatbot
+CHATBOT_STAGES = {
+    'classify_intent': ['classify_intent'],
+    'extract_category': ['extract_category'],
+    'extract_price_range': ['extract_price_range'],
+    'extract_search_term': ['extract_search_term'],
+    'format': ['format_product_list', 'format_product_page', 'format_search_results',
+               'format_fallback_search', 'format_popular_products', 'format_sales_statistics']
+}
+
+# Metric -> (tên label, mô tả) khi xuất Prometheus
+METRICS = {
+    'chatbot_request': ('intent', 'Thời gian xử lý get_response theo intent'),
+    'chatbot_stage': ('stage', 'Thời gian từng giai đoạn trong get_response'),
+    'db_query': ('query', 'Thời gian execute_query theo tên query (gồm cả cache hit)')
+}
+
+# Trace của request hiện tại (dùng contextvars để đúng cả với thread lẫn asyncio task)
+_current_trace = contextvars.ContextVar('shoemart_trace', default=None)
+
+class Tracer:
+    """Gom thời gian vào histogram theo (metric, label)"""
+
+    def __init__(self, enabled: bool = False, log_requests: bool = False):
+        self.enabled = enabled
+        self.log_requests = log_requests
+        self._histograms = {}  # (metric, label) -> LatencyHistogram
+        self._lock = threading.Lock()
+
+    def observe(self, metric: str, label: str, seconds: float):
+        """Ghi nhận một lần đo và cộng vào trace của request đang chạy (nếu có)"""
+        key = (metric, label)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        histogram.observe(seconds)
+
+        trace = _current_trace.get()
+        if trace is not None and metric != 'chatbot_request':
+            stages = trace['stages']
+            name = label if metric == 'chatbot_stage' else f"{metric}:{label}"
+            stages[name] = stages.get(name, 0.0) + seconds * 1000
+
+    def wrap(self, metric: str, label: str, function: Callable, result_key: Optional[str] = None) -> Callable:
+        """Bọc function (sync hoặc coroutine) để đo thời gian
+
+        result_key: lưu kết quả trả về vào trace của request (vd. 'intent').
+        """
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def traced_async(*args, **kwargs):
+                active = self._enter(label)
+                if active is False:
+                    return await function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    self.observe(metric, label, time.perf_counter() - start)
+                    if active is not None:
+                        active.discard(label)
+            return traced_async
+
+        @functools.wraps(function)
+        def traced(*args, **kwargs):
+            active = self._enter(label)
+            if active is False:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                self.observe(metric, label, time.perf_counter() - start)
+                if active is not None:
+                    active.discard(label)
+            if result_key:
+                trace = _current_trace.get()
+                if trace is not None:
+                    trace[result_key] = result
+            return result
+        return traced
+
+    def _enter(self, label: str):
+        """Đánh dấu giai đoạn đang chạy trong request; trả về False nếu là lời gọi lồng
+        (vd. DAO gọi DAO) để không tính hai lần"""
+        trace = _current_trace.get()
+        if trace is None:
+            return None
+        active = trace['active']
+        if label in active:
+            return False
+        active.add(label)
+        return active
+
+    def _start_request(self):
+        trace = {'intent': 'unknown', 'stages': {}, 'active': set(), 'start': time.perf_counter()}
+        return trace, _current_trace.set(trace)
+
+    def _finish_request(self, trace: Dict[str, Any], token):
+        _current_trace.reset(token)
+        elapsed = time.perf_counter() - trace['start']
+        self.observe('chatbot_request', trace['intent'], elapsed)
+        if self.log_requests:
+            logger.info(json.dumps({
+                'event': 'chat_request',
+                'intent': trace['intent'],
+                'total_ms': round(elapsed * 1000, 3),
+                'stages_ms': {name: round(ms, 3) for name, ms in trace['stages'].items()}
+            }, ensure_ascii=False))
+
+    def label_request(self, intent: str):
+        """Đặt nhãn intent cho request đang chạy khi classify_intent không được gọi (vd. memo hit)"""
+        trace = _current_trace.get()
+        if trace is not None:
+            trace['intent'] = intent
+
+    def wrap_request(self, function: Callable) -> Callable:
+        """Bọc get_response: mỗi lần gọi là một trace request"""
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def traced_request_async(*args, **kwargs):
+                trace, token = self._start_request()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    self._finish_request(trace, token)
+            return traced_request_async
+
+        @functools.wraps(function)
+        def traced_request(*args, **kwargs):
+            trace, token = self._start_request()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._finish_request(trace, token)
+        return traced_request
+
+    def instrument_chatbot(self, chatbot):
+        """Bọc get_response và các giai đoạn của nó trên instance chatbot"""
+        if not self.enabled or getattr(chatbot, '_traced', False):
+            return
+        for stage, method_names in CHATBOT_STAGES.items():
+            for method_name in method_names:
+                method = getattr(chatbot, method_name, None)
+                if method is not None:
+                    result_key = 'intent' if method_name == 'classify_intent' else None
+                    setattr(chatbot, method_name, self.wrap('chatbot_stage', stage, method, result_key))
+        chatbot.get_response = self.wrap_request(chatbot.get_response)
+        chatbot._traced = True
+
+        if chatbot.db_service is not None:
+            self.instrument_service(chatbot.db_service)
+
+    def instrument_service(self, db_service):
+        """Bọc các method public của DAO (giai đoạn 'db') và execute_query của db_manager"""
+        if not self.enabled or getattr(db_service, '_traced', False):
+            return
+        for dao_name in ('products', 'orders', 'cart'):
+            dao = getattr(db_service, dao_name, None)
+            if dao is None:
+                continue
+            for method_name in public_methods(dao):
+                if inspect.isgeneratorfunction(getattr(type(dao), method_name)):
+                    continue  # generator: chỉ đo được lúc tạo, bỏ qua
+                setattr(dao, method_name, self.wrap('chatbot_stage', 'db', getattr(dao, method_name)))
+        self.instrument_db_manager(db_service.db_manager)
+        db_service._traced = True
+
+    def instrument_db_manager(self, db_manager):
+        """Bọc execute_query, gắn nhãn theo query_name"""
+        execute_query = db_manager.execute_query
+        tracer = self
+
+        if inspect.iscoroutinefunction(execute_query):
+            @functools.wraps(execute_query)
+            async def traced_execute_query_async(query, params=None, query_name=None):
+                start = time.perf_counter()
+                try:
+                    if query_name is None:
+                        return await execute_query(query, params)
+                    return await execute_query(query, params, query_name=query_name)
+                finally:
+                    tracer.observe('db_query', query_name or 'unnamed', time.perf_counter() - start)
+            db_manager.execute_query = traced_execute_query_async
+            return
+
+        @functools.wraps(execute_query)
+        def traced_execute_query(query, params=None, query_name=None):
+            start = time.perf_counter()
+            try:
+                return execute_query(query, params, query_name=query_name)
+            finally:
+                tracer.observe('db_query', query_name or 'unnamed', time.perf_counter() - start)
+        db_manager.execute_query = traced_execute_query
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Tóm tắt histogram: {metric: {label: {...}}}"""
+        result = {}
+        for (metric, label), histogram in sorted(self._histograms.items()):
+            result.setdefault(metric, {})[label] = histogram.snapshot()
+        return result
+
+    def prometheus_text(self) -> str:
+        """Xuất histogram theo định dạng text của Prometheus (đơn vị giây)"""
+        lines = []
+        grouped = {}
+        for (metric, label), histogram in sorted(self._histograms.items()):
+            grouped.setdefault(metric, []).append((label, histogram))
+
+        for metric, entries in grouped.items():
+            label_name, description = METRICS.get(metric, ('name', metric))
+            name = f"shoemart_{metric}_seconds"
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} histogram")
+            for label, histogram in entries:
+                label_value = label.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for bound, count in zip(list(histogram.bounds) + ['+Inf'], histogram.counts):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else repr(bound / 1000)
+                    lines.append(f'{name}_bucket{{{label_name}="{label_value}",le="{le}"}} {cumulative}')
+                lines.append(f'{name}_sum{{{label_name}="{label_value}"}} {histogram.total_ms / 1000}')
+                lines.append(f'{name}_count{{{label_name}="{label_value}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        """Xóa toàn bộ histogram"""
+        with self._lock:
+            self._histograms = {}
+
+def public_methods(obj) -> Iterable[str]:
+    """Tên các method public (không bắt đầu bằng '_') của một object"""
+    return [
+        name for name in dir(type(obj))
+        if not name.startswith('_') and callable(getattr(type(obj), name))
+    ]
+
+# Tracer dùng chung trong process, bật/tắt qua TRACING_CONFIG
+_tracer_instance = Tracer(TRACING_CONFIG['enabled'], TRACING_CONFIG['log_requests'])
+
+def get_tracer() -> Tracer:
+    """Lấy tracer dùng chung"""
+    return _tracer_instance